@@ -15,24 +15,53 @@ import os
 import blf
 import re
 import urllib.request
+import urllib.parse
+import urllib.error
 import zipfile
-import io
 import shutil
 import math
+import struct
+import hashlib
+import queue
+import zlib
+import mmap
+import threading
+import subprocess
+import time
+import functools
+import itertools
+from array import array
+from collections import OrderedDict, defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
 from gpu_extras.batch import batch_for_shader
 from bpy_extras import view3d_utils
+from bpy_extras.io_utils import ImportHelper, ExportHelper
 from mathutils import Vector, Euler, Matrix
-from bpy.props import StringProperty, FloatVectorProperty, FloatProperty, EnumProperty, BoolProperty
+from bpy.app.handlers import persistent
+from bpy.props import StringProperty, FloatVectorProperty, FloatProperty, EnumProperty, BoolProperty, IntProperty
 
 # --- CONFIG & PATHS ---
-BLOCKS_JSON_URL = "https://raw.githubusercontent.com/BigthirstyTM/TM2020-Inventory-Data/main/BlockInfoInventory.gbx.json"
-ITEMS_JSON_URL = "https://raw.githubusercontent.com/BigthirstyTM/TM2020-Inventory-Data/main/ItemInventory.gbx.json"
+DATA_BASE_URL = "https://raw.githubusercontent.com/BigthirstyTM/TM2020-Inventory-Data/main/"
+BLOCKS_JSON_URL = DATA_BASE_URL + "BlockInfoInventory.gbx.json"
+ITEMS_JSON_URL = DATA_BASE_URL + "ItemInventory.gbx.json"
 ZIP_URL = "https://github.com/BigthirstyTM/TM2020-Inventory-Data/archive/refs/heads/main.zip"
 
 CACHE_DIR = os.path.join(bpy.utils.user_resource('SCRIPTS'), "presets", "tm_inventory_cache")
 ICONS_DIR = os.path.join(CACHE_DIR, "icons")
 BLOCKS_JSON_FILE = os.path.join(CACHE_DIR, "blocks.json")
 ITEMS_JSON_FILE = os.path.join(CACHE_DIR, "items.json")
+BLOCKS_INDEX_FILE = os.path.join(CACHE_DIR, "blocks.idx")
+ITEMS_INDEX_FILE = os.path.join(CACHE_DIR, "items.idx")
+BLOCKS_SEARCH_FILE = os.path.join(CACHE_DIR, "blocks.sidx")
+ITEMS_SEARCH_FILE = os.path.join(CACHE_DIR, "items.sidx")
+MANIFEST_FILE = os.path.join(CACHE_DIR, "manifest.json")
+ZIP_FILE = os.path.join(CACHE_DIR, "data.zip")
+ATLAS_FILE = os.path.join(CACHE_DIR, "icons_{}.atlas")
+LIBRARY_DIR = os.path.join(CACHE_DIR, "library")
+GBX_EXTS = (".EDClassic.Gbx", ".Item.Gbx", ".Gbx")
+GBX_EXTS_LOWER = tuple(e.lower() for e in GBX_EXTS) # Files are matched case-insensitively (.gbx, .Item.GBX)
+CATALOG_FILE = os.path.join(CACHE_DIR, "gbx_catalog.json")
+FOOTPRINT_FILE = os.path.join(CACHE_DIR, "footprints_{}.json")
 
 # --- PREFERENCES ---
 def update_theme(self, context):
@@ -46,10 +75,29 @@ def update_theme(self, context):
         self.ui_bg_color = (0.01, 0.01, 0.01, 1.0); self.ui_accent_color = (0.0, 0.45, 0.2, 0.95)
         self.ui_text_color = (1.0, 1.0, 1.0, 1.0); self.ghost_color = (0.0, 1.0, 0.4, 0.05); self.ghost_outline_color = (0.2, 1.0, 0.4, 0.8)
 
+def update_gbx_paths(self, context):
+    tm_catalog.refresh_async([self.path_blocks, self.path_items])
+
+def update_hide_missing(self, context):
+    if tm_manager.search_query: tm_manager.update_live_search()
+
+def update_icon_budget(self, context):
+    tm_manager.icons.set_budget(self.icon_cache_size)
+
+def update_preview_budget(self, context):
+    tm_manager.previews.set_budget(self.preview_cache_mb)
+
+def update_lod(self, context):
+    if self.lod_enabled: lod_timer_arm()
+    elif bpy.app.timers.is_registered(_lod_timer): bpy.app.timers.unregister(_lod_timer); tm_lod.restore_all()
+
+def update_profile(self, context):
+    tm_profile.set_enabled(self.profile)
+
 class TM2020_Inventory_Preferences(bpy.types.AddonPreferences):
     bl_idname = __name__
-    path_blocks: StringProperty(name="Blocks Path", default=r"C:\Users\PC\OpenplanetNext\Extract\GameData\Stadium\GameCtnBlockInfo\GameCtnBlockInfoClassic", subtype='DIR_PATH')
-    path_items: StringProperty(name="Items Path", default=r"C:\Users\PC\OpenplanetNext\Extract\GameData\Stadium\Items", subtype='DIR_PATH')
+    path_blocks: StringProperty(name="Blocks Path", default=r"C:\Users\PC\OpenplanetNext\Extract\GameData\Stadium\GameCtnBlockInfo\GameCtnBlockInfoClassic", subtype='DIR_PATH', update=update_gbx_paths)
+    path_items: StringProperty(name="Items Path", default=r"C:\Users\PC\OpenplanetNext\Extract\GameData\Stadium\Items", subtype='DIR_PATH', update=update_gbx_paths)
     visible_only: BoolProperty(name="Visible part only", default=True)
     merge_objects: BoolProperty(name="Merge objects (Importer)", default=False)
     auto_join: BoolProperty(name="Auto-join meshes", default=True)
@@ -61,313 +109,2313 @@ class TM2020_Inventory_Preferences(bpy.types.AddonPreferences):
     ghost_color: FloatVectorProperty(name="Ghost Fill", subtype='COLOR', size=4, min=0.0, max=1.0, default=(0.0, 1.0, 0.4, 0.05))
     ghost_outline_color: FloatVectorProperty(name="Ghost Outline", subtype='COLOR', size=4, min=0.0, max=1.0, default=(0.2, 1.0, 0.4, 0.8))
     ghost_outline_width: FloatProperty(name="Outline Width", default=2.0, min=0.5, max=10.0)
+    data_url: StringProperty(name="Data Mirror", description="Base URL (https:// or file://) of the inventory data repository", default=DATA_BASE_URL)
+    icon_cache_size: IntProperty(name="Icon Cache Size", description="Icons kept on the GPU; an atlas page counts as the icons it holds", default=256, min=32, max=8192, update=update_icon_budget)
+    preview_cache_mb: IntProperty(name="Preview Cache (MB)", description="Approximate memory kept for imported block meshes so they can be re-used without running the importer", default=256, min=0, max=8192, update=update_preview_budget)
+    asset_library: BoolProperty(name="Asset Library", description="Keep converted meshes in .blend files so later sessions skip the GBX importer. When off, cards prefetched in the background are kept only for the session", default=True)
+    warm_workers: IntProperty(name="Warm-up Processes", description="Background Blender instances used to convert the whole catalog", default=max(1, (os.cpu_count() or 2) // 2), min=1, max=64)
+    placement_mode: EnumProperty(name="Placement", description="How placed blocks are stored", default='INSTANCE',
+        items=(('INSTANCE', "Instances", "One asset collection per block type; placements are collection instances (use Realize for real geometry)"), ('MESH', "Linked Meshes", "Placements are mesh objects sharing the block's mesh data")))
+    lod_enabled: BoolProperty(name="Viewport LOD", description="Show distant placed blocks with their lowest LOD (import with LOD \"All\" to keep it) or as bounding boxes", default=True, update=update_lod)
+    lod_low_px: FloatProperty(name="Low LOD Below (px)", description="Screen size under which a placed block switches to its lowest LOD", default=120.0, min=1.0)
+    lod_box_px: FloatProperty(name="Box Below (px)", description="Screen size under which a placed block is drawn as its bounds", default=24.0, min=0.0)
+    allow_overlap: BoolProperty(name="Allow Overlap", description="Place blocks on grid cells that are already occupied", default=False)
+    hide_missing: BoolProperty(name="Hide Missing", description="Leave blocks without a GBX file under the data paths out of search results (folder cards are only dimmed)", default=False, update=update_hide_missing)
+    result_rows_max: IntProperty(name="Max Result Rows", description="Upper limit for visible search result rows (the viewport height may allow fewer)", default=6, min=1, max=40)
+    icon_atlas: BoolProperty(name="Icon Atlas", description="Pack the icons into pre-decoded 64 px atlas pages, built by a background Blender process when the icons change", default=True)
+    profile: BoolProperty(name="Profiler", description="Time the overlay's hot paths and show p50/p95/max in a HUD (Ctrl+Shift+P in the overlay profiles one session, or hides the HUD while this is on)", default=False, update=update_profile)
 
     def draw(self, context):
         layout = self.layout; row = layout.row()
-        col1 = row.column(); box_p = col1.box(); box_p.label(text="Data Paths", icon='FILE_FOLDER'); box_p.prop(self, "path_blocks"); box_p.prop(self, "path_items")
-        box_i = col1.box(); box_i.label(text="Import Settings", icon='IMPORT'); box_i.prop(self, "visible_only"); box_i.prop(self, "merge_objects"); box_i.prop(self, "auto_join"); box_i.prop(self, "lod")
+        col1 = row.column(); box_p = col1.box(); box_p.label(text="Data Paths", icon='FILE_FOLDER'); box_p.prop(self, "path_blocks"); box_p.prop(self, "path_items"); box_p.prop(self, "hide_missing"); box_p.prop(self, "icon_cache_size"); box_p.prop(self, "icon_atlas"); box_p.prop(self, "result_rows_max")
+        r = box_p.row(align=True); r.prop(self, "data_url"); r.operator(VIEW3D_OT_tm_inventory_sync.bl_idname, text="", icon='FILE_REFRESH')
+        box_i = col1.box(); box_i.label(text="Import Settings", icon='IMPORT'); box_i.prop(self, "visible_only"); box_i.prop(self, "merge_objects"); box_i.prop(self, "auto_join"); box_i.prop(self, "lod"); box_i.prop(self, "preview_cache_mb"); box_i.prop(self, "allow_overlap")
+        r = box_i.row(align=True); r.prop(self, "placement_mode"); r.operator(VIEW3D_OT_tm_inventory_realize.bl_idname, text="", icon='OUTLINER_OB_MESH')
+        r = box_i.row(align=True); r.prop(self, "lod_enabled"); r.prop(self, "lod_low_px"); r.prop(self, "lod_box_px")
+        r = box_i.row(align=True); r.prop(self, "asset_library"); r.prop(self, "warm_workers"); r.operator(VIEW3D_OT_tm_inventory_warm.bl_idname, text="", icon='MOD_BUILD')
+        if tm_warmer.message: box_i.label(text=tm_warmer.message)
         col2 = row.column(); box_a = col2.box(); box_a.label(text="Appearance", icon='RESTRICT_COLOR_ON'); box_a.prop(self, "theme_preset", text="Quick Theme")
         c = box_a.column(align=True); c.prop(self, "ui_bg_color"); c.prop(self, "ui_accent_color"); c.prop(self, "ui_text_color")
         box_g = col2.box(); box_g.label(text="Ghost Visuals", icon='GHOST_ENABLED'); c = box_g.column(align=True); c.prop(self, "ghost_color"); c.prop(self, "ghost_outline_color"); c.prop(self, "ghost_outline_width")
+        r = col2.box().row(align=True); r.prop(self, "profile"); r.operator(VIEW3D_OT_tm_inventory_trace.bl_idname, text="", icon='EXPORT')
+
+# --- DATA SYNC ---
+class TM_Data_Sync:
+    # Incremental sync from the repository's manifest.json: changed files only, resumable .part downloads, archive for large icon deltas
+    CHUNK = 1 << 16
+
+    def __init__(self, base_url=DATA_BASE_URL, bulk_threshold=200):
+        self.bulk_threshold = bulk_threshold; self.configure(base_url)
+
+    def configure(self, base_url):
+        # The GitHub archive only matches the default source; mirrors are synced file by file
+        self.base_url = base_url if base_url.endswith("/") else base_url + "/"
+        self.zip_url = ZIP_URL if self.base_url == DATA_BASE_URL else None
+
+    @staticmethod
+    def local_path(rel):
+        if rel == "BlockInfoInventory.gbx.json": return BLOCKS_JSON_FILE
+        if rel == "ItemInventory.gbx.json": return ITEMS_JSON_FILE
+        if rel.lower().endswith(".png"): return os.path.join(ICONS_DIR, os.path.basename(rel))
+        return None
+
+    @staticmethod
+    def file_sha1(path):
+        h = hashlib.sha1()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(TM_Data_Sync.CHUNK), b""): h.update(chunk)
+        return h.hexdigest()
+
+    def plan(self, remote, local):
+        todo = []
+        for rel, (sha1, size) in remote.items():
+            dest = self.local_path(rel)
+            if not dest: continue
+            try: st = os.stat(dest)
+            except OSError: todo.append(rel); continue
+            known = local.get(rel)
+            if known and known[0] == sha1 and st.st_size == size: continue
+            # No record (first sync of an older install): trust the file if its content matches
+            if not known and st.st_size == size and self.file_sha1(dest) == sha1: local[rel] = [sha1, size]; continue
+            todo.append(rel)
+        return todo
+
+    def download(self, url, dest, sha1=None, progress=None):
+        # Resumes a leftover .part; returns the bytes transferred
+        part = dest + ".part"; have = os.path.getsize(part) if os.path.exists(part) else 0; got = 0
+        req = urllib.request.Request(url, headers={"Range": f"bytes={have}-"} if have else {})
+        try: r = urllib.request.urlopen(req, timeout=30)
+        except urllib.error.HTTPError as e:
+            if e.code != 416 or not have: raise
+            # Nothing left to resume: the .part is already whole (promote it if it checks out) or stale (start over)
+            if sha1 and self.file_sha1(part) == sha1: os.replace(part, dest); return 0
+            os.remove(part); return self.download(url, dest, sha1, progress)
+        with r:
+            resumed = have and getattr(r, "status", None) == 206
+            total = int(r.headers.get("Content-Length") or 0) + (have if resumed else 0)
+            done = have if resumed else 0
+            with open(part, 'ab' if resumed else 'wb') as f:
+                for chunk in iter(lambda: r.read(self.CHUNK), b""):
+                    f.write(chunk); done += len(chunk); got += len(chunk)
+                    if progress: progress(done, total)
+        if sha1 and self.file_sha1(part) != sha1:
+            os.remove(part); raise ValueError(f"checksum mismatch for {os.path.basename(dest)}")
+        os.replace(part, dest)
+        return got
+
+    def mirror_icons(self):
+        # None when the mirror cannot be listed (plain https)
+        if not self.base_url.startswith("file:"): return None
+        root = urllib.request.url2pathname(urllib.parse.urlparse(self.base_url).path); out = []
+        for d in ("Block_Icons", "Item_Icons"):
+            try: out += [f"{d}/{n}" for n in sorted(os.listdir(os.path.join(root, d))) if n.lower().endswith(".png")]
+            except OSError: pass
+        return out
+
+    def extract(self, rels, remote):
+        # Returns the members that were written and verified
+        wanted = set(rels); got = []
+        with zipfile.ZipFile(ZIP_FILE) as z:
+            for m in z.namelist():
+                rel = m.split("/", 1)[-1] # Strip the "<repo>-main/" prefix
+                if rel not in wanted: continue
+                dest = self.local_path(rel)
+                with z.open(m) as src, open(dest + ".part", 'wb') as dst: shutil.copyfileobj(src, dst)
+                if remote is None or self.file_sha1(dest + ".part") == remote[rel][0]: os.replace(dest + ".part", dest); got.append(rel)
+                else: os.remove(dest + ".part")
+        return got
+
+    def run(self, progress=None):
+        # Returns {"fetched", "failed": [(path, error)], "bytes"}
+        report = {"fetched": [], "failed": [], "bytes": 0}
+        os.makedirs(ICONS_DIR, exist_ok=True)
+        notify = progress or (lambda *a: None)
+        try:
+            with urllib.request.urlopen(self.base_url + "manifest.json", timeout=30) as r: remote = json.loads(r.read().decode("utf-8"))["files"]
+        except (OSError, ValueError, KeyError) as e:
+            # Mirrors without a manifest: full sync of both JSON files, plus every icon in the archive (default
+            # source) or in the mirror's icon folders (file://); other mirrors cannot be listed
+            print(f"TM Inventory: no data manifest ({e}), doing a full sync"); remote = None
+        try:
+            with open(MANIFEST_FILE, 'r', encoding='utf-8') as f: local = json.load(f).get("files", {})
+        except (OSError, ValueError): local = {}
+        if remote is None:
+            todo = ["BlockInfoInventory.gbx.json", "ItemInventory.gbx.json"]; icons = None
+            if not self.zip_url:
+                listed = self.mirror_icons()
+                if listed is None: print(f"TM Inventory: {self.base_url} has no manifest.json and cannot be listed; icons were not synced")
+                else: icons = [r for r in listed if not os.path.exists(self.local_path(r))]; todo += icons
+        else:
+            todo = self.plan(remote, local); icons = [r for r in todo if r.lower().endswith(".png")]
+        if self.zip_url and (icons is None or len(icons) > self.bulk_threshold):
+            try:
+                report["bytes"] += self.download(self.zip_url, ZIP_FILE, progress=lambda d, t: notify("ARCHIVE", d, t))
+                if icons is None:
+                    with zipfile.ZipFile(ZIP_FILE) as z: icons = [m.split("/", 1)[-1] for m in z.namelist() if m.lower().endswith(".png")]
+                got = self.extract(icons, remote); report["fetched"] += got; got = set(got)
+                todo = [r for r in todo if r not in got]
+                os.remove(ZIP_FILE)
+            except (OSError, zipfile.BadZipFile) as e:
+                report["failed"].append((self.zip_url, str(e)))
+                # A corrupt archive would be extracted again next time; the next sync downloads a fresh one
+                try: os.remove(ZIP_FILE)
+                except OSError: pass
+        for n, rel in enumerate(todo):
+            notify("FILES", n, len(todo))
+            try:
+                report["bytes"] += self.download(self.base_url + rel, self.local_path(rel), remote[rel][0] if remote else None)
+                report["fetched"].append(rel)
+            except (OSError, ValueError) as e: report["failed"].append((rel, str(e)))
+        notify("FILES", len(todo), len(todo))
+        failed = {f for f, _ in report["failed"]}
+        if remote is not None: local.update((r, remote[r]) for r in report["fetched"] if r in remote)
+        else:
+            # Record what was fetched by its own hash, so the next open does not take this for a first sync
+            local.update((r, [self.file_sha1(self.local_path(r)), os.path.getsize(self.local_path(r))]) for r in report["fetched"])
+        for r in failed: local.pop(r, None)
+        with open(MANIFEST_FILE + ".tmp", 'w', encoding='utf-8') as f: json.dump({"version": 1, "files": local}, f)
+        os.replace(MANIFEST_FILE + ".tmp", MANIFEST_FILE)
+        for rel, err in report["failed"]: print(f"TM Inventory: failed to fetch {rel}: {err}")
+        return report
+
+# --- ICON ATLAS ---
+def icon_pixels(path, cell):
+    # Blender's own PNG loader, scaled to cell x cell; RGBA8 bytes with the bottom row first, as GPU textures expect
+    import numpy as np
+    img = bpy.data.images.load(path)
+    try:
+        if tuple(img.size) != (cell, cell): img.scale(cell, cell)
+        px = np.empty(cell * cell * 4, dtype=np.float32); img.pixels.foreach_get(px)
+        return (px * 255.0 + 0.5).astype(np.uint8).tobytes()
+    finally: bpy.data.images.remove(img)
+
+def build_atlas(directory, path, cell):
+    # Entry point of the atlas build process (`blender -b --python-expr`), so no decode runs in the user's Blender
+    TM_Icon_Atlas.build(directory, path, cell, load=lambda f: icon_pixels(f, cell)).close()
+
+class TM_Icon_Atlas:
+    # One memory-mapped file: a fixed prefix (magic, version, cell, page size, page count, index offset/length), RGBA8
+    # pages of cell-sized slots at ALIGN-aligned offsets, then a JSON index {"signature", "rects": {name: [page, u0, v0, u1, v1]}}
+    MAGIC = b"TMAT"; VERSION = 2; ALIGN = 4096; PREFIX = struct.Struct("<4sHHHHQI")
+
+    def __init__(self):
+        self.cell = self.page_size = self.page_count = 0; self.rects = {}; self.signature = ""; self._file = self._map = None
+
+    @property
+    def per_page(self): return (self.page_size // self.cell) ** 2 if self.cell else 0
+
+    @staticmethod
+    def listing_signature(directory, cell):
+        h = hashlib.sha1(f"{cell}".encode())
+        if os.path.isdir(directory):
+            for e in sorted(os.scandir(directory), key=lambda e: e.name):
+                if e.name.lower().endswith(".png"): st = e.stat(); h.update(f"{e.name}|{st.st_size}|{st.st_mtime_ns}\n".encode())
+        return h.hexdigest()
+
+    @classmethod
+    def build(cls, directory, path, cell=64, page_size=512, load=None):
+        # `load(png path)` returns the icon's cell x cell RGBA8 bytes
+        names = sorted(e.name[:-4] for e in os.scandir(directory) if e.name.lower().endswith(".png"))
+        per_row = page_size // cell; per_page = per_row * per_row; page_bytes = page_size * page_size * 4; row_bytes = cell * 4
+        page_count = (len(names) + per_page - 1) // per_page; rects = {}; offset = cls.ALIGN
+        signature = cls.listing_signature(directory, cell)
+        with open(path + ".tmp", 'wb') as f:
+            f.write(b"\0" * cls.ALIGN)
+            for p in range(page_count):
+                page = bytearray(page_bytes)
+                for k, name in enumerate(names[p * per_page:(p + 1) * per_page]):
+                    try: px = load(os.path.join(directory, name + ".png"))
+                    except (OSError, RuntimeError, ValueError): px = None
+                    if not px or len(px) != cell * row_bytes: continue # Left to the per-file loader
+                    cx, cy = (k % per_row) * cell, (k // per_row) * cell
+                    for row in range(cell):
+                        o = ((cy + row) * page_size + cx) * 4; page[o:o + row_bytes] = px[row * row_bytes:(row + 1) * row_bytes]
+                    rects[name] = [p, cx / page_size, cy / page_size, (cx + cell) / page_size, (cy + cell) / page_size]
+                f.write(page); offset += page_bytes
+            index = json.dumps({"signature": signature, "rects": rects}, separators=(",", ":")).encode("utf-8")
+            f.write(index); f.seek(0); f.write(cls.PREFIX.pack(cls.MAGIC, cls.VERSION, cell, page_size, page_count, offset, len(index)))
+        os.replace(path + ".tmp", path)
+        return cls.open(path)
+
+    @classmethod
+    def open(cls, path):
+        atlas = cls(); atlas._file = open(path, 'rb')
+        try:
+            atlas._map = mmap.mmap(atlas._file.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, version, atlas.cell, atlas.page_size, atlas.page_count, off, ln = cls.PREFIX.unpack_from(atlas._map, 0)
+            if magic != cls.MAGIC or version != cls.VERSION: raise ValueError("not an icon atlas")
+            index = json.loads(atlas._map[off:off + ln]); atlas.signature = index["signature"]
+            atlas.rects = {k: tuple(v) for k, v in index["rects"].items()}
+        except Exception:
+            atlas.close(); raise
+        return atlas
+
+    @classmethod
+    def ensure(cls, directory, path, cell=64):
+        # Loader thread: open the atlas, or have a background Blender rebuild it when the icons changed; this thread only waits.
+        # A failed build is remembered for the icon listing it ran on (None: per-file icons) until the icons change
+        signature = cls.listing_signature(directory, cell)
+        try:
+            atlas = cls.open(path)
+            if atlas.cell == cell and atlas.signature == signature: return atlas
+            atlas.close()
+        except (OSError, ValueError, KeyError, struct.error): pass
+        try:
+            with open(path + ".failed", "r", encoding="utf-8") as f:
+                if json.load(f).get("signature") == signature: return None
+        except (OSError, ValueError, AttributeError): pass
+        # Loaded by file path, so the worker does not depend on the name the addon is installed under
+        expr = ("import importlib.util; spec = importlib.util.spec_from_file_location('tm_inventory_worker', %r); "
+            "m = importlib.util.module_from_spec(spec); spec.loader.exec_module(m); m.build_atlas(%r, %r, %d)" % (__file__, directory, path, cell))
+        try:
+            r = subprocess.run([bpy.app.binary_path, "-b", "--python-exit-code", "1", "--python-expr", expr], stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, timeout=900)
+            error = None if r.returncode == 0 else r.stderr.decode("utf-8", "replace").strip()[-2000:] or f"exit code {r.returncode}"
+        except (OSError, subprocess.SubprocessError) as e: error = str(e)
+        if error is None:
+            try: return cls.open(path)
+            except (OSError, ValueError, KeyError, struct.error) as e: error = f"unreadable result ({e})"
+        try:
+            with open(path + ".failed", "w", encoding="utf-8") as f: json.dump({"signature": signature, "error": error}, f)
+        except OSError: pass
+        raise RuntimeError(f"atlas build failed, using per-file icons until the icons change: {error}")
+
+    def page_view(self, page):
+        n = self.page_size * self.page_size * 4; off = self.ALIGN + page * n
+        return memoryview(self._map)[off:off + n]
+
+    def upload(self, page):
+        import numpy as np # Bundled with Blender; only the GPU upload needs it
+        # GPUTexture only accepts FLOAT buffers, so the bytes are normalized on the way up
+        px = np.frombuffer(self.page_view(page), dtype=np.uint8).astype(np.float32) / 255.0
+        return gpu.types.GPUTexture((self.page_size, self.page_size), format='RGBA8', data=gpu.types.Buffer('FLOAT', px.size, px))
+
+    def close(self):
+        if self._map: self._map.close()
+        if self._file: self._file.close()
+        self._map = self._file = None
+
+# --- ICON CACHE ---
+class TM_Icon_Cache:
+    # Lazy icon textures and atlas pages in one LRU. `budget` counts icons: a page weighs as many as it holds, and
+    # whatever was drawn this frame stays. Uploads per frame are limited so new cards fill in over a few redraws
+    def __init__(self, budget=256, loads_per_frame=12):
+        self.paths = {}; self.textures = OrderedDict(); self.failed = set(); self.atlas = None # icon name or page index -> (texture, weight, frame)
+        self.budget = budget; self.used = 0; self.loads_per_frame = loads_per_frame
+        self.frame = self.frame_loads = 0; self.pending = False
+        self.hits = self.misses = self.evictions = 0
+
+    def scan(self, directory):
+        # Only the directory listing is read here, no PNG is decoded; safe to call from a worker thread
+        paths = {}
+        if os.path.isdir(directory):
+            with os.scandir(directory) as it:
+                for e in it:
+                    if e.name.lower().endswith(".png"): paths[e.name[:-4]] = e.path
+        self.paths = paths
+
+    def __contains__(self, name): return name in self.paths
+
+    def begin_frame(self):
+        self.frame += 1; self.frame_loads = 0; self.pending = False
+
+    def set_budget(self, budget):
+        self.budget = max(1, budget)
+        while self.used > self.budget and self.textures:
+            key = next(iter(self.textures)); _, weight, frame = self.textures[key]
+            if frame == self.frame: break
+            del self.textures[key]; self.used -= weight; self.evictions += 1
+
+    def _hit(self, key):
+        e = self.textures.get(key)
+        if e is None: return None
+        self.textures[key] = (e[0], e[1], self.frame); self.textures.move_to_end(key); self.hits += 1
+        return e[0]
+
+    def _put(self, key, tex, weight):
+        self.textures[key] = (tex, weight, self.frame); self.used += weight; self.set_budget(self.budget)
+
+    def get(self, name):
+        tex = self._hit(name)
+        if tex is not None: return tex
+        path = self.paths.get(name)
+        if path is None or name in self.failed: return None
+        if self.frame_loads >= self.loads_per_frame: self.pending = True; return None
+        self.frame_loads += 1; self.misses += 1
+        try:
+            img = bpy.data.images.load(path, check_existing=True)
+            tex = gpu.texture.from_image(img); bpy.data.images.remove(img)
+        except Exception:
+            self.failed.add(name); return None
+        self._put(name, tex, 1)
+        return tex
+
+    def set_atlas(self, atlas):
+        if self.atlas: self.atlas.close()
+        for key in [k for k in self.textures if isinstance(k, int)]: self.used -= self.textures.pop(key)[1]
+        self.failed = {k for k in self.failed if not isinstance(k, int)}; self.atlas = atlas
+
+    def atlas_rect(self, name):
+        return self.atlas.rects.get(name) if self.atlas else None
+
+    def page(self, index):
+        # GPU texture of atlas page `index`, uploaded on first use; a page takes a whole frame's upload budget
+        tex = self._hit(index)
+        if tex is not None or index in self.failed: return tex
+        if self.frame_loads: self.pending = True; return None
+        self.frame_loads = self.loads_per_frame; self.misses += 1
+        try: tex = self.atlas.upload(index)
+        except Exception as e:
+            print(f"TM Inventory: atlas page {index} failed ({e})"); self.failed.add(index); return None
+        self._put(index, tex, self.atlas.per_page)
+        return tex
+
+    def prefetch(self, names):
+        # Spend what is left of this frame's upload budget on icons just outside the visible cards
+        for name in names:
+            if self.frame_loads >= self.loads_per_frame: return
+            r = self.atlas_rect(name); key = r[0] if r else name
+            if key in self.textures: continue
+            if r: self.page(key)
+            else: self.get(name)
+
+    def clear(self):
+        self.textures.clear(); self.failed.clear(); self.used = 0
+
+    def stats(self):
+        pages = sum(1 for k in self.textures if isinstance(k, int))
+        return {"cached": len(self.textures) - pages, "pages": pages, "used": self.used, "budget": self.budget, "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+# --- PREVIEW CACHE ---
+class TM_Preview_Cache:
+    # Imported preview meshes and ghost bounds per (GBX, settings), LRU past `budget`; dropped meshes still placed wait in `orphans`
+    def __init__(self, budget_mb=256):
+        self.entries = OrderedDict(); self.budget = budget_mb * 1048576; self.size = 0; self.orphans = []
+        self.hits = self.misses = self.evictions = 0
+
+    @staticmethod
+    def key(path, settings):
+        st = os.stat(path)
+        return (path, st.st_mtime_ns, st.st_size) + settings
+
+    @staticmethod
+    def mesh_bytes(mesh):
+        # Rough in-memory size: positions/normals per vertex, UV/corner data per loop, face records
+        return len(mesh.vertices) * 40 + len(mesh.loops) * 24 + len(mesh.polygons) * 32
+
+    def get(self, key):
+        e = self.entries.get(key)
+        if e is None: self.misses += 1; return None
+        try: e[0].name
+        except ReferenceError:
+            # Mesh was deleted behind our back (e.g. user purge with fake users cleared)
+            self.drop(key); self.misses += 1; return None
+        self.entries.move_to_end(key); self.hits += 1
+        return e
+
+    def put(self, key, mesh, ghost_min, ghost_max, scale):
+        if key in self.entries: self.drop(key)
+        if mesh in self.orphans: self.orphans.remove(mesh)
+        mesh.use_fake_user = True; size = self.mesh_bytes(mesh)
+        self.entries[key] = (mesh, ghost_min.copy(), ghost_max.copy(), tuple(scale), size); self.size += size
+        self.set_budget(self.budget // 1048576, keep=key)
+
+    def drop(self, key, remove=True):
+        mesh, _, _, _, size = self.entries.pop(key); self.size -= size
+        try:
+            mesh.use_fake_user = False
+            # Placed blocks may still share the mesh; only free it when nothing else uses it
+            if remove and mesh.users == 0: bpy.data.meshes.remove(mesh)
+            elif remove: self.orphans.append(mesh)
+        except ReferenceError: pass
+
+    def collect(self):
+        keep = []
+        for mesh in self.orphans:
+            try:
+                if mesh.users == 0: bpy.data.meshes.remove(mesh)
+                elif not mesh.use_fake_user: keep.append(mesh)
+            except ReferenceError: pass
+        self.orphans = keep
+
+    def set_budget(self, budget_mb, keep=None):
+        self.budget = max(0, budget_mb) * 1048576; self.collect()
+        for key in list(self.entries):
+            if self.size <= self.budget: break
+            if key != keep: self.drop(key); self.evictions += 1
+
+    def set_fake_users(self, state):
+        for e in self.entries.values():
+            try: e[0].use_fake_user = state
+            except ReferenceError: pass
+
+    def forget(self):
+        # The meshes belong to the file being closed; just drop the references
+        self.entries.clear(); self.size = 0; self.orphans = []
+
+    def clear(self):
+        for key in list(self.entries): self.drop(key)
+        self.collect()
+
+    def stats(self):
+        return {"meshes": len(self.entries), "mb": round(self.size / 1048576, 1), "budget_mb": self.budget // 1048576, "hits": self.hits, "misses": self.misses, "evictions": self.evictions, "orphans": len(self.orphans)}
+
+# --- GBX CATALOG ---
+class TM_GBX_Catalog:
+    # Inventory name -> (path, size, mtime_ns) of the GBX files; a refresh only re-lists directories whose mtime changed
+    VERSION = 2
+
+    def __init__(self, path=CATALOG_FILE):
+        self.path = path; self.roots = {}; self.names = {}; self.by_path = {}; self.version = 0; self.loaded = False; self._thread = None; self._pending = None; self._lock = threading.Lock()
+
+    @staticmethod
+    def norm(root): return os.path.normpath(root) if root else ""
+
+    def _read(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f: data = json.load(f)
+            # Older catalogs listed only exact-case extensions; they are rebuilt from scratch
+            self.roots = data["roots"] if data.get("version") == self.VERSION else {}
+        except (OSError, ValueError, KeyError, AttributeError): self.roots = {}
+        self.loaded = True
+
+    def _scan(self, root, old):
+        dirs = {}; stack = [""]; rescanned = 0
+        while stack:
+            rel = stack.pop(); full = os.path.join(root, rel)
+            try: mtime = os.stat(full).st_mtime_ns
+            except OSError: continue
+            rec = old.get(rel)
+            if rec is None or rec[0] != mtime:
+                subdirs, files = [], {}
+                try:
+                    with os.scandir(full) as it:
+                        for e in it:
+                            if e.is_dir(): subdirs.append(e.name)
+                            elif e.name.lower().endswith(GBX_EXTS_LOWER): st = e.stat(); files[e.name] = [st.st_size, st.st_mtime_ns]
+                except OSError: continue
+                rec = [mtime, subdirs, files]; rescanned += 1
+            dirs[rel] = rec; stack += [f"{rel}/{d}" if rel else d for d in rec[1]]
+        return dirs, rescanned
+
+    @staticmethod
+    def _index(root, dirs):
+        names = {}; rank = {}
+        for rel, (_, _, files) in dirs.items():
+            for fname, (size, mtime) in files.items():
+                low = fname.lower(); r = next(k for k, e in enumerate(GBX_EXTS_LOWER) if low.endswith(e)); stem = fname[:-len(GBX_EXTS[r])]
+                name = f"{rel}/{stem}" if rel else stem
+                if rank.get(name, len(GBX_EXTS)) > r: names[name] = (os.path.join(root, rel, fname), size, mtime); rank[name] = r
+        return names
+
+    def refresh(self, roots):
+        # Blocking, safe on a worker thread
+        if not self.loaded: self._read()
+        roots = [r for r in dict.fromkeys(map(self.norm, roots)) if r and os.path.isdir(r)]
+        new = {}; rescanned = 0
+        for root in roots:
+            new[root], n = self._scan(root, self.roots.get(root, {})); rescanned += n
+        changed = rescanned or set(new) != set(self.roots)
+        names = {r: self._index(r, d) for r, d in new.items()}
+        self.roots, self.names, self.by_path = new, names, {e[0]: (r, n) for r, ns in names.items() for n, e in ns.items()}; self.version += 1
+        if changed:
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True); tmp = self.path + ".tmp"
+                with open(tmp, "w", encoding="utf-8") as f: json.dump({"version": self.VERSION, "roots": new}, f, separators=(",", ":"))
+                os.replace(tmp, self.path)
+            except OSError as e: print(f"TM Inventory: could not save the GBX catalog ({e})")
+        return rescanned
+
+    def refresh_async(self, roots):
+        # A request made while a refresh runs is kept (the latest one) and run when it finishes
+        with self._lock:
+            self._pending = list(roots)
+            if self._thread: return
+            self._thread = threading.Thread(target=self._refresh_pending, daemon=True); self._thread.start()
+
+    def _refresh_pending(self):
+        while True:
+            with self._lock:
+                roots, self._pending = self._pending, None
+                if roots is None: self._thread = None; return
+            try: self.refresh(roots)
+            except Exception as e: print(f"TM Inventory: GBX catalog refresh failed ({e})")
+
+    def resolve(self, root, name):
+        names = self.names.get(self.norm(root))
+        if names is None:
+            # Not catalogued yet (first refresh still running): probe the disk like before
+            return next((path for e in GBX_EXTS if os.path.exists(path := os.path.join(root, f"{name}{e}"))), None)
+        e = names.get(name)
+        return e[0] if e else None
+
+    def stat(self, root, name):
+        # A file rewritten in place keeps its directory mtime, so this stats it again
+        root = self.norm(root); names = self.names.get(root, {}); e = names.get(name)
+        if e is None: return None
+        try: st = os.stat(e[0])
+        except OSError: return None
+        if (st.st_size, st.st_mtime_ns) != e[1:]: e = names[name] = (e[0], st.st_size, st.st_mtime_ns)
+        return e
+
+    def available(self, root, name):
+        names = self.names.get(self.norm(root))
+        return names is None or name in names
+
+    def files(self, *roots):
+        return [e[0] for r in roots for e in self.names.get(self.norm(r), {}).values()]
+
+tm_catalog = TM_GBX_Catalog()
+
+# --- MATERIAL DEDUP ---
+class TM_Material_Dedup:
+    # One copy of each Stadium material/image across imports, matched by name stem and a hash of settings/source
+    def __init__(self):
+        self.images = {}; self.materials = {}; self._file_hashes = {}; self.merged = 0
+
+    @staticmethod
+    def stem(name): return re.sub(r"\.\d{3}$", "", name)
+
+    def image_key(self, img):
+        if img.packed_file: h = hashlib.sha1(img.packed_file.data).hexdigest()
+        elif img.source == 'FILE' and img.filepath:
+            path = bpy.path.abspath(img.filepath, library=img.library)
+            try: st = os.stat(path)
+            except OSError: return None
+            memo = (path, st.st_size, st.st_mtime_ns); h = self._file_hashes.get(memo)
+            if h is None:
+                with open(path, "rb") as f: h = self._file_hashes[memo] = hashlib.sha1(f.read()).hexdigest()
+        else: return None
+        return (self.stem(img.name), h, img.colorspace_settings.name, img.alpha_mode)
+
+    # Identity, bookkeeping and editor layout: nothing a material renders with
+    IGNORED = frozenset(("rna_type", "name", "name_full", "label", "location", "width", "width_hidden", "height", "dimensions", "select",
+        "show_options", "show_preview", "show_texture", "hide", "parent", "color", "use_custom_color", "inputs", "outputs", "internal_links",
+        "session_uid", "users", "use_fake_user", "use_extra_user", "is_evaluated", "original", "library", "library_weak_reference",
+        "override_library", "asset_data", "preview", "tag", "is_runtime_data", "is_missing", "is_embedded_data", "is_library_indirect",
+        "id_type", "node_tree", "texture_paint_images", "texture_paint_slots", "paint_active_slot", "animation_data", "id_data"))
+
+    @staticmethod
+    def _value(v):
+        if isinstance(v, float): return round(v, 5)
+        if isinstance(v, (set, frozenset)): return tuple(sorted(v)) # Enum flags
+        if isinstance(v, str): return v
+        try: return tuple(round(x, 5) if isinstance(x, float) else x for x in v)
+        except TypeError: return v
+
+    @classmethod
+    def _rna(cls, struct, depth=0):
+        # Every setting of `struct` from its RNA (node interpolation, blend_method, a ColorRamp's elements, ...);
+        # datablocks by name, nested structs a few levels deep
+        sig = []
+        for p in struct.bl_rna.properties:
+            k = p.identifier
+            if k in cls.IGNORED or k.startswith("bl_"): continue
+            v = getattr(struct, k, None)
+            if p.type == 'POINTER': v = None if v is None else v.name if isinstance(v, bpy.types.ID) else cls._rna(v, depth + 1) if depth < 3 else None
+            elif p.type == 'COLLECTION': v = tuple(cls._rna(i, depth + 1) for i in v) if depth < 3 else None
+            else: v = cls._value(v)
+            sig.append((k, v))
+        return tuple(sig)
+
+    def material_key(self, mat):
+        sig = [self._rna(mat)]
+        if mat.use_nodes and mat.node_tree:
+            for n in sorted(mat.node_tree.nodes, key=lambda n: n.name):
+                ref = n.node_tree.name if n.type == 'GROUP' and n.node_tree else ""
+                sig.append((n.bl_idname, n.name, ref, self._rna(n), tuple((i.identifier, self._value(i.default_value)) for i in n.inputs if not i.is_linked and hasattr(i, "default_value"))))
+            sig += sorted((l.from_node.name, l.from_socket.identifier, l.to_node.name, l.to_socket.identifier) for l in mat.node_tree.links)
+        return (self.stem(mat.name), hashlib.sha1(repr(sig).encode()).hexdigest())
+
+    @staticmethod
+    def _shared(table, key, id_data):
+        # The kept copy for `key`, or None when `id_data` becomes (or already is) the kept copy
+        c = table.get(key)
+        try:
+            if c is not None and c.name: return None if c == id_data else c
+        except ReferenceError: pass
+        table[key] = id_data
+        return None
+
+    def run(self, materials, images=()):
+        # Returns how many duplicates were freed
+        materials = [m for m in materials if m]
+        images = set(i for i in images if i) | {n.image for m in materials if m.node_tree for n in m.node_tree.nodes if n.type == 'TEX_IMAGE' and n.image}
+        dups = []
+        for img in images:
+            key = self.image_key(img); c = self._shared(self.images, key, img) if key else None
+            if c: img.user_remap(c); dups.append(img)
+        for mat in dict.fromkeys(materials):
+            c = self._shared(self.materials, self.material_key(mat), mat)
+            if c: mat.user_remap(c); dups.append(mat)
+        if dups: bpy.data.batch_remove(dups); self.merged += len(dups)
+        return len(dups)
+
+tm_dedup = TM_Material_Dedup()
+
+# --- ASSET LIBRARY ---
+def import_settings(p):
+    return (p.lod, p.visible_only, p.merge_objects, p.auto_join)
+
+class TM_Import_Record:
+    # Datablocks one importer run created, so they can be freed without an orphan purge. Objects and collections are
+    # what the active and scene collections gained; data is the run's when those hold all its users. Nothing walks bpy.data
+    KINDS = ("meshes", "materials", "node_groups", "images")
+
+    def __init__(self, context):
+        colls, objs = self.linked(context); self.before = {i.session_uid for i in (*colls, *objs)}
+        self.objects = []; self.collections = []; self.data = {k: [] for k in self.KINDS}
+
+    @staticmethod
+    def linked(context):
+        # Where the importer links its results
+        parents = dict.fromkeys((context.collection, context.scene.collection))
+        return [c for p in parents for c in p.children], [o for p in parents for o in p.objects]
+
+    @staticmethod
+    def uses(i, kind):
+        # (datablock, kind) of each user `i` holds, as ID.users counts them
+        if kind == "objects":
+            return [(i.data, "meshes")] * (i.type == 'MESH') + [(s.material, "materials") for s in i.material_slots if s.link == 'OBJECT']
+        if kind == "meshes": return [(m, "materials") for m in i.materials] + [(i.get("tm_low"), "meshes")]
+        tree = i.node_tree if kind == "materials" else i if kind == "node_groups" else None
+        if tree is None: return []
+        return [(n.image, "images") if n.type == 'TEX_IMAGE' else (n.node_tree, "node_groups") for n in tree.nodes if n.type in ('TEX_IMAGE', 'GROUP')]
+
+    @classmethod
+    def owned(cls, objects):
+        # Data whose every user is one of `objects` or owned data; repeated so an image follows its material, a low LOD its mesh
+        held = {}; kinds = {}; owned = {}; frontier = [(o, "objects") for o in objects]
+        while frontier:
+            for i, kind in frontier:
+                for u, k in cls.uses(i, kind):
+                    if u is not None: held[u] = held.get(u, 0) + 1; kinds[u] = k
+            frontier = [(u, kinds[u]) for u, n in held.items() if u not in owned and u.users == n]
+            owned.update(frontier)
+        return owned
+
+    def collect(self, context):
+        colls, objs = self.linked(context)
+        top = [c for c in colls if c.session_uid not in self.before]
+        self.collections = list(dict.fromkeys(c for t in top for c in (t, *t.children_recursive)))
+        objs = {o for o in objs if o.session_uid not in self.before}; objs.update(o for c in top for o in c.all_objects)
+        self.objects = sorted(objs, key=lambda o: o.name)
+        for i, kind in self.owned(self.objects).items(): self.data[kind].append(i)
+
+    @staticmethod
+    def alive(ids):
+        out = []
+        for i in ids:
+            try: i.name; out.append(i)
+            except ReferenceError: pass
+        return out
+
+    def free(self):
+        # One batch_remove: the objects and collections, plus recorded data still used by nothing else.
+        # Data kept alive since (a fake user, a placed block, a cached preview) holds a user and stays.
+        objects = self.alive(self.objects); gone = set(objects + self.alive(self.collections))
+        recorded = set(self.alive([i for k in self.KINDS for i in self.data[k]]))
+        gone.update(i for i in self.owned(objects) if i in recorded)
+        if gone: bpy.data.batch_remove(list(gone))
+        self.objects = []; self.collections = []; self.data = {k: [] for k in self.KINDS}
+
+LOD_NAME = re.compile(r"(?:^|[^a-z])lod[ _.-]?(\d+)", re.IGNORECASE)
+
+def lod_level(o):
+    for name in (o.name, *(c.name for c in o.users_collection)):
+        m = LOD_NAME.search(name)
+        if m: return int(m.group(1))
+    return None
+
+def import_gbx_mesh(context, f, settings):
+    # With lod "all" the lowest LOD is joined into a second mesh, kept as mesh["tm_low"]; obj is None when nothing usable was imported
+    lod, visible_only, merge_objects, auto_join = settings
+    record = TM_Import_Record(context)
+    bpy.ops.view3d.tm_nice_import_gbx('EXEC_DEFAULT', filepath=f, files=[{"name": os.path.basename(f)}], visible_only=visible_only, merge_objects=merge_objects, lod=lod)
+    record.collect(context)
+    # Shared Stadium materials/images from earlier imports replace this run's copies
+    tm_dedup.run(record.data["materials"], record.data["images"])
+    mesh_objs = [o for o in record.objects if o.type == 'MESH' and o.name in context.view_layer.objects]
+    if not mesh_objs: return None, None, None, record
+    low_obj = None
+    if lod == "all":
+        levels = {o.name: lod_level(o) for o in mesh_objs}; found = {v for v in levels.values() if v is not None}
+        if len(found) > 1:
+            low_objs = [o for o in mesh_objs if levels[o.name] == max(found)]
+            mesh_objs = [o for o in mesh_objs if levels[o.name] in (min(found), None)]
+            bpy.ops.object.select_all(action='DESELECT')
+            for o in low_objs: o.select_set(True)
+            context.view_layer.objects.active = low_objs[0]
+            if len(low_objs) > 1: bpy.ops.object.join()
+            low_obj = context.view_layer.objects.active
+
+    bpy.ops.object.select_all(action='DESELECT')
+    for o in mesh_objs: o.select_set(True)
+    context.view_layer.objects.active = mesh_objs[0]
+    if auto_join and len(mesh_objs) > 1: bpy.ops.object.join()
+    obj = context.view_layer.objects.active
+
+    # --- ROTATION FIX ---
+    for o in (obj, low_obj):
+        if o: o.rotation_mode = 'XYZ'; o.rotation_euler = (0, 0, 0)
+
+    # --- PIVOT FIX & BOUNDS CALCULATION ---
+    bbox = [obj.matrix_world @ Vector(corner) for corner in obj.bound_box]
+    min_x, max_x = min(v.x for v in bbox), max(v.x for v in bbox)
+    min_y, max_y = min(v.y for v in bbox), max(v.y for v in bbox)
+    min_z, max_z = min(v.z for v in bbox), max(v.z for v in bbox)
+
+    size_x = max_x - min_x
+    size_y = max_y - min_y
+    size_z = max_z - min_z
+
+    grid_w = max(32, math.ceil((size_x - 1.0) / 32) * 32)
+    grid_d = max(32, math.ceil((size_y - 1.0) / 32) * 32)
+    grid_h = max(8, math.ceil((size_z - 0.1) / 8) * 8)
+
+    center_x, center_y, bottom_z = (min_x + max_x) / 2, (min_y + max_y) / 2, min_z
+    saved_cursor = context.scene.cursor.location.copy()
+    context.scene.cursor.location = (center_x, center_y, bottom_z)
+    # The low LOD gets the same pivot, so it can replace the mesh of a placed block as is
+    if low_obj: low_obj.select_set(True)
+    bpy.ops.object.origin_set(type='ORIGIN_CURSOR', center='MEDIAN')
+    context.scene.cursor.location = saved_cursor
+    if low_obj: low_obj.data["tm_scale"] = list(low_obj.scale); obj.data["tm_low"] = low_obj.data
+
+    return obj, Vector((-grid_w / 2, -grid_d / 2, 0)), Vector((grid_w / 2, grid_d / 2, grid_h)), record
+
+class TM_Asset_Library:
+    # One .blend per (GBX content hash, import settings); ghost bounds and scale travel as custom properties on the mesh
+    def __init__(self, directory=LIBRARY_DIR):
+        self.directory = directory; self._sources = None; self.dirty = False; self._lock = threading.Lock()
+
+    @property
+    def sources(self):
+        # Source path -> [size, mtime_ns, sha1], kept in the library's manifest.json so hashes survive sessions
+        with self._lock:
+            if self._sources is None:
+                try:
+                    with open(os.path.join(self.directory, "manifest.json"), "r", encoding="utf-8") as f: self._sources = json.load(f)
+                except (OSError, ValueError): self._sources = {}
+        return self._sources
+
+    def note(self, path, size, mtime_ns, digest):
+        self.sources[path] = [size, mtime_ns, digest]; self.dirty = True
+
+    def source_hash(self, path):
+        st = os.stat(path); e = self.sources.get(path)
+        if e and e[:2] == [st.st_size, st.st_mtime_ns]: return e[2]
+        with open(path, "rb") as fh: h = hashlib.sha1(fh.read()).hexdigest()
+        self.note(path, st.st_size, st.st_mtime_ns, h)
+        return h
+
+    def _asset(self, digest, settings):
+        key = "|".join([digest] + [str(v) for v in settings])
+        return os.path.join(self.directory, hashlib.sha1(key.encode()).hexdigest() + ".blend")
+
+    def asset_path(self, path, settings): return self._asset(self.source_hash(path), settings)
+
+    def has(self, path, settings):
+        # From the manifest and one stat, never hashing: a source not hashed yet counts as missing, and the
+        # worker that gets it finds an existing asset cheaply
+        e = self.sources.get(path)
+        try: st = os.stat(path)
+        except OSError: return False
+        return bool(e) and e[:2] == [st.st_size, st.st_mtime_ns] and os.path.exists(self._asset(e[2], settings))
+
+    def save_manifest(self):
+        if not self.dirty: return
+        path = os.path.join(self.directory, "manifest.json"); tmp = path + ".tmp"
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(tmp, "w", encoding="utf-8") as f: json.dump(self.sources, f, separators=(",", ":"))
+            os.replace(tmp, path); self.dirty = False
+        except OSError as e: print(f"TM Inventory: could not save the library manifest ({e})")
+
+    def load(self, path, settings):
+        lib = self.asset_path(path, settings)
+        if not os.path.exists(lib): return None
+        try:
+            with bpy.data.libraries.load(lib, link=False) as (src, dst): dst.meshes = src.meshes[:1]
+        except Exception as e:
+            print(f"TM Inventory: unreadable library asset {lib} ({e})"); return None
+        mesh = dst.meshes[0] if dst.meshes else None
+        if mesh is None or "tm_ghost" not in mesh: return None
+        mesh.use_fake_user = False; tm_dedup.run(list(mesh.materials))
+        g = list(mesh["tm_ghost"])
+        return mesh, Vector(g[:3]), Vector(g[3:]), tuple(mesh.get("tm_scale", (1.0, 1.0, 1.0)))
+
+    def save(self, path, settings, obj, ghost_min, ghost_max):
+        mesh = obj.data; mesh["tm_ghost"] = [*ghost_min, *ghost_max]; mesh["tm_scale"] = list(obj.scale)
+        lib = self.asset_path(path, settings); tmp = f"{lib}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            # Materials and images come along as dependencies; image paths stay absolute
+            bpy.data.libraries.write(tmp, {mesh}, path_remap='ABSOLUTE', fake_user=True)
+            os.replace(tmp, lib)
+        except Exception as e:
+            print(f"TM Inventory: could not store {os.path.basename(path)} in the library ({e})")
+            if os.path.exists(tmp): os.remove(tmp)
+
+tm_library = TM_Asset_Library()
+
+def cached_block(p, f, settings):
+    # In-session cache first, then the asset library
+    key = TM_Preview_Cache.key(f, settings) if p.preview_cache_mb > 0 else None
+    cached = tm_manager.previews.get(key) if key else None
+    if cached is None and p.asset_library:
+        cached = tm_library.load(f, settings)
+        if cached and key: tm_manager.previews.put(key, *cached)
+    return key, cached
+
+def convert_batch(job_path):
+    # Entry point of a warm-up worker (blender -b --python-expr)
+    with open(job_path, "r", encoding="utf-8") as fh: job = json.load(fh)
+    settings = tuple(job["settings"]); library = TM_Asset_Library(job["library"]) if job["library"] else None
+    context = bpy.context; done = failed = 0; footprints = {}
+    for f in job["files"]:
+        try:
+            cached = library.load(f, settings) if library else None
+            if cached:
+                footprints[f] = list(cached[2] - cached[1]); bpy.data.meshes.remove(cached[0]); done += 1; continue
+            obj, g_min, g_max, record = import_gbx_mesh(context, f, settings)
+            if obj:
+                if library: library.save(f, settings, obj, g_min, g_max)
+                footprints[f] = list(g_max - g_min); done += 1
+            else: failed += 1
+            record.free()
+        except Exception as e:
+            print(f"TM Inventory: {os.path.basename(f)} failed ({e})"); failed += 1
+    # Source hashes go back to the main process, which owns the manifest
+    sources = {f: library.sources[f] for f in job["files"] if library and f in library.sources}
+    with open(job_path + ".done", "w", encoding="utf-8") as fh: json.dump({"done": done, "failed": failed, "footprints": footprints, "sources": sources}, fh)
+
+class TM_Library_Warmer:
+    # A pool of background Blender processes fed with fixed-size jobs; each warmer has its own job folder
+    CHUNK = 40
+
+    def __init__(self, name):
+        self.jobs_dir = os.path.join(CACHE_DIR, "jobs", name); self.jobs = []; self.running = []; self.total = self.done = self.failed = 0; self.message = ""
+
+    @property
+    def busy(self): return bool(self.jobs or self.running)
+
+    def start(self, files, settings, workers, library, use_library=True):
+        os.makedirs(self.jobs_dir, exist_ok=True)
+        self.jobs = []; self.total = len(files); self.done = self.failed = 0; self.workers = workers; self.library = library if use_library else None
+        for n in range(0, len(files), self.CHUNK):
+            job = os.path.join(self.jobs_dir, f"job_{n // self.CHUNK}.json")
+            with open(job, "w", encoding="utf-8") as fh: json.dump({"library": library.directory if use_library else None, "settings": list(settings), "files": files[n:n + self.CHUNK]}, fh)
+            if os.path.exists(job + ".done"): os.remove(job + ".done")
+            self.jobs.append(job)
+        self.poll()
+
+    def launch(self, job):
+        expr = f"import importlib; importlib.import_module({__name__!r}).convert_batch({job!r})"
+        return subprocess.Popen([bpy.app.binary_path, "-b", "--python-expr", expr], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    def poll(self):
+        # False once everything is done
+        for proc, job in list(self.running):
+            if proc.poll() is None: continue
+            self.running.remove((proc, job))
+            try:
+                with open(job + ".done", "r", encoding="utf-8") as fh: r = json.load(fh)
+                with open(job, "r", encoding="utf-8") as fh: settings = json.load(fh)["settings"]
+                self.done += r["done"]; self.failed += r["failed"]
+                tm_footprints.put_job(settings, r.get("footprints", {}))
+                for f, e in r.get("sources", {}).items():
+                    if self.library: self.library.note(f, *e)
+            except (OSError, ValueError, KeyError):
+                # The worker died before reporting (missing importer, crash): count the whole job as failed
+                with open(job, "r", encoding="utf-8") as fh: self.failed += len(json.load(fh)["files"])
+        while self.jobs and len(self.running) < self.workers:
+            job = self.jobs.pop(0); self.running.append((self.launch(job), job))
+        self.message = f"Library: {self.done + self.failed}/{self.total} converted" + (f", {self.failed} failed" if self.failed else "")
+        return self.busy
+
+    def cancel(self):
+        for proc, _ in self.running: proc.terminate()
+        self.jobs = []; self.running = []; self.message = "Library warm-up cancelled"
+
+tm_warmer = TM_Library_Warmer("warm")
+
+def _warm_timer():
+    if tm_warmer.poll(): return 1.0
+    tm_footprints.save(); tm_library.save_manifest(); print(f"TM Inventory: {tm_warmer.message}"); return None
+
+# --- FOOTPRINTS ---
+class TM_Footprints:
+    # Snapped ghost size of every converted block per import settings, valid while the GBX size/mtime match
+    def __init__(self):
+        self.path = None; self.entries = {}; self.dirty = False
+
+    @staticmethod
+    def file(settings): return FOOTPRINT_FILE.format(hashlib.sha1(repr(tuple(settings)).encode()).hexdigest()[:10])
+
+    @staticmethod
+    def read(path):
+        try:
+            with open(path, "r", encoding="utf-8") as f: return json.load(f)
+        except (OSError, ValueError): return {}
+
+    def use(self, settings):
+        path = self.file(settings)
+        if path == self.path: return
+        self.save(); self.path = path; self.dirty = False; self.entries = self.read(path)
+
+    def get(self, root, name):
+        root = TM_GBX_Catalog.norm(root); e = self.entries.get(root, {}).get(name)
+        if e is None: return None
+        c = tm_catalog.stat(root, name)
+        if c is None or (c[1], c[2]) != (e[3], e[4]): return None
+        w, d, h = e[:3]
+        return Vector((-w / 2, -d / 2, 0)), Vector((w / 2, d / 2, h))
+
+    def put(self, root, name, ghost_min, ghost_max):
+        root = TM_GBX_Catalog.norm(root); c = tm_catalog.stat(root, name)
+        if c is None: return
+        self.entries.setdefault(root, {})[name] = [*(ghost_max - ghost_min)] + [c[1], c[2]]; self.dirty = True
+
+    def put_path(self, path, size, entries):
+        # Worker results are keyed by file path; map them back through the catalog
+        rn = tm_catalog.by_path.get(path)
+        c = tm_catalog.stat(*rn) if rn else None
+        if c is None: return
+        entries.setdefault(rn[0], {})[rn[1]] = list(size) + [c[1], c[2]]
+
+    def put_job(self, settings, sizes):
+        # A finished job's results, under the settings it ran with (not whichever are in use now), saved right away
+        path = self.file(settings); current = path == self.path
+        entries = self.entries if current else self.read(path)
+        for f, size in sizes.items(): self.put_path(f, size, entries)
+        if current: self.dirty = True; self.save()
+        elif sizes: self.write(path, entries)
+
+    def missing(self, root):
+        root = TM_GBX_Catalog.norm(root); known = self.entries.get(root, {})
+        return [c[0] for name in tm_catalog.names.get(root, {}) if (c := tm_catalog.stat(root, name)) and ((e := known.get(name)) is None or (c[1], c[2]) != (e[3], e[4]))]
+
+    def save(self):
+        if not self.dirty or not self.path: return
+        # Drop names whose file disappeared since they were measured
+        for root, names in self.entries.items():
+            cat = tm_catalog.names.get(root)
+            if cat is not None: self.entries[root] = {n: e for n, e in names.items() if n in cat}
+        if self.write(self.path, self.entries): self.dirty = False
+
+    @staticmethod
+    def write(path, entries):
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True); tmp = path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f: json.dump(entries, f, separators=(",", ":"))
+            os.replace(tmp, path); return True
+        except OSError as e: print(f"TM Inventory: could not save footprints ({e})"); return False
+
+tm_footprints = TM_Footprints()
+
+# --- PREFETCH ---
+class TM_Prefetcher:
+    # Worker threads resolve the visible cards' GBX files and read their library assets ahead; TIMER ticks append
+    # them within BUDGET seconds. Cards without an asset are queued across folders and converted in CHUNK-sized
+    # batches by one background Blender, only once navigation has been idle for IDLE seconds.
+    # A new request bumps `generation`, which drops older work; a running conversion finishes, its results stay useful
+    BUDGET = 0.008; IDLE = 1.5
+
+    def __init__(self, workers=2):
+        self.workers = workers; self.pool = None; self.futures = []; self.generation = 0; self.wanted = None; self.request = None
+        self.ready = queue.Queue(); self.pending = {}; self.hover = None; self.changed = 0.0
+        self.converter = TM_Library_Warmer("prefetch"); self.tried = set(); self.to_convert = {} # file -> (generation, rank)
+        self.scratch = TM_Asset_Library(os.path.join(CACHE_DIR, "prefetch"))
+        self.appended = self.converted = 0
+
+    def library(self, use_library): return tm_library if use_library else self.scratch
+
+    def want(self, names, hover, directory, settings, use_library):
+        # Cards to warm, in priority order; cheap when nothing changed
+        self.hover = hover; self.request = (names, hover, directory, settings, use_library)
+        request = (tuple(names), directory, settings, use_library)
+        if request == self.wanted: return
+        if self.wanted and self.wanted[2:] != request[2:]: self.to_convert = {} # Queued for other settings
+        self.wanted = request; self.generation += 1; self.pending = {}; self.changed = time.perf_counter(); gen = self.generation
+        for fut in self.futures: fut.cancel()
+        if self.pool is None: self.pool = ThreadPoolExecutor(self.workers, thread_name_prefix="tm_prefetch")
+        lib = self.library(use_library)
+        self.futures = [self.pool.submit(self._resolve, gen, rank, name, directory, settings, lib) for rank, name in enumerate(names)]
+
+    def _resolve(self, gen, rank, name, directory, settings, library):
+        # Worker thread: filesystem only, no bpy
+        if gen != self.generation: return
+        f = tm_catalog.resolve(directory, name)
+        if not f: return
+        key = TM_Preview_Cache.key(f, settings)
+        lib = library.asset_path(f, settings); has_lib = os.path.exists(lib)
+        if has_lib and gen == self.generation:
+            with open(lib, "rb") as fh:
+                while fh.read(1 << 20): pass
+        self.ready.put((gen, rank, name, f, key, has_lib))
+
+    def tick(self, context):
+        while True:
+            try: r = self.ready.get_nowait()
+            except queue.Empty: break
+            if r[0] == self.generation: self.pending[r[1]] = r
+        t0 = time.perf_counter(); previews = tm_manager.previews; lib = self.library(self.wanted[3]) if self.wanted else tm_library
+        for rank in sorted(self.pending):
+            if time.perf_counter() - t0 > self.BUDGET: break
+            _, _, name, f, key, has_lib = self.pending.pop(rank)
+            if key in previews.entries: continue
+            if has_lib:
+                cached = lib.load(f, key[3:])
+                if cached: previews.put(key, *cached); self.appended += 1
+            elif f not in self.tried: self.to_convert[f] = (self.generation, rank)
+        self.convert(lib)
+
+    def convert(self, lib):
+        # Once a batch is done the cards are resolved again, so the new assets get appended.
+        # Each file is sent once per session, so a failing one is not retried
+        if self.converter.busy:
+            if self.converter.poll(): return
+            self.converted += self.converter.done; self.converter.library.save_manifest()
+            if self.request: self.wanted = None; self.want(*self.request)
+            return
+        if not self.to_convert or not self.wanted or time.perf_counter() - self.changed < self.IDLE: return
+        # The folder on screen first, then the ones browsed before it
+        files = sorted(self.to_convert, key=lambda f: (-self.to_convert[f][0], self.to_convert[f][1]))[:TM_Library_Warmer.CHUNK]
+        for f in files: del self.to_convert[f]
+        self.tried.update(files); self.converter.start(files, self.wanted[2], 1, lib)
+
+    def stop(self):
+        self.generation += 1; self.wanted = None; self.request = None; self.pending = {}; self.to_convert = {}
+        for fut in self.futures: fut.cancel()
+        self.futures = []
+        if self.pool: self.pool.shutdown(wait=False); self.pool = None
+        if self.converter.busy: self.converter.cancel()
+        self.tried = set(); shutil.rmtree(self.scratch.directory, ignore_errors=True)
+
+tm_prefetch = TM_Prefetcher()
+
+# --- OCCUPANCY ---
+class TM_Occupancy:
+    # Spatial hash of placed blocks: grid cell -> names of the objects covering it
+    CELL = (32.0, 32.0, 8.0); TOL = (0.5, 0.5, 0.05)
+
+    def __init__(self):
+        self.cells = {}; self.owners = {}
+
+    @classmethod
+    def box_cells(cls, lo, hi):
+        r = [range(math.floor((lo[a] + cls.TOL[a]) / cls.CELL[a]), math.floor((hi[a] - cls.TOL[a]) / cls.CELL[a]) + 1) for a in range(3)]
+        return [(i, j, k) for i in r[0] for j in r[1] for k in r[2]]
+
+    @staticmethod
+    def local_box(gmin, gmax, rot):
+        m = Euler(rot, 'XYZ').to_matrix()
+        c = [m @ Vector((x, y, z)) for x in (gmin.x, gmax.x) for y in (gmin.y, gmax.y) for z in (gmin.z, gmax.z)]
+        return Vector((min(v.x for v in c), min(v.y for v in c), min(v.z for v in c))), Vector((max(v.x for v in c), max(v.y for v in c), max(v.z for v in c)))
+
+    def add(self, name, cells):
+        self.remove(name); self.owners[name] = cells
+        for c in cells: self.cells.setdefault(c, set()).add(name)
+
+    def remove(self, name):
+        for c in self.owners.pop(name, ()):
+            names = self.cells.get(c)
+            if names:
+                names.discard(name)
+                if not names: del self.cells[c]
+
+    def occupied(self, cells):
+        for c in cells:
+            for name in list(self.cells.get(c, ())):
+                if name in bpy.data.objects: return True
+                self.remove(name)
+        return False
+
+    def rebuild(self, scene):
+        self.cells = {}; self.owners = {}
+        for coll in scene.collection.children:
+            if not coll.name.startswith("TM_"): continue
+            for o in coll.all_objects:
+                if o.type == 'MESH': parts = [(o.matrix_world, o)]
+                elif o.instance_type == 'COLLECTION' and o.instance_collection:
+                    parts = [(o.matrix_world @ c.matrix_world, c) for c in o.instance_collection.all_objects if c.type == 'MESH']
+                else: continue
+                bb = [mw @ Vector(c) for mw, part in parts for c in part.bound_box]
+                if not bb: continue
+                lo = [min(v[a] for v in bb) for a in range(3)]; hi = [max(v[a] for v in bb) for a in range(3)]
+                self.add(o.name, self.box_cells(lo, hi))
+
+tm_occupancy = TM_Occupancy()
+
+def fill_axes(start, end, step, limit=None):
+    # Block coordinates along x and y of a line/rectangle from `start` to `end`; with `limit` the rectangle shrinks
+    # towards `start` as a whole, keeping its short side where it can
+    n = [int(round(abs(end[a] - start[a]) / step[a])) + 1 for a in range(2)]
+    if limit and n[0] * n[1] > limit:
+        short = 0 if n[0] <= n[1] else 1; n[short] = min(n[short], math.isqrt(limit)); n[1 - short] = min(n[1 - short], limit // n[short])
+    return [[start[a] + math.copysign(step[a], end[a] - start[a]) * k for k in range(n[a])] for a in range(2)]
+
+def fill_positions(start, end, step, limit=None):
+    import numpy as np
+    gx, gy = np.meshgrid(*fill_axes(start, end, step, limit), indexing="ij")
+    return np.column_stack((gx.ravel(), gy.ravel(), np.full(gx.size, start[2])))
+
+# --- PLACEMENT ---
+_assets = {}
+
+def block_asset(src, block_name):
+    # Unlinked asset collection holding one block type at the origin, one per block and mesh
+    key = (block_name, src.data.name); coll = _assets.get(key)
+    try:
+        if coll is not None and coll.objects: return coll
+    except ReferenceError: pass
+    coll = next((c for c in bpy.data.collections if c.get("tm_block") == block_name and c.get("tm_mesh") == src.data.name and c.objects), None)
+    if coll is None:
+        coll = bpy.data.collections.new(f"TMA_{block_name}"); coll["tm_block"] = block_name; coll["tm_mesh"] = src.data.name
+        o = src.copy(); o.name = f"{block_name}_Asset"; o.location = (0, 0, 0); o.rotation_euler = (0, 0, 0); coll.objects.link(o)
+    _assets[key] = coll
+    return coll
+
+def placed_collection(context, block_name):
+    root_name = f"TM_{block_name}"
+    root_coll = bpy.data.collections.get(root_name) or bpy.data.collections.new(root_name)
+    if root_name not in context.scene.collection.children: context.scene.collection.children.link(root_coll)
+    return root_coll
+
+def place_block(src, block_name, root_coll, pos, rot, mode):
+    if mode == 'INSTANCE':
+        o = bpy.data.objects.new(f"{block_name}_Placed", None)
+        o.instance_type = 'COLLECTION'; o.instance_collection = block_asset(src, block_name); o.empty_display_size = 1.0
+    else:
+        o = src.copy(); o.name = f"{block_name}_Placed"
+    o.location = pos; o.rotation_euler = rot; o["tm_block"] = block_name; o["tm_size"] = max(src.dimensions)
+    root_coll.objects.link(o); lod_timer_arm()
+    return o
+
+def realize_instance(inst, single_user=True):
+    made = []; name = inst.name; colls = list(inst.users_collection); mw = inst.matrix_world.copy()
+    for part in inst.instance_collection.objects:
+        o = part.copy()
+        if single_user and o.data: o.data = o.data.copy()
+        o.matrix_world = mw @ part.matrix_world
+        for c in colls: c.objects.link(o)
+        made.append(o)
+    bpy.data.objects.remove(inst, do_unlink=True)
+    if len(made) == 1: made[0].name = name
+    return made
+
+# --- VIEWPORT LOD ---
+class TM_LOD_Manager:
+    # HIGH (as placed), LOW (mesh["tm_low"] or a warmed "Lowest" conversion) or BOX from screen size; switching is a pointer swap, never an import
+    HIGH, LOW, BOX = 0, 1, 2
+    SLICE = 400; INTERVAL = 0.1
+
+    def __init__(self):
+        self.view_key = None; self.objects = []; self.cursor = 0; self.variants = {}; self.active = False
+
+    @staticmethod
+    def view():
+        # (eye, pixels per metre at 1 m, is_perspective) of the largest 3D viewport
+        best = None
+        for w in bpy.context.window_manager.windows:
+            for a in w.screen.areas:
+                if a.type != 'VIEW_3D': continue
+                r = next((r for r in a.regions if r.type == 'WINDOW'), None)
+                if r and (best is None or r.width * r.height > best[0].width * best[0].height): best = (r, a.spaces.active.region_3d)
+        if best is None: return None
+        region, rv3d = best
+        return rv3d.view_matrix.inverted().translation, rv3d.window_matrix[1][1] * region.height / 2, rv3d.is_perspective
+
+    @staticmethod
+    def placements(scene):
+        return [o for c in scene.collection.children if c.name.startswith("TM_") for o in c.all_objects if "tm_block" in o]
+
+    @staticmethod
+    def high(o):
+        # tm_high holds the placed collection/mesh itself: the reference is a user, so cache evictions and import
+        # cleanup cannot free it while the placement shows another level. Files from older versions stored a name
+        h = o.get("tm_high")
+        if isinstance(h, str):
+            h = (bpy.data.collections if o.instance_type == 'COLLECTION' else bpy.data.meshes).get(h)
+            if h is not None: o["tm_high"] = h
+        return h
+
+    def variant(self, o, level):
+        # None if the level is not available yet
+        block = o["tm_block"]; inst = o.instance_type == 'COLLECTION'; high = self.high(o)
+        if level == self.HIGH: return high
+        key = (block, level, inst); v = self.variants.get(key, False)
+        if v is None: return None
+        try:
+            if v: v.name; return v
+        except ReferenceError: pass
+        if level == self.BOX:
+            if not inst: return True # linked meshes only switch their display type
+            src = high
+            if not src or not src.objects: return None
+            # No fake user: the variants only live in the session, and save_pre puts every placement back on HIGH
+            v = bpy.data.collections.new(f"TMA_{block}_box"); v["tm_block"] = block; v["tm_box"] = True
+            b = src.objects[0].copy(); b.display_type = 'BOUNDS'; v.objects.link(b)
+        else:
+            high_mesh = (high.objects[0].data if high and high.objects else None) if inst else high
+            low = self.low_mesh(block, high_mesh)
+            if low is None: self.variants[key] = None; return None
+            mesh, scale = low
+            if inst:
+                v = bpy.data.collections.new(f"TMA_{block}_low"); v["tm_block"] = block; v["tm_mesh"] = mesh.name
+                b = bpy.data.objects.new(f"{block}_Low", mesh); b.scale = scale; v.objects.link(b)
+            else:
+                # A linked mesh keeps its object's scale, so only a variant converted at that scale fits
+                if any(abs(a - b) > 1e-6 for a, b in zip(scale, o.scale)): self.variants[key] = None; return None
+                v = mesh
+        self.variants[key] = v
+        return v
+
+    def low_mesh(self, block, high_mesh):
+        low = high_mesh.get("tm_low") if high_mesh else None
+        if isinstance(low, bpy.types.Mesh): return low, tuple(low.get("tm_scale", high_mesh.get("tm_scale", (1.0, 1.0, 1.0))))
+        p = bpy.context.preferences.addons[__name__].preferences
+        if p.lod == "lowest": return None
+        settings = ("lowest", p.visible_only, p.merge_objects, p.auto_join)
+        for root in (p.path_blocks, p.path_items):
+            f = tm_catalog.names.get(TM_GBX_Catalog.norm(root), {}).get(block)
+            if not f: continue
+            key = TM_Preview_Cache.key(f[0], settings); cached = tm_manager.previews.get(key)
+            if cached is None and p.asset_library:
+                cached = tm_library.load(f[0], settings)
+                if cached: tm_manager.previews.put(key, *cached)
+            if cached: return cached[0], cached[3]
+        return None
+
+    def apply(self, o, level):
+        if o.get("tm_lod", 0) == level: return
+        inst = o.instance_type == 'COLLECTION'
+        if "tm_high" not in o: o["tm_high"] = o.instance_collection if inst else o.data
+        v = self.variant(o, level)
+        if v is None:
+            if level != self.LOW: return
+            level = self.HIGH; v = self.variant(o, level)
+            if v is None or o.get("tm_lod", 0) == level: return
+        if inst: o.instance_collection = v
+        else:
+            o.data = self.variant(o, self.HIGH) if level == self.BOX else v
+            o.display_type = 'BOUNDS' if level == self.BOX else 'TEXTURED'
+        o["tm_lod"] = level
+
+    def tick(self, p):
+        view = self.view()
+        if view is None: return
+        eye, k, persp = view
+        key = (tuple(round(c, 1) for c in eye), round(k, 2), persp, len(bpy.context.scene.objects))
+        if key != self.view_key:
+            # The view moved: start a new pass over all placements
+            self.view_key = key; self.objects = self.placements(bpy.context.scene); self.cursor = 0; self.active = True
+            # Blocks that had no LOW variant get another look once per pass (the library may have been warmed)
+            self.variants = {k: v for k, v in self.variants.items() if v is not None}
+        if not self.active: return
+        for o in self.objects[self.cursor:self.cursor + self.SLICE]:
+            try: d = (o.matrix_world.translation - eye).length if persp else 1.0
+            except ReferenceError: continue
+            px = o.get("tm_size", 32.0) * k / max(d, 0.01)
+            self.apply(o, self.HIGH if px >= p.lod_low_px else self.LOW if px >= p.lod_box_px else self.BOX)
+        self.cursor += self.SLICE; self.active = self.cursor < len(self.objects)
+
+    def restore_all(self, scene=None):
+        for o in self.placements(scene or bpy.context.scene):
+            if o.get("tm_lod", 0): self.apply(o, self.HIGH)
+        self.view_key = None; self.active = False
+
+    def reset(self):
+        # Undo/redo replaced the objects: drop every reference and let the next pass read tm_lod from them again
+        self.view_key = None; self.objects = []; self.cursor = 0; self.variants = {}; self.active = False
+
+tm_lod = TM_LOD_Manager()
+
+def has_placements(scene):
+    return any(c.name.startswith("TM_") and c.all_objects for c in scene.collection.children)
+
+def lod_timer_arm():
+    # Only runs while LOD is on and the scene has placements; it stops itself otherwise
+    try: on = bpy.context.preferences.addons[__name__].preferences.lod_enabled
+    except (KeyError, AttributeError): return
+    if on and has_placements(bpy.context.scene) and not bpy.app.timers.is_registered(_lod_timer):
+        bpy.app.timers.register(_lod_timer, first_interval=TM_LOD_Manager.INTERVAL)
+
+def _lod_timer():
+    try: p = bpy.context.preferences.addons[__name__].preferences
+    except (KeyError, AttributeError): return None
+    if not p.lod_enabled or not has_placements(bpy.context.scene): tm_lod.reset(); return None
+    tm_lod.tick(p)
+    return TM_LOD_Manager.INTERVAL if tm_lod.active else TM_LOD_Manager.INTERVAL * 2
+
+@persistent
+def _lod_undo_post(*args):
+    tm_lod.reset()
+
+# --- MAP LAYOUT FILES ---
+class TM_Map_Layout:
+    # Name table plus packed block/position/rotation arrays, in grid units and 22.5 degree steps when everything is on them
+    MAGIC = b"TMLY"; VERSION = 1
+    GRID = (16.0, 16.0, 8.0); FINE = (1 / 1024, 1 / 1024, 1 / 1024); ROT = math.pi / 8; ROT_FINE = 2 * math.pi / 65536
+
+    def __init__(self):
+        self.names = []; self._index = {}; self.block = array('I'); self.pos = array('d'); self.rot = array('d')
+
+    def __len__(self): return len(self.block)
+
+    def add(self, name, loc, rot):
+        i = self._index.get(name)
+        if i is None: i = self._index[name] = len(self.names); self.names.append(name)
+        self.block.append(i); self.pos.extend(loc); self.rot.extend(rot)
+
+    @staticmethod
+    def _fits(values, quanta):
+        return all(abs(v / quanta[k % len(quanta)] - round(v / quanta[k % len(quanta)])) < 1e-4 for k, v in enumerate(values))
+
+    def write(self, path):
+        pq = self.GRID if self._fits(self.pos, self.GRID) else self.FINE
+        rq = self.ROT if self._fits(self.rot, (self.ROT,)) else self.ROT_FINE
+        pos = array('i', (round(v / pq[k % 3]) for k, v in enumerate(self.pos)))
+        rot = array('h', (((round(v / rq) + 32768) % 65536) - 32768 for v in self.rot))
+        header = json.dumps({"count": len(self.block), "names": self.names, "pos_q": pq, "rot_q": rq}, separators=(",", ":")).encode("utf-8")
+        z = zlib.compressobj(6)
+        with open(path + ".tmp", "wb") as f:
+            f.write(self.MAGIC + struct.pack("<HI", self.VERSION, len(header)) + header)
+            for a in (self.block, pos, rot):
+                mv = memoryview(a.tobytes())
+                for n in range(0, len(mv), 1 << 20): f.write(z.compress(mv[n:n + (1 << 20)]))
+            f.write(z.flush())
+        os.replace(path + ".tmp", path)
+
+    @classmethod
+    def read(cls, path):
+        with open(path, "rb") as f: buf = f.read()
+        if buf[:4] != cls.MAGIC: raise ValueError("not a TM layout file")
+        version, hlen = struct.unpack_from("<HI", buf, 4)
+        if version != cls.VERSION: raise ValueError(f"layout version {version}")
+        meta = json.loads(buf[10:10 + hlen]); body = zlib.decompress(buf[10 + hlen:]); n = meta["count"]
+        lay = cls(); lay.names = meta["names"]; lay._index = {name: i for i, name in enumerate(lay.names)}
+        block, pos, rot = array('I'), array('i'), array('h'); at = 0
+        for a, count in ((block, n), (pos, 3 * n), (rot, 3 * n)):
+            size = a.itemsize * count; a.frombytes(body[at:at + size]); at += size
+        pq, rq = meta["pos_q"], meta["rot_q"]
+        lay.block = block; lay.pos = array('d', (v * pq[k % 3] for k, v in enumerate(pos))); lay.rot = array('d', (v * rq for v in rot))
+        return lay
+
+    def groups(self):
+        out = {}
+        for row, i in enumerate(self.block): out.setdefault(self.names[i], []).append(row)
+        return out
+
+def placed_blocks(scene):
+    for coll in scene.collection.children:
+        if not coll.name.startswith("TM_"): continue
+        for o in coll.all_objects:
+            if o.type == 'MESH' or o.instance_type == 'COLLECTION': yield o.get("tm_block", coll.name[3:]), o
+
+def block_source(context, p, name):
+    # Temporary object carrying the block's mesh, and a callable that disposes of it
+    f = next((f for root in (p.path_blocks, p.path_items) if (f := tm_catalog.resolve(root, name))), None)
+    if not f: return None
+    settings = import_settings(p); key, cached = cached_block(p, f, settings)
+    if cached:
+        obj = bpy.data.objects.new(f"{name}_Src", cached[0]); obj.scale = cached[3]
+        return obj, lambda: bpy.data.objects.remove(obj)
+    obj, g_min, g_max, record = import_gbx_mesh(context, f, settings)
+    if not obj: record.free(); return None
+    if p.asset_library: tm_library.save(f, settings, obj, g_min, g_max)
+    if key: tm_manager.previews.put(key, obj.data, g_min, g_max, obj.scale)
+    return obj, record.free
+
+@persistent
+def _occupancy_load_post(*args):
+    tm_occupancy.rebuild(bpy.context.scene); tm_lod.reset(); lod_timer_arm()
+
+@persistent
+def _preview_save_pre(*args):
+    # Cached meshes are session-only: without their fake user they are not written to the .blend
+    tm_manager.previews.set_fake_users(False)
+    # Files are saved at full detail; the LOD timer lowers it again afterwards
+    tm_lod.restore_all()
+
+@persistent
+def _preview_save_post(*args):
+    tm_manager.previews.set_fake_users(True)
+
+@persistent
+def _preview_load_pre(*args):
+    tm_manager.previews.forget()
+
+# --- INVENTORY INDEX ---
+class TM_Inventory_Index:
+    # Flat copy of the inventory tree: node 0 is a virtual root and the children of a node are contiguous
+    MAGIC = b"TMIX"; VERSION = 1
+    FOLDER, LEAF_ROW = 1, 2 # flags: node is a folder / all children of the node are leaves
+
+    def __init__(self):
+        self.names = [""]; self.parent = array('i', [-1]); self.first_child = array('i', [1]); self.child_count = array('i', [0])
+        self.icon = array('i', [-1]); self.flags = array('B', [self.LEAF_ROW]); self.leaves = []; self.sha1 = None # Hash of the source JSON
+
+    def __len__(self): return len(self.names)
+    def is_folder(self, i): return bool(self.flags[i] & self.FOLDER)
+    def children(self, i): return range(self.first_child[i], self.first_child[i] + self.child_count[i])
+    def roots(self): return self.children(0)
+    def is_leaf_row(self, row): return not row or bool(self.flags[self.parent[row[0]]] & self.LEAF_ROW)
+
+    def icon_name(self, i):
+        n = self.icon[i]
+        return self.names[n] if n >= 0 else None
+
+    def _finish(self):
+        # Leaves in catalog (depth-first) order, the order the old dict walk produced
+        self.leaves = []; stack = [0]
+        while stack:
+            i = stack.pop()
+            if i and not self.flags[i] & self.FOLDER: self.leaves.append(i)
+            else: stack.extend(reversed(self.children(i)))
+        return self
+
+    @classmethod
+    def from_json(cls, data):
+        idx = cls(); roots = data.get("RootChilds", data.get("Childs", []))
+        pending = [(0, [r for r in roots if r.get("Name", "").lower() != "dev"])]
+        while pending:
+            # Allocate a node's children as one contiguous block, then descend depth-first
+            node, kids = pending.pop()
+            idx.first_child[node] = len(idx.names); idx.child_count[node] = len(kids)
+            if any(k.get("IsFolder", False) for k in kids): idx.flags[node] &= ~cls.LEAF_ROW & 0xFF
+            block = []
+            for k in kids:
+                folder = k.get("IsFolder", False)
+                block.append((len(idx.names), k.get("Childs") or []))
+                idx.names.append(k.get("Name", "")); idx.parent.append(node); idx.first_child.append(0); idx.child_count.append(0)
+                idx.icon.append(-1); idx.flags.append((cls.FOLDER | cls.LEAF_ROW) if folder else cls.LEAF_ROW)
+            pending.extend(reversed(block))
+        for i in range(len(idx.names) - 1, -1, -1):
+            if not idx.flags[i] & cls.FOLDER and i: idx.icon[i] = i
+            elif idx.child_count[i]: idx.icon[i] = idx.icon[idx.first_child[i]]
+        return idx._finish()
+
+    def to_bytes(self, meta):
+        header = json.dumps(dict(meta, count=len(self.names), names=self.names), separators=(",", ":")).encode("utf-8")
+        body = b"".join(a.tobytes() for a in (self.parent, self.first_child, self.child_count, self.icon, self.flags))
+        return self.MAGIC + struct.pack("<HI", self.VERSION, len(header)) + header + body
+
+    @classmethod
+    def from_bytes(cls, buf):
+        if buf[:4] != cls.MAGIC: raise ValueError("not an inventory index")
+        version, hlen = struct.unpack_from("<HI", buf, 4)
+        if version != cls.VERSION: raise ValueError(f"index version {version}")
+        pos = 10; meta = json.loads(bytes(buf[pos:pos + hlen])); pos += hlen; n = meta["count"]
+        idx = cls(); idx.names = meta.pop("names")
+        for attr, code in (("parent", 'i'), ("first_child", 'i'), ("child_count", 'i'), ("icon", 'i'), ("flags", 'B')):
+            a = array(code); size = a.itemsize * n; a.frombytes(bytes(buf[pos:pos + size])); pos += size; setattr(idx, attr, a)
+        return idx._finish(), meta
+
+    @classmethod
+    def load(cls, src_path, idx_path):
+        if not os.path.exists(src_path): return cls()
+        st = os.stat(src_path); idx = meta = None
+        try:
+            with open(idx_path, 'rb') as f: idx, meta = cls.from_bytes(f.read())
+        except (OSError, ValueError, KeyError, struct.error): pass
+        if meta and meta.get("mtime_ns") == st.st_mtime_ns and meta.get("size") == st.st_size: idx.sha1 = meta.get("sha1"); return idx
+        with open(src_path, 'rb') as f: raw = f.read()
+        digest = hashlib.sha1(raw).hexdigest()
+        if not (meta and meta.get("sha1") == digest):
+            # GBX dumps carry trailing commas, which plain json rejects
+            idx = cls.from_json(json.loads(re.sub(r",\s*(?=[}\]])", "", raw.decode("utf-8"))))
+        idx.sha1 = digest
+        try:
+            with open(idx_path + ".tmp", 'wb') as f: f.write(idx.to_bytes({"mtime_ns": st.st_mtime_ns, "size": st.st_size, "sha1": digest}))
+            os.replace(idx_path + ".tmp", idx_path)
+        except OSError: pass
+        return idx
+
+# --- SEARCH INDEX ---
+class TM_Search_Index:
+    # Exact, prefix, token, abbreviation ("rtc3") then substring matches, by depth and position; `short` holds 1-2 char queries ranked
+    TOKEN_RE = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|\d+")
+    EXACT, PREFIX, TOKEN, ABBREV, SUBSTRING = range(5)
+    MAGIC = b"TMSX"; VERSION = 1; TABLES = ("short", "pairs", "starts")
+
+    def __init__(self, tree, build=True):
+        self.tree = tree; self.lower = {}; self.tokens = {}; self.order = {}; self.history = {}
+        if build: self._build()
+
+    @staticmethod
+    def depth(tree, i):
+        d = 0; p = tree.parent[i]
+        while p > 0: d += 1; p = tree.parent[p]
+        return d
+
+    def _build(self):
+        tree = self.tree; pairs_of = defaultdict(set); starts_of = defaultdict(set); short = defaultdict(list); leaves = tree.leaves; n = len(leaves)
+        for pos, i in enumerate(leaves):
+            name = tree.names[i]; low = name.lower(); depth = self.depth(tree, i)
+            toks = [t.lower() for t in self.TOKEN_RE.findall(name)]
+            # "\0road\0tech\0curve\03" lets token and abbreviation tests run as C string/regex searches
+            self.lower[i] = low; self.tokens[i] = "\0" + "\0".join(toks); self.order[i] = (depth, pos)
+            pairs = {low[j:j + 2] for j in range(len(low) - 1)}; initials = [t[0] for t in toks]
+            for pair in pairs: pairs_of[pair].add(i)
+            for c in initials: starts_of[c].add(i)
+            # Rank key (kind, depth, position) as one int, so the tables sort fast
+            rank = depth * n + pos; step = 64 * n
+            for key, kind in self.short_kinds(low, toks, pairs, initials).items(): short[key].append(kind * step + rank)
+        self.short = {key: [leaves[r % n] for r in sorted(ranks)] for key, ranks in short.items()}; self.pairs = dict(pairs_of); self.starts = dict(starts_of)
+
+    def to_bytes(self):
+        # Same framing as the inventory index: a JSON header (tokens, table keys), then flat arrays (lengths, ids)
+        tables = [(t, list(getattr(self, t).items())) for t in self.TABLES]; leaves = self.tree.leaves
+        header = json.dumps({"sha1": self.tree.sha1, "count": len(leaves), "tokens": [self.tokens[i] for i in leaves], **{t: [k for k, _ in items] for t, items in tables}}, separators=(",", ":")).encode("utf-8")
+        body = [array('H', (self.order[i][0] for i in leaves))]
+        for _, items in tables: body += [array('I', (len(v) for _, v in items)), array('i', (i for _, v in items for i in v))]
+        return self.MAGIC + struct.pack("<HI", self.VERSION, len(header)) + header + b"".join(a.tobytes() for a in body)
+
+    @classmethod
+    def from_bytes(cls, tree, buf):
+        if buf[:4] != cls.MAGIC: raise ValueError("not a search index")
+        version, hlen = struct.unpack_from("<HI", buf, 4)
+        if version != cls.VERSION: raise ValueError(f"search index version {version}")
+        pos = 10; meta = json.loads(buf[pos:pos + hlen]); pos += hlen; leaves = tree.leaves
+        if not tree.sha1 or meta["sha1"] != tree.sha1 or meta["count"] != len(leaves): raise ValueError("search index is for another inventory")
+        def take(code, count):
+            nonlocal pos
+            a = array(code); size = a.itemsize * count; a.frombytes(buf[pos:pos + size]); pos += size
+            return a
+        idx = cls(tree, build=False); names = tree.names
+        for pos_, (i, d, toks) in enumerate(zip(leaves, take('H', len(leaves)), meta["tokens"])):
+            idx.lower[i] = names[i].lower(); idx.tokens[i] = toks; idx.order[i] = (d, pos_)
+        for t in cls.TABLES:
+            keys = meta[t]; lengths = take('I', len(keys)); ids = take('i', sum(lengths)).tolist(); at = 0; table = {}
+            for k, ln in zip(keys, lengths): table[k] = ids[at:at + ln]; at += ln
+            setattr(idx, t, table if t == "short" else {k: set(v) for k, v in table.items()})
+        return idx
+
+    @classmethod
+    def load(cls, tree, path):
+        # The tables are kept next to the compiled inventory index and reused while its source hash matches
+        try:
+            with open(path, 'rb') as f: return cls.from_bytes(tree, f.read())
+        except (OSError, ValueError, KeyError, struct.error): pass
+        idx = cls(tree)
+        if tree.sha1:
+            try:
+                with open(path + ".tmp", 'wb') as f: f.write(idx.to_bytes())
+                os.replace(path + ".tmp", path)
+            except OSError: pass
+        return idx
+
+    @classmethod
+    def short_kinds(cls, low, toks, pairs, initials):
+        # Best match kind of every one- and two-character query a name matches, as score() would rank it
+        kinds = dict.fromkeys(pairs, cls.SUBSTRING); kinds.update(dict.fromkeys(low, cls.SUBSTRING))
+        for k in range(len(initials) - 1):
+            for b in initials[k + 1:]: kinds[initials[k] + b] = cls.ABBREV
+        kinds.update(dict.fromkeys(initials, cls.TOKEN)); kinds.update(dict.fromkeys([t[:2] for t in toks if len(t) > 1], cls.TOKEN))
+        if low: kinds[low[:1]] = kinds[low[:2]] = cls.PREFIX
+        if 0 < len(low) <= 2: kinds[low] = cls.EXACT
+        return kinds
+
+    @staticmethod
+    def abbrev_pattern(q):
+        # Each next character either continues the current token prefix or starts a later token
+        return re.compile("\0" + re.escape(q[0]) + "".join(f"(?:{c}|(?:[^\0]*\0)+{c})" for c in map(re.escape, q[1:])))
+
+    def score(self, i, terms, patterns):
+        low, toks, total = self.lower[i], self.tokens[i], 0
+        for q, pat in zip(terms, patterns):
+            if low == q: total += self.EXACT
+            elif low.startswith(q): total += self.PREFIX
+            elif "\0" + q in toks: total += self.TOKEN
+            elif pat and pat.search(toks): total += self.ABBREV
+            elif q in low: total += self.SUBSTRING
+            else: return None
+        return total
+
+    def query(self, text):
+        q = " ".join(text.lower().split())
+        if not q: self.history = {}; return []
+        terms = q.split()
+        if len(terms) == 1 and len(q) <= 2: return self.short.get(q, [])
+        # Keep the cached queries along the current edit (prefixes of this one, or longer ones to backspace into)
+        self.history = {h: r for h, r in self.history.items() if q.startswith(h) or h.startswith(q)}
+        if q in self.history: return self.history[q]
+        # Candidates: the results of the longest cached prefix, or the shortest two-character table of a term
+        tables = [self.short.get(t[:2], ()) for t in terms]
+        prefix = next((q[:k] for k in range(len(q) - 1, 2, -1) if q[:k] in self.history), None)
+        if prefix: tables.append(self.history[prefix])
+        candidates = min(tables, key=len); empty = set()
+        # A cached prefix of a single term already passed the pairs it contains
+        first = len(prefix) - 1 if prefix and candidates is tables[-1] and len(terms) == 1 else 1
+        for t in terms:
+            for k in range(first, len(t) - 1):
+                pairs, starts = self.pairs.get(t[k:k + 2], empty), self.starts.get(t[k + 1], empty)
+                candidates = [i for i in candidates if i in pairs or i in starts]
+        patterns = [self.abbrev_pattern(t) if len(t) > 1 else None for t in terms]; scored = []
+        for i in candidates:
+            sc = self.score(i, terms, patterns)
+            if sc is not None: scored.append((sc, self.order[i], i))
+        scored.sort(); res = self.history[q] = [i for _, _, i in scored]
+        return res
 
 # --- MANAGER ---
 class TM_Inventory_Manager:
     def __init__(self):
-        self.block_roots = []; self.item_roots = []; self.icons = {} 
-        self.active_rows = []; self.selected_indices = []; self.search_results = []
+        self.block_tree = TM_Inventory_Index(); self.item_tree = TM_Inventory_Index(); self.icons = TM_Icon_Cache(); self.sync = TM_Data_Sync(); self.previews = TM_Preview_Cache()
+        self.block_search = TM_Search_Index(self.block_tree); self.item_search = TM_Search_Index(self.item_tree)
+        self.active_rows = []; self.selected_indices = []; self.search_results = []; self.search_version = 0
+        # Scrolling: first visible column per folder row (keyed by the row's first node) and first visible result row
+        self.row_scroll = {}; self.search_scroll = 0; self.view_height = 0; self.result_rows_max = 6
         self.selected_block_name = "None"; self.search_query = ""; self.is_searching = False
         self.loading_status = "IDLE"; self.current_mode = "BLOCKS"
+        self.load_progress = 0.0; self.load_message = ""; self._load_queue = queue.SimpleQueue(); self._icon_warmup = []
+        self.atlas_cell = 64; self._atlas_pending = False; self._layout = None
         self.is_ghosting = False; self.ghost_pos = Vector((0, 0, 0))
         
         # New Rotation System (XYZ Euler)
         self.ghost_rotation_euler = Vector((0.0, 0.0, 0.0))
         
         self.ghost_z_offset = 0.0; self.active_item_name = ""
+        self.ghost_blocked = False; self.fill_preview = [] # Occupancy of the ghost cells; (pos, blocked) of a drag-fill in progress
         self.ui_pos_x, self.ui_pos_y = 150, 200; self.ui_width = 830.0; self.base_width = 830.0; self.is_open = False
         self.copy_feedback_timer = 0; self.current_bar_width = 830.0
         self.active_preview_obj = None
-        self.active_preview_colls = []
-        self.is_hovering_help = False
+        self.active_preview_record = None # TM_Import_Record of the importer run behind the current preview
+        self.is_hovering_help = False; self.show_profile = True # Profiler HUD, while the profiler is on
         # Mesh-driven bounds for ghost drawing
         self.ghost_min = Vector((0, 0, 0)) 
         self.ghost_max = Vector((1, 1, 1))
 
-    def start_load(self):
-        if self.loading_status == "READY": return
-        os.makedirs(ICONS_DIR, exist_ok=True)
-        if not os.path.exists(BLOCKS_JSON_FILE) or not os.listdir(ICONS_DIR): self.download_all()
-        self.load_from_cache()
+    def start_load(self, force_sync=False):
+        # SYNC and INDEX run on a worker thread; the main thread applies them and uploads the first icons from a timer
+        if self.loading_status not in {"IDLE", "READY", "ERROR"} or (self.loading_status == "READY" and not force_sync): return
+        self.loading_status = "SYNC"; self.load_progress = 0.0; self.load_message = "Checking inventory data"; self._atlas_pending = bool(self.atlas_cell)
+        threading.Thread(target=self._load_worker, args=(force_sync,), daemon=True).start()
+        if not bpy.app.timers.is_registered(_load_timer): bpy.app.timers.register(_load_timer, first_interval=0.05)
 
-    def download_all(self):
+    def _load_worker(self, force_sync):
+        post = self._load_queue.put
         try:
-            with urllib.request.urlopen(BLOCKS_JSON_URL) as r:
-                with open(BLOCKS_JSON_FILE, 'w', encoding='utf-8') as f: f.write(r.read().decode())
-            with urllib.request.urlopen(ITEMS_JSON_URL) as r:
-                with open(ITEMS_JSON_FILE, 'w', encoding='utf-8') as f: f.write(r.read().decode())
-            with urllib.request.urlopen(ZIP_URL) as response:
-                with zipfile.ZipFile(io.BytesIO(response.read())) as z:
-                    for m in z.namelist():
-                        if m.lower().endswith(".png"):
-                            fname = os.path.basename(m)
-                            if fname:
-                                with z.open(m) as s, open(os.path.join(ICONS_DIR, fname), "wb") as t: shutil.copyfileobj(s, t)
-        except: pass
+            os.makedirs(ICONS_DIR, exist_ok=True)
+            if force_sync or not os.path.exists(BLOCKS_JSON_FILE) or not os.path.exists(MANIFEST_FILE):
+                report = self.download_all(lambda stage, done, total: post(("SYNC", done / total if total else 0.0, f"Downloading {stage.lower()}")))
+                post(("SYNC", 1.0, f"Fetched {len(report['fetched'])} files, {len(report['failed'])} failed"))
+            post(("INDEX", 0.0, "Reading inventory"))
+            trees = self.read_cache()
+            post(("DONE", trees))
+        except Exception as e:
+            post(("ERROR", f"Loading failed: {e}")); return
+        if self.atlas_cell:
+            # The inventory is already usable with per-file icons while the atlas is checked or rebuilt
+            try: post(("ATLAS", TM_Icon_Atlas.ensure(ICONS_DIR, ATLAS_FILE.format(self.atlas_cell), self.atlas_cell)))
+            except Exception as e: post(("ATLAS", None)); print(f"TM Inventory: icon atlas unavailable ({e})")
 
-    def load_from_cache(self):
-        def process_json(path):
-            if not os.path.exists(path): return []
-            with open(path, 'r', encoding='utf-8') as f:
-                data = json.loads(re.sub(r",\s*(?=[}\]])", "", f.read()))
-                roots = data.get("RootChilds", data.get("Childs", []))
-                return [i for i in roots if i.get("Name", "").lower() != "dev"]
-        self.block_roots = process_json(BLOCKS_JSON_FILE); self.item_roots = process_json(ITEMS_JSON_FILE)
+    def _load_tick(self):
+        while True:
+            try: msg = self._load_queue.get_nowait()
+            except queue.Empty: break
+            if msg[0] == "DONE": self.apply_cache(*msg[1]); self.loading_status = "ICONS"; self.load_progress = 0.0; self.load_message = "Loading icons"
+            elif msg[0] == "ATLAS":
+                self._atlas_pending = False
+                if msg[1]: self.icons.set_atlas(msg[1])
+            elif msg[0] == "ERROR": self.loading_status = "ERROR"; self.load_message = msg[1]; print(f"TM Inventory: {msg[1]}")
+            else: self.loading_status, self.load_progress, self.load_message = msg
+        if self.loading_status == "ICONS":
+            # GPU uploads stay on the main thread, a handful per tick
+            self.icons.begin_frame(); total = max(1, len(self._icon_warmup) + 1)
+            while self._icon_warmup and self.icons.frame_loads < self.icons.loads_per_frame: self.icons.get(self._icon_warmup.pop())
+            self.load_progress = 1.0 - len(self._icon_warmup) / total
+            if not self._icon_warmup: self.loading_status = "READY"; self.load_message = ""
+        request_redraw()
+        if self.loading_status == "READY" and self._atlas_pending: return 0.25
+        return None if self.loading_status in {"READY", "ERROR"} else 0.02
+
+    def download_all(self, progress=None):
+        return self.sync.run(progress)
+
+    @property
+    def tree(self): return self.block_tree if self.current_mode == "BLOCKS" else self.item_tree
+
+    @property
+    def search(self): return self.block_search if self.current_mode == "BLOCKS" else self.item_search
+
+    def read_cache(self):
+        # Pure file/CPU work, runs on the loader thread
+        block_tree = TM_Inventory_Index.load(BLOCKS_JSON_FILE, BLOCKS_INDEX_FILE); item_tree = TM_Inventory_Index.load(ITEMS_JSON_FILE, ITEMS_INDEX_FILE)
+        self.icons.scan(ICONS_DIR)
+        return block_tree, item_tree, TM_Search_Index.load(block_tree, BLOCKS_SEARCH_FILE), TM_Search_Index.load(item_tree, ITEMS_SEARCH_FILE)
+
+    def apply_cache(self, block_tree, item_tree, block_search, item_search):
+        self.block_tree, self.item_tree, self.block_search, self.item_search = block_tree, item_tree, block_search, item_search
         self.reset_navigation()
-        if os.path.exists(ICONS_DIR):
-            for f in os.listdir(ICONS_DIR):
-                name = f.replace(".png", "")
-                if name not in self.icons:
-                    try:
-                        img = bpy.data.images.load(os.path.join(ICONS_DIR, f), check_existing=True)
-                        self.icons[name] = gpu.texture.from_image(img); bpy.data.images.remove(img)
-                    except: pass
+        # Header icons and the root cards of both modes are what the user sees first
+        warm = [t.icon_name(i) for t in (item_tree, block_tree) for i in reversed(t.roots())] + ["Editor_Items", "Editor_Blocks"]
+        self._icon_warmup = [n for n in warm if n in self.icons]
+
+    def load_from_cache(self):
+        # Blocking variant of the staged load, for scripts and the sync operator's fallback
+        self.apply_cache(*self.read_cache())
         self.loading_status = "READY"
 
+    def get_layout(self):
+        s = self.ui_width / 830.0
+        # Result rows that fit between the last folder row and the top of the region
+        free = self.view_height - self.ui_pos_y - (45 * s) - len(self.active_rows) * (145 * s)
+        avail = max(1, min(self.result_rows_max, int(free // (145 * s)))) if self.view_height else self.result_rows_max
+        key = (self.ui_width, self.tree, tuple((r.start, r.stop, self.row_scroll.get(r.start, 0)) for r in self.active_rows), self.search_query != "", self.search_version, self.search_scroll, avail)
+        if self._layout is None or self._layout.key != key: self._layout = TM_UI_Layout(self, key, avail)
+        return self._layout
+
+    def scroll(self, lay, grid_row, steps):
+        if grid_row is None: return False
+        if grid_row < lay.search_row0:
+            row = self.active_rows[grid_row]; old = self.row_scroll.get(row.start, 0)
+            new = max(0, min(len(row) - lay.COLS, old + steps)); self.row_scroll[row.start] = new
+        else:
+            old = self.search_scroll; new = self.search_scroll = max(0, min(lay.result_scroll_max, old + steps))
+        return new != old
+
     def set_mode(self, mode):
         self.current_mode = mode; self.reset_navigation()
 
     def reset_navigation(self):
-        self.active_rows = [self.block_roots if self.current_mode == "BLOCKS" else self.item_roots]
-        self.selected_indices = [-1]; self.search_query = ""; self.search_results = []
+        self.active_rows = [self.tree.roots()]
+        self.selected_indices = [-1]; self.search_query = ""; self.search_results = []; self.search_version += 1
+        self.row_scroll = {}; self.search_scroll = 0
         self.selected_block_name = "None"; self.is_ghosting = False
 
-    def find_first_block_name(self, item):
-        if not item.get("IsFolder", False): return item.get("Name")
-        children = item.get("Childs", [])
-        return self.find_first_block_name(children[0]) if children else None
-
     def update_live_search(self):
         if self.search_query != "":
-            self.active_rows = [self.block_roots if self.current_mode == "BLOCKS" else self.item_roots]
+            self.active_rows = [self.tree.roots()]
             self.selected_indices = [-1]
-        q = self.search_query.lower(); res = []
-        if q:
-            def walk(items):
-                for i in items:
-                    if not i.get("IsFolder"):
-                        if q in i.get("Name", "").lower(): res.append(i)
-                    else: walk(i.get("Childs", []))
-            walk(self.block_roots if self.current_mode == "BLOCKS" else self.item_roots)
-        self.search_results = res[:70]
+        results = self.search.query(self.search_query)
+        p = bpy.context.preferences.addons[__name__].preferences
+        if p.hide_missing and results:
+            root = self.gbx_root(p); names = self.tree.names
+            results = [i for i in results if tm_catalog.available(root, names[i])]
+        self.search_results = results; self.search_version += 1; self.search_scroll = 0
+
+    def gbx_root(self, p):
+        return p.path_blocks if self.current_mode == "BLOCKS" else p.path_items
 
     def select_item(self, r_idx, i_idx, is_search=False):
         item = self.search_results[i_idx] if is_search else self.active_rows[r_idx][i_idx]
-        is_folder = item.get("IsFolder", False)
+        t = self.tree; is_folder = t.is_folder(item)
         if not is_search:
             self.active_rows = self.active_rows[:r_idx+1]; self.selected_indices = self.selected_indices[:r_idx+1]; self.selected_indices[r_idx] = i_idx
-        if is_folder and item.get("Childs"):
-            if not is_search: self.active_rows.append(item.get("Childs")); self.selected_indices.append(-1)
+        if is_folder and t.child_count[item]:
+            if not is_search: self.active_rows.append(t.children(item)); self.selected_indices.append(-1)
             self.is_ghosting = False; return False
         else:
-            self.selected_block_name = item.get("Name"); self.active_item_name = self.selected_block_name
+            self.selected_block_name = t.names[item]; self.active_item_name = self.selected_block_name
             self.is_ghosting = True
             return True
 
 tm_manager = TM_Inventory_Manager()
 
+def _load_timer():
+    # Module-level so bpy.app.timers can identify it (bound methods are new objects on every access)
+    return tm_manager._load_tick()
+
+# --- LAYOUT ---
+class TM_UI_Layout:
+    # Overlay geometry in UI-local coordinates on a uniform card grid; only the visible window is laid out
+    COLS = 7
+
+    def __init__(self, m, key, result_rows):
+        s = self.s = m.ui_width / 830.0; self.key = key
+        self.bar_h, self.slot_w, self.row_h = 35 * s, 115 * s, 145 * s
+        self.card_w, self.card_h = 105 * s, 110 * s # Clickable part of a card (the index tab is not)
+        self.cur_w = (7 * self.slot_w) + 10 * s
+        self.hx = self.cur_w - (self.bar_h * 2) - 2; self.sx = self.hx - (280 * s) - (5 * s); self.search_w = 280 * s
+        self.x0, self.sy_cards = 10 * s, self.bar_h + 10 * s
+        # cards: (x, y, r_idx, i, is_search) with i the absolute index; grid: (grid_row, col) -> index into cards
+        self.cards = []; self.grid = {}; self.prefetch = []; self.row_more = []; cols = self.COLS; tree = m.tree
+        for r_idx, row in enumerate(m.active_rows):
+            first = max(0, min(len(row) - cols, m.row_scroll.get(row.start, 0)))
+            for col in range(min(cols, len(row) - first)): self._add(r_idx, col, r_idx, first + col, False)
+            self.prefetch += [row[i] for i in (first - 2, first - 1, first + cols, first + cols + 1) if 0 <= i < len(row)]
+            self.row_more.append((first > 0, first + cols < len(row)))
+        self.search_row0 = len(m.active_rows); self.n_results = n = len(m.search_results) if m.search_query else 0
+        total_rows = (n + cols - 1) // cols; self.result_rows = min(total_rows, result_rows)
+        self.result_scroll_max = total_rows - self.result_rows
+        first_row = max(0, min(self.result_scroll_max, m.search_scroll)); self.result_first = first_row * cols
+        self.result_last = min(n, (first_row + self.result_rows) * cols)
+        for k in range(self.result_first, self.result_last): self._add(self.search_row0 + k // cols - first_row, k % cols, 0, k, True)
+        for k in (*range(self.result_first - cols, self.result_first), *range(self.result_last, self.result_last + cols)):
+            if 0 <= k < n: self.prefetch.append(m.search_results[k])
+        self.prefetch = [name for name in map(tree.icon_name, self.prefetch) if name]
+        self.grid_rows = self.search_row0 + self.result_rows
+        leaf_rows = [tree.is_leaf_row(row) for row in m.active_rows]
+        self.leaf_items = [self.item(m, c) for c in self.cards if c[4] or leaf_rows[c[2]]] # Visible blocks, in card order
+        self.bottom = self.sy_cards + self.grid_rows * self.row_h
+
+    def _add(self, grid_row, col, r_idx, i, is_search):
+        self.grid[(grid_row, col)] = len(self.cards)
+        self.cards.append((self.x0 + col * self.slot_w, self.sy_cards + grid_row * self.row_h, r_idx, i, is_search))
+
+    @staticmethod
+    def item(m, card):
+        _, _, r_idx, i, is_search = card
+        return m.search_results[i] if is_search else m.active_rows[r_idx][i]
+
+    def grid_row_at(self, ly):
+        r = math.floor((ly - self.sy_cards) / self.row_h)
+        return r if 0 <= r < self.grid_rows else None
+
+    def contains(self, lx, ly):
+        return 0 <= lx <= self.cur_w and -self.bar_h <= ly <= self.bottom
+
+    def hit(self, lx, ly):
+        s = self.s
+        if -self.bar_h <= ly <= 0:
+            if self.sx <= lx <= self.sx + self.search_w: return "SEARCH", None
+            if 0 <= lx <= self.sx: return "NAME", None
+            if lx > self.cur_w - (20 * s): return "RESIZE", None
+            if self.hx <= lx <= self.hx + self.bar_h: return "HELP", None
+            return "BAR", None
+        if 0 <= ly <= self.bar_h:
+            for i, zone in enumerate(("MODE_BLOCKS", "MODE_ITEMS")):
+                if 10 + i*45*s <= lx <= 40 + i*45*s: return zone, None
+        col, grid_row = math.floor((lx - self.x0) / self.slot_w), math.floor((ly - self.sy_cards) / self.row_h)
+        k = self.grid.get((grid_row, col))
+        if k is not None:
+            x, y = self.cards[k][0], self.cards[k][1]
+            if x <= lx <= x + self.card_w and y <= ly <= y + self.card_h: return "CARD", self.cards[k]
+        return None, None
+
+# --- PROFILER ---
+class TM_Profiler:
+    # Enabling swaps TARGETS (and OP_METHODS on the attached operator) for timing wrappers; disabling puts the originals back
+    WINDOW = 240; TRACE_MAX = 200000
+    # (module-level name, attribute or None); resolved on enable since the classes are defined further down
+    TARGETS = (("draw_callback_px", None), ("build_overlay", None), ("draw_callback_view", None),
+        ("TM_Import_Record", "free"), ("import_gbx_mesh", None), ("TM_Icon_Cache", "get"), ("TM_Icon_Cache", "page"),
+        ("TM_Inventory_Manager", "update_live_search"), ("TM_Prefetcher", "tick"))
+    OP_METHODS = ("handle_event", "import_as_preview", "run_pending_import", "cleanup_preview", "update_ghost_location")
+
+    def __init__(self):
+        self.enabled = False; self._saved = []; self.samples = {}; self.trace = deque(maxlen=self.TRACE_MAX); self.calls = 0; self.op = None
+
+    def set_enabled(self, on):
+        if on and not self.enabled: self.enable()
+        elif not on and self.enabled: self.disable()
+
+    def enable(self):
+        g = globals()
+        for owner, attr in self.TARGETS:
+            if attr is None: fn = g[owner]; g[owner] = self.wrap(owner, fn); self._saved.append((g, owner, fn))
+            else:
+                cls = g[owner]; fn = cls.__dict__[attr]
+                setattr(cls, attr, self.wrap(f"{owner}.{attr}", fn)); self._saved.append((cls, attr, fn))
+        self.enabled = True
+        if self.op: self._wrap_op()
+
+    def _wrap_op(self):
+        # Instance attributes shadow the class's methods; removing them brings the originals back
+        try:
+            for attr in self.OP_METHODS:
+                setattr(self.op, attr, self.wrap(f"{type(self.op).__name__}.{attr}", getattr(self.op, attr))); self._saved.append((self.op, attr, None))
+        except ReferenceError: self.op = None # It ended without detaching (file load)
+
+    def disable(self):
+        for owner, attr, fn in reversed(self._saved):
+            if isinstance(owner, dict): owner[attr] = fn
+            elif fn is None:
+                try: delattr(owner, attr)
+                except (AttributeError, ReferenceError): pass # The operator already finished
+            else: setattr(owner, attr, fn)
+        self._saved = []; self.enabled = False
+
+    def attach(self, op):
+        if self.enabled: self.disable(); self.op = op; self.enable()
+        else: self.op = op
+
+    def wrap(self, name, fn):
+        samples = self.samples.setdefault(name, deque(maxlen=self.WINDOW)); clock = time.perf_counter_ns; prof = self
+        @functools.wraps(fn)
+        def timed(*args, **kwargs):
+            t = clock()
+            try: return fn(*args, **kwargs)
+            finally:
+                d = clock() - t; samples.append(d); prof.trace.append((name, t, d, threading.get_ident())); prof.calls += 1
+        return timed
+
+    def reset(self):
+        for d in self.samples.values(): d.clear()
+        self.trace.clear(); self.calls = 0
+
+    @property
+    def dropped(self): return self.calls - len(self.trace)
+
+    def stats(self):
+        # Milliseconds, slowest p95 first
+        out = {}
+        for name, d in self.samples.items():
+            if not d: continue
+            v = sorted(d); n = len(v)
+            out[name] = (n, v[n // 2] / 1e6, v[min(n - 1, int(n * 0.95))] / 1e6, v[-1] / 1e6)
+        return dict(sorted(out.items(), key=lambda kv: -kv[1][2]))
+
+    def frame_gaps(self):
+        # Stalls show up here, not in the draw time
+        starts = [t for name, t, d, tid in itertools.islice(reversed(self.trace), 4 * self.WINDOW) if name == "draw_callback_px"]
+        gaps = sorted(a - b for a, b in zip(starts, starts[1:]))
+        return (gaps[len(gaps) // 2] / 1e6, gaps[-1] / 1e6) if gaps else None
+
+    def export(self, path):
+        t0 = self.trace[0][1] if self.trace else 0; pid = os.getpid()
+        events = [{"name": name, "cat": "tm_inventory", "ph": "X", "ts": (t - t0) / 1e3, "dur": d / 1e3, "pid": pid, "tid": tid} for name, t, d, tid in self.trace]
+        meta = {"blender": bpy.app.version_string, "icons": tm_manager.icons.stats(), "previews": tm_manager.previews.stats(), "dropped": self.dropped,
+            "stats_ms": {k: dict(zip(("calls", "p50", "p95", "max"), v)) for k, v in self.stats().items()}}
+        with open(path, "w", encoding="utf-8") as f: json.dump({"traceEvents": events, "displayTimeUnit": "ms", "otherData": meta}, f)
+        return len(events)
+
+tm_profile = TM_Profiler()
+
 # --- DRAWING HELPERS ---
+def _redraw_view3d():
+    for w in bpy.context.window_manager.windows:
+        for a in w.screen.areas:
+            if a.type == 'VIEW_3D': a.tag_redraw()
+    return None
+
+def request_redraw():
+    # Draw callbacks cannot tag their own area, so defer it to the next timer tick
+    if not bpy.app.timers.is_registered(_redraw_view3d): bpy.app.timers.register(_redraw_view3d, first_interval=0.0)
+
 def draw_rect(x, y, w, h, col, shader):
     v = ((x, y), (x+w, y), (x+w, y+h), (x, y+h))
     batch = batch_for_shader(shader, 'TRI_FAN', {"pos": v})
     shader.bind(); shader.uniform_float("color", col); batch.draw(shader)
 
-def draw_card(x, y, item, index, is_active, is_leaf, is_last_sel, scale, shader_flat, shader_img, prefs):
-    is_folder = item.get("IsFolder", False); cw, ch = 105 * scale, 130 * scale
+class TM_Draw_List:
+    # Recorded overlay geometry; a redraw that only moves the mouse replays it
+    UV = ((0, 0), (1, 0), (1, 1), (0, 1))
+
+    def __init__(self):
+        self.reset(None)
+
+    def reset(self, key):
+        self.key = key; self.quads = []; self.icons = []; self.texts = []; self.batch = None; self.pages = {}
+
+    def rect(self, x, y, w, h, col): self.quads.append((x, y, w, h, tuple(col)))
+    def icon(self, name, x, y, size, placeholder=False): self.icons.append([name, x, y, size, placeholder, None])
+    def text(self, x, y, size, col, txt): self.texts.append((x, y, size, tuple(col), txt))
+
+    def finish(self):
+        pos, col = [], []
+        for x, y, w, h, c in self.quads:
+            pos += ((x, y), (x+w, y), (x+w, y+h), (x, y), (x+w, y+h), (x, y+h)); col += (c,) * 6
+        if pos: self.batch = batch_for_shader(gpu.shader.from_builtin('SMOOTH_COLOR'), 'TRIS', {"pos": pos, "color": col})
+        shader_img = gpu.shader.from_builtin('IMAGE'); per_page = {}
+        for ic in self.icons:
+            x, y, si = ic[1], ic[2], ic[3]; r = tm_manager.icons.atlas_rect(ic[0])
+            if r:
+                # Atlas icons of one page share a texture, so they are merged into one batch
+                p, u0, v0, u1, v1 = r; pos, uv, rects = per_page.setdefault(p, ([], [], []))
+                pos += ((x, y), (x+si, y), (x+si, y+si), (x, y), (x+si, y+si), (x, y+si)); uv += ((u0, v0), (u1, v0), (u1, v1), (u0, v0), (u1, v1), (u0, v1))
+                if ic[4]: rects.append((x, y, si))
+            else: ic[5] = batch_for_shader(shader_img, 'TRI_FAN', {"pos": ((x, y), (x+si, y), (x+si, y+si), (x, y+si)), "texCoord": self.UV})
+        self.icons = [ic for ic in self.icons if ic[5]]
+        self.pages = {p: (batch_for_shader(shader_img, 'TRIS', {"pos": pos, "texCoord": uv}), rects) for p, (pos, uv, rects) in per_page.items()}
+
+    def draw(self, ox, oy):
+        shader_smooth, shader_img, shader_flat = gpu.shader.from_builtin('SMOOTH_COLOR'), gpu.shader.from_builtin('IMAGE'), gpu.shader.from_builtin('UNIFORM_COLOR')
+        gpu.matrix.push(); gpu.matrix.translate((ox, oy))
+        if self.batch: shader_smooth.bind(); self.batch.draw(shader_smooth)
+        for p, (batch, rects) in self.pages.items():
+            tex = tm_manager.icons.page(p)
+            if tex: shader_img.bind(); shader_img.uniform_sampler("image", tex); batch.draw(shader_img)
+            else:
+                for x, y, si in rects: draw_rect(x, y, si, si, (0.0, 0.0, 0.0, 0.25), shader_flat)
+        for name, x, y, si, placeholder, batch in self.icons:
+            tex = tm_manager.icons.get(name)
+            if tex: shader_img.bind(); shader_img.uniform_sampler("image", tex); batch.draw(shader_img)
+            elif placeholder: draw_rect(x, y, si, si, (0.0, 0.0, 0.0, 0.25), shader_flat) # Until the texture is uploaded
+        gpu.matrix.pop()
+        # blf positions are absolute, so text takes the offset directly
+        for x, y, size, c, txt in self.texts:
+            blf.size(0, size); blf.color(0, *c); blf.position(0, ox + x, oy + y, 0); blf.draw(0, txt)
+
+overlay_list = TM_Draw_List()
+
+def draw_card(dl, x, y, item, index, is_active, is_leaf, is_last_sel, scale, prefs):
+    tree = tm_manager.tree; is_folder = tree.is_folder(item); cw, ch = 105 * scale, 130 * scale
     if is_last_sel: base_col, tab_col = (0.95, 0.95, 0.95, 1.0), (0.4, 0.6, 1.0, 1.0)
     elif is_active: base_col, tab_col = (0.1, 0.85, 0.45, 0.95), (0.0, 1.0, 0.6, 1.0)
     elif is_leaf and not is_folder: base_col, tab_col = (0.5, 0.5, 0.5, 0.8), (0.3, 0.3, 0.3, 1.0)
     else: base_col, tab_col = (1.0, 0.75, 0.0, 0.95), (0.0, 0.7, 0.3, 1.0)
-    draw_rect(x, y, cw, ch * 0.85, base_col, shader_flat)
-    draw_rect(x, y + (ch * 0.85) - (4 * scale), 38 * scale, 22 * scale, tab_col, shader_flat)
-    blf.color(0, prefs.ui_text_color[0], prefs.ui_text_color[1], prefs.ui_text_color[2], prefs.ui_text_color[3]); blf.size(0, round(15 * scale))
-    blf.position(0, x + (8 * scale), y + (ch * 0.85) + (2 * scale), 0); blf.draw(0, str(index + 1))
-    icon_name = item.get("Name") if not is_folder else tm_manager.find_first_block_name(item)
+    dl.rect(x, y, cw, ch * 0.85, base_col)
+    dl.rect(x, y + (ch * 0.85) - (4 * scale), 38 * scale, 22 * scale, tab_col)
+    dl.text(x + (8 * scale), y + (ch * 0.85) + (2 * scale), round(15 * scale), prefs.ui_text_color, str(index + 1))
+    icon_name = tree.icon_name(item)
     if is_folder and not icon_name: icon_name = "FolderClassic"
     if icon_name in tm_manager.icons:
-        tex = tm_manager.icons[icon_name]
-        if tex:
-            si = 95 * scale; ix, iy = x + (cw - si)/2, y + (8 * scale)
-            v = ((ix, iy), (ix + si, iy), (ix + si, iy + si), (ix, iy + si))
-            batch = batch_for_shader(shader_img, 'TRI_FAN', {"pos": v, "texCoord": ((0,0),(1,0),(1,1),(0,1))})
-            gpu.state.blend_set('ALPHA'); shader_img.bind(); shader_img.uniform_sampler("image", tex); batch.draw(shader_img)
+        si = 95 * scale; dl.icon(icon_name, x + (cw - si)/2, y + (8 * scale), si, placeholder=True)
+    if is_leaf and not is_folder and not tm_catalog.available(tm_manager.gbx_root(prefs), tree.names[item]):
+        # No GBX on disk for this block: dim the card
+        dl.rect(x, y, cw, ch * 0.85, (0.0, 0.0, 0.0, 0.6)); dl.text(x + 8 * scale, y + 45 * scale, round(12 * scale), (1.0, 0.4, 0.3, 1.0), "MISSING")
+
+def build_overlay(dl, prefs, lay):
+    s, bar_h, cur_w, hx, sx = lay.s, lay.bar_h, lay.cur_w, lay.hx, lay.sx
+    dl.rect(0, -bar_h, cur_w, bar_h, prefs.ui_bg_color)
+    dl.rect(hx, -bar_h, bar_h, bar_h, (0.2, 0.2, 0.2, 1.0))
+    dl.text(hx + (bar_h - 10*s)/2, -bar_h + 10*s, round(20 * s), prefs.ui_text_color, "?")
+    dl.text(10, -(bar_h * 0.7), round(16 * s), prefs.ui_text_color, f"TM2020 | {tm_manager.selected_block_name}")
+    dl.rect(sx, -bar_h + 3*s, lay.search_w, bar_h - 6*s, (0.05, 0.35, 0.7, 1.0) if tm_manager.is_searching else (0.1, 0.1, 0.1, 1.0))
+    dl.text(sx + 10, -bar_h + 10*s, round(13 * s), (1, 1, 1, 1), tm_manager.search_query or "Search...")
+    dl.rect(0, 0, cur_w, bar_h, prefs.ui_accent_color)
+    for i, m in enumerate(["Editor_Blocks", "Editor_Items"]):
+        if m in tm_manager.icons: dl.icon(m, 12 + (i * 45*s), (bar_h - 28*s)/2, 28*s)
+    tree = tm_manager.tree; names = tree.names; leaf_rows = [tree.is_leaf_row(row) for row in tm_manager.active_rows]
+    for x, y, r_idx, i, is_search in lay.cards:
+        if is_search:
+            item = tm_manager.search_results[i]; draw_card(dl, x, y, item, i, False, True, (names[item] == tm_manager.selected_block_name), s, prefs)
+        else:
+            item = tm_manager.active_rows[r_idx][i]
+            draw_card(dl, x, y, item, i, (i == tm_manager.selected_indices[r_idx]), leaf_rows[r_idx], (names[item] == tm_manager.selected_block_name), s, prefs)
+    for r_idx, (left, right) in enumerate(lay.row_more):
+        # Arrows on folder rows that scroll sideways
+        ty = lay.sy_cards + r_idx * lay.row_h + 50*s
+        if left: dl.text(1, ty, round(18 * s), prefs.ui_text_color, "<")
+        if right: dl.text(cur_w - 8*s, ty, round(18 * s), prefs.ui_text_color, ">")
+    if lay.n_results:
+        dl.text(sx + lay.search_w - 95*s, -bar_h + 10*s, round(11 * s), (0.7, 0.7, 0.7, 1), f"{lay.result_first + 1}-{lay.result_last} / {lay.n_results}")
+        if lay.result_scroll_max:
+            # Scrollbar beside the visible result rows
+            y0, h = lay.sy_cards + lay.search_row0 * lay.row_h, lay.result_rows * lay.row_h; total = lay.result_rows + lay.result_scroll_max
+            first_row = lay.result_first // lay.COLS
+            dl.rect(cur_w - 4*s, y0, 3*s, h, (0.1, 0.1, 0.1, 0.8))
+            dl.rect(cur_w - 4*s, y0 + h * first_row / total, 3*s, h * lay.result_rows / total, prefs.ui_accent_color)
+    if tm_manager.is_hovering_help:
+        tx, ty = cur_w + 10, -bar_h; dl.rect(tx, ty, 380*s, 260*s, (0,0,0,0.95))
+        lines = ["--- TM2020 INVENTORY HELP ---", "", "- L-Click Viewport: COMMIT (PLACE)", "- L-Drag Viewport: FILL LINE / AREA", "- R-Click Viewport: ROTATE Z -90° (CW)", "- Arrows Left/Right: ROTATE X 22.5°", "- Arrows Up/Down: ROTATE Y 22.5°", "- / Key: RESET ROTATION", "- G-Key: TOGGLE GHOST MODE", "- Mouse-Wheel: Z-HEIGHT / SCROLL CARDS", "- Alt+Wheel: ZOOM TO GHOST"]
+        for i, line in enumerate(lines): dl.text(tx + 15, ty + 260*s - (21 * s * (i+1)), round(15 * s), (1, 1, 1, 1), line)
+    dl.finish()
+
+def overlay_key(prefs, lay):
+    # Everything the recorded overlay depends on besides the layout; the UI position is applied at draw time
+    m = tm_manager
+    return (lay, m.icons.atlas, tm_catalog.version, tuple(m.selected_indices), m.search_query, m.selected_block_name, m.is_searching, m.is_hovering_help, tuple(prefs.ui_bg_color), tuple(prefs.ui_accent_color), tuple(prefs.ui_text_color))
+
+class TM_Ghost_Geometry:
+    # Ghost box and footprint in block-local space, rebuilt only when the bounds change
+    FACES = ((0,1,3,2), (4,5,7,6), (0,1,5,4), (2,3,7,6), (0,2,6,4), (1,3,7,5))
+    EDGES = ((0,1), (1,3), (3,2), (2,0), (4,5), (5,7), (7,6), (6,4), (0,4), (1,5), (2,6), (3,7))
+
+    def __init__(self):
+        self.bounds = None; self.fill = self.outline = self.footprint = None
+
+    def ensure(self, gmin, gmax, shader):
+        bounds = (tuple(gmin), tuple(gmax))
+        if bounds == self.bounds: return
+        self.bounds = bounds
+        c = [(dx, dy, dz) for dx in (gmin.x, gmax.x) for dy in (gmin.y, gmax.y) for dz in (gmin.z, gmax.z)]
+        tris = [t for a, b, cc, d in self.FACES for t in ((a, b, cc), (a, cc, d))]
+        self.fill = batch_for_shader(shader, 'TRIS', {"pos": c}, indices=tris)
+        self.outline = batch_for_shader(shader, 'LINES', {"pos": c}, indices=self.EDGES)
+        gv = [(gmin.x, gmin.y, 0), (gmax.x, gmin.y, 0), (gmax.x, gmax.y, 0), (gmin.x, gmax.y, 0)]
+        self.footprint = batch_for_shader(shader, 'LINES', {"pos": gv}, indices=((0,1), (1,2), (2,3), (3,0)))
+
+ghost_geometry = TM_Ghost_Geometry()
 
 def draw_3d_ghost(context, pos, rot_euler, fill_col, line_col, line_w):
     shader = gpu.shader.from_builtin('UNIFORM_COLOR')
-    
-    # 1. Full 3D Rotation Matrix for the Shell (X, Y, Z)
-    rot_mat_full = Euler(rot_euler, 'XYZ').to_matrix()
-    
-    # 2. Z-Only Rotation Matrix for the Footprint (Ground Projection)
-    # This ensures the white line stays a flat rectangle on the ground, regardless of tilt
-    rot_mat_z = Euler((0.0, 0.0, rot_euler.z), 'XYZ').to_matrix()
-    
+    ghost_geometry.ensure(tm_manager.ghost_min, tm_manager.ghost_max, shader)
     gpu.state.blend_set('ALPHA')
-    
-    # 1. Main Ghost Shell
-    min_x, max_x = tm_manager.ghost_min.x, tm_manager.ghost_max.x
-    min_y, max_y = tm_manager.ghost_min.y, tm_manager.ghost_max.y
-    min_z, max_z = tm_manager.ghost_min.z, tm_manager.ghost_max.z
-    
-    c = []
-    # Calculate corners using Full Matrix Rotation
-    for dx in [min_x, max_x]:
-        for dy in [min_y, max_y]:
-            for dz in [min_z, max_z]:
-                local_v = Vector((dx, dy, dz))
-                rotated_v = rot_mat_full @ local_v
-                c.append((pos.x + rotated_v.x, pos.y + rotated_v.y, pos.z + rotated_v.z))
-    
-    # Fill Box
-    indices = [(0,1,3,2), (4,5,7,6), (0,1,5,4), (2,3,7,6), (0,2,6,4), (1,3,7,5)]
-    for face in indices:
-        bf = batch_for_shader(shader, 'TRI_FAN', {"pos": [c[i] for i in face]}); shader.bind(); shader.uniform_float("color", fill_col); bf.draw(shader)
-    # Outline Box
-    lines = [c[0],c[1], c[1],c[3], c[3],c[2], c[2],c[0], c[4],c[5], c[5],c[7], c[7],c[6], c[6],c[4], c[0],c[4], c[1],c[5], c[2],c[6], c[3],c[7]]
-    batch_l = batch_for_shader(shader, 'LINES', {"pos": lines}); shader.bind(); shader.uniform_float("color", line_col); gpu.state.line_width_set(line_w); batch_l.draw(shader)
-    
-    # 2. Ground Footprint (Flattened Z, using only Z rotation)
-    gv = []
-    for corner in [(min_x, min_y), (max_x, min_y), (max_x, max_y), (min_x, max_y)]:
-        local_v = Vector((corner[0], corner[1], min_z))
-        rotated_v = rot_mat_z @ local_v  # Use Z-only matrix here
-        gv.append((pos.x + rotated_v.x, pos.y + rotated_v.y, 0)) # Absolute Ground 0
-        
-    bg = batch_for_shader(shader, 'LINES', {"pos": [gv[0],gv[1], gv[1],gv[2], gv[2],gv[3], gv[3],gv[0]]})
-    shader.bind(); shader.uniform_float("color", (1, 1, 1, 0.6)); gpu.state.line_width_set(1.5); bg.draw(shader)
+    # 1. Main Ghost Shell: full XYZ rotation about the block origin
+    gpu.matrix.push(); gpu.matrix.multiply_matrix(Matrix.Translation(pos) @ Euler(rot_euler, 'XYZ').to_matrix().to_4x4())
+    shader.bind(); shader.uniform_float("color", fill_col); ghost_geometry.fill.draw(shader)
+    shader.uniform_float("color", line_col); gpu.state.line_width_set(line_w); ghost_geometry.outline.draw(shader)
+    gpu.matrix.pop()
+    # 2. Ground Footprint: Z rotation only, flattened to absolute ground 0 regardless of tilt
+    gpu.matrix.push(); gpu.matrix.multiply_matrix(Matrix.Translation((pos.x, pos.y, 0)) @ Matrix.Rotation(rot_euler.z, 4, 'Z'))
+    shader.uniform_float("color", (1, 1, 1, 0.6)); gpu.state.line_width_set(1.5); ghost_geometry.footprint.draw(shader)
+    gpu.matrix.pop()
 
 def draw_callback_px(context):
     prefs = context.preferences.addons[__name__].preferences
-    if tm_manager.loading_status != "READY": return
-    gpu.state.blend_set('ALPHA'); shader_flat, shader_img = gpu.shader.from_builtin('UNIFORM_COLOR'), gpu.shader.from_builtin('IMAGE')
-    s = tm_manager.ui_width / 830.0; bar_h, slot_w = 35 * s, 115 * s
-    cur_w = tm_manager.current_bar_width = (7 * slot_w) + 10 * s
-    draw_rect(tm_manager.ui_pos_x, tm_manager.ui_pos_y - bar_h, cur_w, bar_h, prefs.ui_bg_color, shader_flat)
-    hx = tm_manager.ui_pos_x + cur_w - (bar_h * 2) - 2; draw_rect(hx, tm_manager.ui_pos_y - bar_h, bar_h, bar_h, (0.2, 0.2, 0.2, 1.0), shader_flat)
-    blf.color(0, prefs.ui_text_color[0], prefs.ui_text_color[1], prefs.ui_text_color[2], prefs.ui_text_color[3]); blf.size(0, round(20 * s)); blf.position(0, hx + (bar_h - 10*s)/2, tm_manager.ui_pos_y - bar_h + 10*s, 0); blf.draw(0, "?")
-    name_text = f"TM2020 | {tm_manager.selected_block_name}"; blf.size(0, round(16 * s)); blf.position(0, tm_manager.ui_pos_x + 10, tm_manager.ui_pos_y - (bar_h * 0.7), 0); blf.draw(0, name_text)
-    sx = hx - (280 * s) - (5 * s); draw_rect(sx, tm_manager.ui_pos_y - bar_h + 3*s, 280*s, bar_h - 6*s, (0.05, 0.35, 0.7, 1.0) if tm_manager.is_searching else (0.1, 0.1, 0.1, 1.0), shader_flat)
-    blf.size(0, round(13 * s)); blf.color(0, 1, 1, 1, 1); blf.position(0, sx + 10, tm_manager.ui_pos_y - bar_h + 10*s, 0); blf.draw(0, tm_manager.search_query or "Search...")
-    draw_rect(tm_manager.ui_pos_x, tm_manager.ui_pos_y, cur_w, bar_h, prefs.ui_accent_color, shader_flat)
-    for i, m in enumerate(["Editor_Blocks", "Editor_Items"]):
-        bx, by = tm_manager.ui_pos_x + 12 + (i * 45*s), tm_manager.ui_pos_y + (bar_h - 28*s)/2
-        if m in tm_manager.icons:
-            v = ((bx, by), (bx+28*s, by), (bx+28*s, by+28*s), (bx, by+28*s))
-            bt = batch_for_shader(shader_img, 'TRI_FAN', {"pos": v, "texCoord": ((0,0),(1,0),(1,1),(0,1))}); shader_img.bind(); shader_img.uniform_sampler("image", tm_manager.icons[m]); bt.draw(shader_img)
-    sy_cards, row_h = tm_manager.ui_pos_y + bar_h + 10*s, 145 * s
-    for r_idx, row in enumerate(tm_manager.active_rows):
-        ry = sy_cards + r_idx * row_h
-        for i, item in enumerate(row):
-            rx = tm_manager.ui_pos_x + 10*s + i * slot_w; draw_card(rx, ry, item, i, (i == tm_manager.selected_indices[r_idx]), not any(i.get("IsFolder") for i in row), (item.get("Name") == tm_manager.selected_block_name), s, shader_flat, shader_img, prefs)
-    if tm_manager.search_query != "":
-        sry = sy_cards + (len(tm_manager.active_rows) * row_h)
-        for i, item in enumerate(tm_manager.search_results):
-            rx_s, ry_s = tm_manager.ui_pos_x + 10*s + (i % 7) * slot_w, sry + (i // 7) * row_h
-            draw_card(rx_s, ry_s, item, i, False, True, (item.get("Name") == tm_manager.selected_block_name), s, shader_flat, shader_img, prefs)
+    gpu.state.blend_set('ALPHA'); shader_flat = gpu.shader.from_builtin('UNIFORM_COLOR')
+    tm_manager.icons.begin_frame()
+    tm_manager.view_height = context.region.height; tm_manager.result_rows_max = prefs.result_rows_max
+    lay = tm_manager.get_layout(); s, bar_h = lay.s, lay.bar_h
+    cur_w = tm_manager.current_bar_width = lay.cur_w
+    key = overlay_key(prefs, lay)
+    if key != overlay_list.key: overlay_list.reset(key); build_overlay(overlay_list, prefs, lay)
+    ox, oy = tm_manager.ui_pos_x, tm_manager.ui_pos_y
+    overlay_list.draw(ox, oy)
+    if tm_manager.loading_status != "READY":
+        # Loading strip under the name bar; cards fill in once the index arrives
+        py = oy - bar_h - 6*s; err = tm_manager.loading_status == "ERROR"
+        draw_rect(ox, py, cur_w, 4*s, (0.1, 0.1, 0.1, 0.9), shader_flat)
+        draw_rect(ox, py, cur_w * (1.0 if err else tm_manager.load_progress), 4*s, (0.8, 0.15, 0.1, 1.0) if err else prefs.ui_accent_color, shader_flat)
+        blf.size(0, round(12 * s)); blf.color(0, 1, 1, 1, 1); blf.position(0, ox + 10, py - 16*s, 0)
+        blf.draw(0, f"{tm_manager.loading_status.title()}: {tm_manager.load_message}")
     if tm_manager.is_hovering_help:
-        tx, ty = tm_manager.ui_pos_x + cur_w + 10, tm_manager.ui_pos_y - bar_h; draw_rect(tx, ty, 380*s, 260*s, (0,0,0,0.95), shader_flat)
-        blf.size(0, round(15 * s)); blf.color(0, 1, 1, 1, 1); lines = ["--- TM2020 INVENTORY HELP ---", "", "- L-Click Viewport: COMMIT (PLACE)", "- R-Click Viewport: ROTATE Z -90° (CW)", "- Arrows Left/Right: ROTATE X 22.5°", "- Arrows Up/Down: ROTATE Y 22.5°", "- / Key: RESET ROTATION", "- G-Key: TOGGLE GHOST MODE", "- Mouse-Wheel: Z-HEIGHT", "- Alt+Wheel: ZOOM TO GHOST"]
-        for i, line in enumerate(lines): blf.position(0, tx + 15, ty + 260*s - (21 * s * (i+1)), 0); blf.draw(0, line)
+        st = tm_manager.icons.stats(); blf.size(0, round(11 * s)); blf.color(0, 1, 1, 1, 1); blf.position(0, ox + cur_w + 25, oy - bar_h + 8*s, 0)
+        blf.draw(0, f"Icons {st['cached']} + {st['pages']} pages ({st['used']}/{st['budget']}) | hits {st['hits']} | misses {st['misses']} | evicted {st['evictions']}")
+        ps = tm_manager.previews.stats(); blf.position(0, ox + cur_w + 25, oy - bar_h - 8*s, 0)
+        blf.draw(0, f"Meshes {ps['meshes']} ({ps['mb']}/{ps['budget_mb']} MB) | hits {ps['hits']} | misses {ps['misses']} | evicted {ps['evictions']} | prefetched {tm_prefetch.appended}+{tm_prefetch.converted} | merged {tm_dedup.merged}")
+    if tm_profile.enabled and tm_manager.show_profile: draw_profile_hud(ox, oy + lay.bottom + 10*s, s)
+    tm_manager.icons.prefetch(lay.prefetch)
+    if tm_manager.icons.pending: request_redraw()
+
+def draw_profile_hud(x, y, s):
+    lines = [f"{name:<40} {n:4d}  {p50:7.2f} {p95:7.2f} {mx:7.2f}" for name, (n, p50, p95, mx) in tm_profile.stats().items()]
+    gaps = tm_profile.frame_gaps()
+    lines.append(f"{'ms':<40} {'n':>4}  {'p50':>7} {'p95':>7} {'max':>7}" + (f"   frame gap {gaps[0]:.1f} / max {gaps[1]:.1f}" if gaps else ""))
+    h = 15 * s; draw_rect(x, y - 4*s, 560 * s, h * len(lines) + 8*s, (0.0, 0.0, 0.0, 0.8), gpu.shader.from_builtin('UNIFORM_COLOR'))
+    blf.size(0, round(11 * s)); blf.color(0, 0.8, 1.0, 0.8, 1.0)
+    for i, line in enumerate(lines): blf.position(0, x + 6*s, y + i * h, 0); blf.draw(0, line)
+
+# Draw handlers look the callbacks up by name, so the profiler can wrap them while the overlay is open
+def _draw_px(context): draw_callback_px(context)
+def _draw_view(context): draw_callback_view(context)
+
+BLOCKED_FILL, BLOCKED_LINE = (1.0, 0.1, 0.1, 0.12), (1.0, 0.25, 0.2, 1.0)
 
 def draw_callback_view(context):
     if tm_manager.is_ghosting:
-        p = context.preferences.addons[__name__].preferences; draw_3d_ghost(context, tm_manager.ghost_pos, tm_manager.ghost_rotation_euler, p.ghost_color, p.ghost_outline_color, p.ghost_outline_width)
+        p = context.preferences.addons[__name__].preferences
+        if tm_manager.fill_preview:
+            for pos, blocked in tm_manager.fill_preview:
+                draw_3d_ghost(context, pos, tm_manager.ghost_rotation_euler, BLOCKED_FILL if blocked else p.ghost_color, BLOCKED_LINE if blocked else p.ghost_outline_color, p.ghost_outline_width)
+            return
+        blocked = tm_manager.ghost_blocked
+        draw_3d_ghost(context, tm_manager.ghost_pos, tm_manager.ghost_rotation_euler, BLOCKED_FILL if blocked else p.ghost_color, BLOCKED_LINE if blocked else p.ghost_outline_color, p.ghost_outline_width)
 
 class VIEW3D_OT_tm_inventory(bpy.types.Operator):
     bl_idname = "view3d.tm_inventory"; bl_label = "Trackmania Inventory"
-    is_dragging = is_scaling = _is_warping = False; drag_offset = [0, 0]; _h2d = _h3d = None
+    is_dragging = is_scaling = _is_warping = False; drag_offset = [0, 0]; _h2d = _h3d = _timer = None; _catalog_seen = -1; _pending_import = None; fill_start = None; FILL_MAX = 1024
+    # Ghost tracking: mouse moves closer than TRACK_INTERVAL are coalesced into the latest one; the preview object
+    # (a full mesh, re-evaluated on every transform write) follows the ghost box at most every PREVIEW_INTERVAL
+    TRACK_INTERVAL = 1 / 120; PREVIEW_INTERVAL = 0.1
+    _mouse_pending = None; _tracked = 0.0; _ghost_key = None; _preview_dirty = False; _preview_synced = 0.0
+
+    def update_prefetch(self, context, lay, card):
+        p = context.preferences.addons[__name__].preferences
+        if tm_manager.loading_status != "READY" or p.preview_cache_mb <= 0: return
+        names = tm_manager.tree.names; items = lay.leaf_items
+        hover = TM_UI_Layout.item(tm_manager, card) if card else -1
+        if hover not in items: hover = -1
+        order = ([hover] if hover >= 0 else []) + [i for i in items if i != hover]
+        tm_prefetch.want([names[i] for i in order], names[hover] if hover >= 0 else None, tm_manager.gbx_root(p), import_settings(p), p.asset_library)
 
     def cleanup_preview(self):
         if tm_manager.active_preview_obj:
             try: bpy.data.objects.remove(tm_manager.active_preview_obj, do_unlink=True)
             except: pass
             tm_manager.active_preview_obj = None
-        for coll in list(tm_manager.active_preview_colls):
-            if coll and coll.name in bpy.data.collections:
-                for o in list(coll.objects): bpy.data.objects.remove(o, do_unlink=True)
-                for scene in bpy.data.scenes:
-                    if coll.name in scene.collection.children: scene.collection.children.unlink(coll)
-                bpy.data.collections.remove(coll)
-        tm_manager.active_preview_colls.clear()
-        bpy.ops.outliner.orphans_purge(do_local_ids=True, do_linked_ids=True, do_recursive=True)
-
-    def import_as_preview(self, context, name):
-        self.cleanup_preview()
-        p = context.preferences.addons[__name__].preferences; b = p.path_blocks if tm_manager.current_mode == "BLOCKS" else p.path_items
-        f = next((path for e in [".EDClassic.Gbx", ".Item.Gbx", ".Gbx"] if os.path.exists(path := os.path.join(b, f"{name}{e}"))), None)
-        if f:
-            pre_colls, pre_objs = set(bpy.data.collections), set(bpy.data.objects)
-            bpy.ops.view3d.tm_nice_import_gbx('EXEC_DEFAULT', filepath=f, files=[{"name": os.path.basename(f)}], visible_only=p.visible_only, merge_objects=p.merge_objects, lod=p.lod)
-            tm_manager.active_preview_colls.extend(list(set(bpy.data.collections) - pre_colls))
-            new_objs = [o for o in bpy.data.objects if o not in pre_objs]
-            mesh_objs = [o for o in new_objs if o.type == 'MESH' and o.name in context.view_layer.objects]
-            
-            if mesh_objs:
-                bpy.ops.object.select_all(action='DESELECT')
-                for o in mesh_objs: o.select_set(True)
-                context.view_layer.objects.active = mesh_objs[0]
-                if p.auto_join and len(mesh_objs) > 1: bpy.ops.object.join()
-                tm_manager.active_preview_obj = context.view_layer.objects.active
-                obj = tm_manager.active_preview_obj
-                
-                # --- ROTATION FIX ---
-                obj.rotation_mode = 'XYZ'
-                obj.rotation_euler = (0, 0, 0)
-                
-                # --- PIVOT FIX & BOUNDS CALCULATION ---
-                bbox = [obj.matrix_world @ Vector(corner) for corner in obj.bound_box]
-                min_x, max_x = min(v.x for v in bbox), max(v.x for v in bbox)
-                min_y, max_y = min(v.y for v in bbox), max(v.y for v in bbox)
-                min_z, max_z = min(v.z for v in bbox), max(v.z for v in bbox)
-
-                size_x = max_x - min_x
-                size_y = max_y - min_y
-                size_z = max_z - min_z
-
-                grid_w = max(32, math.ceil((size_x - 1.0) / 32) * 32)
-                grid_d = max(32, math.ceil((size_y - 1.0) / 32) * 32)
-                grid_h = max(8, math.ceil((size_z - 0.1) / 8) * 8)
-
-                center_x, center_y, bottom_z = (min_x + max_x) / 2, (min_y + max_y) / 2, min_z
-                saved_cursor = context.scene.cursor.location.copy()
-                context.scene.cursor.location = (center_x, center_y, bottom_z)
-                bpy.ops.object.origin_set(type='ORIGIN_CURSOR', center='MEDIAN')
-                context.scene.cursor.location = saved_cursor
-
-                tm_manager.ghost_min = Vector((-grid_w / 2, -grid_d / 2, 0))
-                tm_manager.ghost_max = Vector((grid_w / 2, grid_d / 2, grid_h))
-                
-                # Force an update to recalculate the snapped position with current rotation
-                # Pass 0,0 and force_snap=True to avoid relying on mouse ray (which requires 3d context)
-                self.update_ghost_location(context, 0, 0, sync_mouse=False, force_snap=True)
-                
-                self.sync_preview_pos()
+        # Previews built from the cache are a single object; importer runs free exactly what they created
+        if tm_manager.active_preview_record: tm_manager.active_preview_record.free(); tm_manager.active_preview_record = None
 
-    def sync_preview_pos(self):
+    def show_preview(self, context, name, mesh, ghost_min, ghost_max, scale):
+        obj = bpy.data.objects.new(f"{name}_Preview", mesh); obj.scale = scale
+        context.collection.objects.link(obj)
+        bpy.ops.object.select_all(action='DESELECT'); obj.select_set(True); context.view_layer.objects.active = obj
+        tm_manager.active_preview_obj = obj; tm_manager.ghost_min = ghost_min.copy(); tm_manager.ghost_max = ghost_max.copy()
+
+    def import_as_preview(self, context, name, defer=True):
+        self.cleanup_preview(); self._pending_import = None
+        p = context.preferences.addons[__name__].preferences; b = tm_manager.gbx_root(p)
+        f = tm_catalog.resolve(b, name)
+        if not f:
+            if name: self.report({'WARNING'}, f"{name}: no GBX file under {b}")
+            return
+        settings = import_settings(p); key, cached = cached_block(p, f, settings)
+        if cached:
+            self.show_preview(context, name, *cached[:4])
+        else:
+            tm_footprints.use(settings); fp = tm_footprints.get(b, name) if defer else None
+            if fp:
+                # Known footprint: the click returns and the ghost snaps right away. The import is only postponed:
+                # it still runs on the main thread at the next timer tick (or before a placement), blocking that tick
+                tm_manager.ghost_min, tm_manager.ghost_max = fp; self._pending_import = (name, f, settings, key, b)
+                self.update_ghost_location(context, 0, 0, sync_mouse=False, force_snap=True); return
+            if not self.run_import(context, name, f, settings, key, b): return
+
+        # Force an update to recalculate the snapped position with current rotation
+        # Pass 0,0 and force_snap=True to avoid relying on mouse ray (which requires 3d context)
+        self.update_ghost_location(context, 0, 0, sync_mouse=False, force_snap=True)
+        self.sync_preview_pos()
+
+    def run_import(self, context, name, f, settings, key, root):
+        p = context.preferences.addons[__name__].preferences
+        obj, g_min, g_max, record = import_gbx_mesh(context, f, settings)
+        tm_manager.active_preview_record = record
+        if not obj: return False
+        tm_manager.active_preview_obj = obj; tm_manager.ghost_min = g_min; tm_manager.ghost_max = g_max
+        tm_footprints.put(root, name, g_min, g_max)
+        if p.asset_library: tm_library.save(f, settings, obj, g_min, g_max)
+        if key: tm_manager.previews.put(key, obj.data, g_min, g_max, obj.scale)
+        return True
+
+    def run_pending_import(self, context):
+        name, f, settings, key, root = self._pending_import; self._pending_import = None
+        if name != tm_manager.active_item_name or not tm_manager.is_ghosting: return
+        if self.run_import(context, name, f, settings, key, root):
+            self.update_ghost_location(context, 0, 0, sync_mouse=False, force_snap=True); self.sync_preview_pos()
+
+    def ghost_cells(self, pos):
+        lo, hi = TM_Occupancy.local_box(tm_manager.ghost_min, tm_manager.ghost_max, tm_manager.ghost_rotation_euler)
+        return TM_Occupancy.box_cells(pos + lo, pos + hi)
+
+    def sync_preview_pos(self, throttle=False):
+        tm_manager.ghost_blocked = tm_occupancy.occupied(self.ghost_cells(tm_manager.ghost_pos))
+        self._preview_dirty = True; self.flush_preview(force=not throttle)
+
+    def flush_preview(self, force=False):
+        now = time.perf_counter()
+        if not self._preview_dirty or (not force and now - self._preview_synced < self.PREVIEW_INTERVAL): return
         if tm_manager.active_preview_obj:
             tm_manager.active_preview_obj.location = tm_manager.ghost_pos
             tm_manager.active_preview_obj.rotation_euler = tm_manager.ghost_rotation_euler
+        self._preview_dirty = False; self._preview_synced = now
+
+    def track_mouse(self, context):
+        mx, my = self._mouse_pending; self._mouse_pending = None; self._tracked = time.perf_counter()
+        moved = self.update_ghost_location(context, mx, my, live=True)
+        if moved and self.fill_start is not None: self.update_fill()
+        return moved
 
     def commit_block(self, context):
+        if self._pending_import: self.run_pending_import(context)
         if not tm_manager.active_preview_obj: return
-        block_name = tm_manager.active_item_name
-        root_name = f"TM_{block_name}"
-        root_coll = bpy.data.collections.get(root_name) or bpy.data.collections.new(root_name)
-        if root_name not in context.scene.collection.children: context.scene.collection.children.link(root_coll)
-        obj = tm_manager.active_preview_obj; tm_manager.active_preview_obj = None 
-        for coll in list(obj.users_collection): coll.objects.unlink(obj)
-        root_coll.objects.link(obj); obj.name = f"{block_name}_Placed"
-        self.cleanup_preview(); self.import_as_preview(context, block_name)
-
-    def update_ghost_location(self, context, mx, my, sync_mouse=False, force_snap=False):
+        if tm_manager.ghost_blocked and not context.preferences.addons[__name__].preferences.allow_overlap:
+            self.report({'WARNING'}, "Grid cells already occupied"); return
+        block_name = tm_manager.active_item_name; mode = context.preferences.addons[__name__].preferences.placement_mode
+        # The preview stays where it is; the placement shares its mesh, so nothing is re-imported
+        o = place_block(tm_manager.active_preview_obj, block_name, placed_collection(context, block_name), tm_manager.ghost_pos, tm_manager.ghost_rotation_euler, mode)
+        tm_occupancy.add(o.name, self.ghost_cells(tm_manager.ghost_pos)); self.sync_preview_pos()
+
+    def fill_step(self):
+        lo, hi = TM_Occupancy.local_box(tm_manager.ghost_min, tm_manager.ghost_max, tm_manager.ghost_rotation_euler)
+        return [max(32.0, math.ceil((hi[a] - lo[a] - 1.0) / 32) * 32) for a in range(2)]
+
+    def update_fill(self):
+        if (tm_manager.ghost_pos - self.fill_start).length < 1.0: tm_manager.fill_preview = []; return
+        pos = fill_positions(self.fill_start, tm_manager.ghost_pos, self.fill_step(), self.FILL_MAX)
+        tm_manager.fill_preview = [(v, tm_occupancy.occupied(self.ghost_cells(v))) for v in map(Vector, pos.tolist())]
+
+    def fill_blocks(self, context, targets):
+        if self._pending_import: self.run_pending_import(context)
+        src = tm_manager.active_preview_obj
+        if not src: return
+        p = context.preferences.addons[__name__].preferences; allow = p.allow_overlap; block_name = tm_manager.active_item_name
+        root_coll = placed_collection(context, block_name); placed = skipped = 0
+        for pos, _ in targets:
+            cells = self.ghost_cells(pos)
+            # Re-check: earlier blocks of this fill may already cover the cells
+            if not allow and tm_occupancy.occupied(cells): skipped += 1; continue
+            o = place_block(src, block_name, root_coll, pos, tm_manager.ghost_rotation_euler, p.placement_mode)
+            tm_occupancy.add(o.name, cells); placed += 1
+        self.sync_preview_pos()
+        self.report({'INFO'}, f"Placed {placed} x {block_name}" + (f", {skipped} occupied cells skipped" if skipped else ""))
+
+    def update_ghost_location(self, context, mx, my, sync_mouse=False, force_snap=False, live=False):
+        # `live` is mouse tracking: nothing changes unless the snapped position moved
         region = context.region
         # Safely get rv3d, though we only strictly need it if NOT force_snap
         rv3d = getattr(context.space_data, 'region_3d', None) if context.space_data else None
@@ -377,7 +2425,7 @@ class VIEW3D_OT_tm_inventory(bpy.types.Operator):
             # If forced, we don't rely on mouse ray, just re-evaluate current pos
             loc = tm_manager.ghost_pos
         else:
-            if not rv3d: return # Can't calculate 3D projection without View3D context
+            if not rv3d: return False # Can't calculate 3D projection without View3D context
             
             if sync_mouse:
                 new_2d = view3d_utils.location_3d_to_region_2d(region, rv3d, tm_manager.ghost_pos)
@@ -388,7 +2436,7 @@ class VIEW3D_OT_tm_inventory(bpy.types.Operator):
                 # CRITICAL: Even if warping, we must apply Z changes immediately
                 tm_manager.ghost_pos.z = tm_manager.ghost_z_offset
                 self.sync_preview_pos()
-                return # Skip calculation during warp
+                return True # Skip calculation during warp
 
             ro = view3d_utils.region_2d_to_origin_3d(region, rv3d, (mx, my))
             rd = view3d_utils.region_2d_to_vector_3d(region, rv3d, (mx, my))
@@ -414,33 +2462,52 @@ class VIEW3D_OT_tm_inventory(bpy.types.Operator):
         off_x = (final_w % 64.0) / 2.0
         off_y = (final_d % 64.0) / 2.0
         
-        tm_manager.ghost_pos.x = (math.floor(loc.x / 32.0) * 32.0) + off_x
-        tm_manager.ghost_pos.y = (math.floor(loc.y / 32.0) * 32.0) + off_y
-        tm_manager.ghost_pos.z = tm_manager.ghost_z_offset
-            
-        self.sync_preview_pos()
+        x, y = (math.floor(loc.x / 32.0) * 32.0) + off_x, (math.floor(loc.y / 32.0) * 32.0) + off_y
+        key = (x, y, tm_manager.ghost_z_offset, *tm_manager.ghost_rotation_euler)
+        if live and key == self._ghost_key: return False
+        self._ghost_key = key
+        tm_manager.ghost_pos.x, tm_manager.ghost_pos.y, tm_manager.ghost_pos.z = x, y, tm_manager.ghost_z_offset
+        self.sync_preview_pos(throttle=live)
+        return True
 
     def modal(self, context, event):
-        if context.area: context.area.tag_redraw()
-        mx, my, s = event.mouse_region_x, event.mouse_region_y, tm_manager.ui_width / 830.0
-        
-        # --- RECALCULATE UI GEOMETRY EXACTLY LIKE DRAW() ---
-        # This ensures the click-zones (hitboxes) match the visual zones 100%
-        slot_w = 115 * s
-        bar_h = 35 * s
-        cur_w = (7 * slot_w) + 10 * s
-        tm_manager.current_bar_width = cur_w
-        
-        hx = tm_manager.ui_pos_x + cur_w - (bar_h * 2) - 2 # Exact Help X
-        sx = hx - (280 * s) - (5 * s) # Exact Search X
-        search_w = 280 * s
-        
-        sy_cards, row_h = tm_manager.ui_pos_y + bar_h + 10*s, 145 * s
-        sh_rows = math.ceil(len(tm_manager.search_results) / 7) if tm_manager.search_query else 0
+        # Blender looks modal up on the registered class; the profiler can only wrap the instance's handle_event
+        return self.handle_event(context, event)
+
+    def handle_event(self, context, event):
+        if event.type == 'TIMER':
+            if self._pending_import: self.run_pending_import(context)
+            else: tm_prefetch.tick(context)
+            # Motion stopped: the last coalesced move and the preview object catch up with the ghost
+            if self._mouse_pending and self.track_mouse(context) and context.area: context.area.tag_redraw()
+            self.flush_preview()
+            if tm_catalog.version != self._catalog_seen:
+                # A finished catalog refresh changes which results count as missing
+                self._catalog_seen = tm_catalog.version
+                if tm_manager.search_query and context.preferences.addons[__name__].preferences.hide_missing: tm_manager.update_live_search()
+                if context.area: context.area.tag_redraw()
+            return {'PASS_THROUGH'}
+        if event.type != 'MOUSEMOVE':
+            # Clicks and keys act on where the ghost is now; mouse moves tag their own redraw, only when something changed
+            if self._mouse_pending: self.track_mouse(context)
+            if context.area: context.area.tag_redraw()
+        mx, my = event.mouse_region_x, event.mouse_region_y
+        was_help = tm_manager.is_hovering_help
         
-        in_ui = (tm_manager.ui_pos_x <= mx <= tm_manager.ui_pos_x + cur_w) and (tm_manager.ui_pos_y - bar_h <= my <= sy_cards + (len(tm_manager.active_rows) + sh_rows) * row_h)
-        tm_manager.is_hovering_help = (hx <= mx <= hx + bar_h) and (tm_manager.ui_pos_y - bar_h <= my <= tm_manager.ui_pos_y)
+        # --- SHARED LAYOUT ---
+        # The same TM_UI_Layout the overlay is drawn from, so hitboxes always match the visuals
+        lay = tm_manager.get_layout()
+        tm_manager.current_bar_width = lay.cur_w
+        lx, ly = mx - tm_manager.ui_pos_x, my - tm_manager.ui_pos_y
+        in_ui = lay.contains(lx, ly)
+        zone, card = lay.hit(lx, ly) if in_ui else (None, None)
+        tm_manager.is_hovering_help = zone == "HELP"
+        self.update_prefetch(context, lay, card)
 
+        # A release always ends a drag-fill, wherever it happens; only one over the viewport places it
+        fill_start = fill = None
+        if event.type == 'LEFTMOUSE' and event.value == 'RELEASE':
+            fill_start, self.fill_start = self.fill_start, None; fill, tm_manager.fill_preview = tm_manager.fill_preview, []
         if not in_ui and context.region.type != 'WINDOW': return {'PASS_THROUGH'}
         if event.type == 'MOUSEMOVE' and self._is_warping: self._is_warping = False; return {'RUNNING_MODAL'}
         
@@ -452,13 +2519,22 @@ class VIEW3D_OT_tm_inventory(bpy.types.Operator):
                     tm_manager.is_searching = False
                     return {'RUNNING_MODAL'}
                 else:
-                    self.cleanup_preview()
+                    self.cleanup_preview(); tm_prefetch.stop(); tm_footprints.save(); tm_library.save_manifest(); tm_profile.attach(None); self._pending_import = None
+                    # A Ctrl+Shift+P session ends with the overlay; back to what the Profiler preference says
+                    tm_profile.set_enabled(context.preferences.addons[__name__].preferences.profile)
+                    if self._timer: context.window_manager.event_timer_remove(self._timer); self._timer = None
                     tm_manager.is_open = False
                     bpy.types.SpaceView3D.draw_handler_remove(self._h2d, 'WINDOW')
                     bpy.types.SpaceView3D.draw_handler_remove(self._h3d, 'WINDOW')
                     return {'CANCELLED'}
 
             if not tm_manager.is_searching:
+                if event.type == 'P' and event.ctrl and event.shift:
+                    # Profiles this session only; the Profiler preference is left as it is
+                    if not tm_profile.enabled: tm_profile.enable(); tm_manager.show_profile = True
+                    elif context.preferences.addons[__name__].preferences.profile: tm_manager.show_profile = not tm_manager.show_profile
+                    else: tm_profile.disable()
+                    return {'RUNNING_MODAL'}
                 if event.type == 'G':
                     tm_manager.is_ghosting = not tm_manager.is_ghosting
                     if tm_manager.is_ghosting: self.import_as_preview(context, tm_manager.active_item_name)
@@ -491,7 +2567,8 @@ class VIEW3D_OT_tm_inventory(bpy.types.Operator):
                     return {'RUNNING_MODAL'}
 
         # --- SEARCH INPUT ---
-        if tm_manager.is_searching and not (event.type == 'LEFTMOUSE' and event.value == 'PRESS'):
+        # Clicks fall through: a release still has to end a drag or place the block pressed in the viewport
+        if tm_manager.is_searching and event.type != 'LEFTMOUSE':
             if event.value in {'PRESS', 'REPEAT'}:
                 if event.type == 'BACKSPACE': tm_manager.search_query = tm_manager.search_query[:-1]; tm_manager.update_live_search(); return {'RUNNING_MODAL'}
                 elif event.type == 'DEL': tm_manager.search_query = ""; tm_manager.update_live_search(); return {'RUNNING_MODAL'}
@@ -501,49 +2578,37 @@ class VIEW3D_OT_tm_inventory(bpy.types.Operator):
         
         if event.type == 'LEFTMOUSE' and event.value == 'PRESS':
             if in_ui:
-                # 1. UI: Search Bar Click (Exact Hitbox)
-                # Check height first (Black bar zone)
-                if (tm_manager.ui_pos_y - bar_h) <= my <= tm_manager.ui_pos_y:
-                    # Search
-                    if sx <= mx <= sx + search_w:
-                        tm_manager.is_searching = True
-                        return {'RUNNING_MODAL'}
-                    # Copy Name (Left of search)
-                    if tm_manager.ui_pos_x <= mx <= sx:
-                        bpy.context.window_manager.clipboard = tm_manager.active_item_name
-                        self.report({'INFO'}, f"Copied: {tm_manager.active_item_name}")
-                        return {'RUNNING_MODAL'}
-                    # Resize (Right Edge)
-                    if mx > tm_manager.ui_pos_x + cur_w - (20 * s):
-                        self.is_scaling = True
-                        return {'RUNNING_MODAL'}
+                # 1. UI: Name bar zones (search box, copy name, resize edge)
+                if zone == "SEARCH":
+                    tm_manager.is_searching = True
+                    return {'RUNNING_MODAL'}
+                if zone == "NAME":
+                    bpy.context.window_manager.clipboard = tm_manager.active_item_name
+                    self.report({'INFO'}, f"Copied: {tm_manager.active_item_name}")
+                    return {'RUNNING_MODAL'}
+                if zone == "RESIZE":
+                    self.is_scaling = True
+                    return {'RUNNING_MODAL'}
 
                 # General UI Click reset
                 if tm_manager.is_searching: tm_manager.is_searching = False
                 
-                if tm_manager.ui_pos_y <= my <= tm_manager.ui_pos_y + bar_h:
-                    for i in range(2):
-                        if tm_manager.ui_pos_x + 10 + i*45*s <= mx <= tm_manager.ui_pos_x + 40 + i*45*s: tm_manager.set_mode("BLOCKS" if i==0 else "ITEMS"); self.cleanup_preview(); return {'RUNNING_MODAL'}
-                hit, is_block = False, False
-                for r_idx, row in enumerate(tm_manager.active_rows):
-                    for i, it in enumerate(row):
-                        ix, iy = tm_manager.ui_pos_x + 10*s + i*slot_w, sy_cards + r_idx*row_h
-                        if ix <= mx <= ix+105*s and iy <= my <= iy+110*s:
-                            if r_idx == 0: tm_manager.search_query = ""; tm_manager.update_live_search()
-                            is_block = tm_manager.select_item(r_idx, i); hit = True; break
-                    if hit: break
-                if not hit and tm_manager.search_query != "":
-                    sry = sy_cards + (len(tm_manager.active_rows) * row_h)
-                    for i, it in enumerate(tm_manager.search_results):
-                        ix_s, iy_s = tm_manager.ui_pos_x + 10*s + (i % 7) * 115*s, sry + (i // 7) * row_h
-                        if ix_s <= mx <= ix_s+105*s and iy_s <= my <= iy_s+110*s: is_block = tm_manager.select_item(0, i, True); hit = True; break
+                if zone in {"MODE_BLOCKS", "MODE_ITEMS"}: tm_manager.set_mode("BLOCKS" if zone == "MODE_BLOCKS" else "ITEMS"); self.cleanup_preview(); return {'RUNNING_MODAL'}
+                hit, is_block = zone == "CARD", False
+                if hit:
+                    _, _, r_idx, i, is_search = card
+                    if is_search: is_block = tm_manager.select_item(0, i, True)
+                    else:
+                        if r_idx == 0: tm_manager.search_query = ""; tm_manager.update_live_search()
+                        is_block = tm_manager.select_item(r_idx, i)
                 if hit:
                     if is_block: self.import_as_preview(context, tm_manager.active_item_name)
                     else: self.cleanup_preview()
                     tm_manager.is_searching = False; return {'RUNNING_MODAL'}
                 self.is_dragging = True; self.drag_offset = [tm_manager.ui_pos_x - mx, tm_manager.ui_pos_y - my]; return {'RUNNING_MODAL'}
             elif tm_manager.is_ghosting and context.region.type == 'WINDOW':
-                self.commit_block(context); return {'RUNNING_MODAL'}
+                # Placement happens on release: a click places one block, a drag fills a line/rectangle
+                tm_manager.is_searching = False; self.fill_start = tm_manager.ghost_pos.copy(); return {'RUNNING_MODAL'}
             return {'PASS_THROUGH'}
 
         if event.type == 'RIGHTMOUSE' and event.value == 'PRESS':
@@ -561,9 +2626,21 @@ class VIEW3D_OT_tm_inventory(bpy.types.Operator):
         if event.type == 'MOUSEMOVE':
             if self.is_dragging: tm_manager.ui_pos_x, tm_manager.ui_pos_y = mx + self.drag_offset[0], my + self.drag_offset[1]
             if self.is_scaling: tm_manager.ui_width = max(620, mx - tm_manager.ui_pos_x)
-            if tm_manager.is_ghosting and context.region.type == 'WINDOW' and not in_ui: self.update_ghost_location(context, mx, my)
+            redraw = self.is_dragging or self.is_scaling or was_help != tm_manager.is_hovering_help
+            if tm_manager.is_ghosting and context.region.type == 'WINDOW' and not in_ui:
+                self._mouse_pending = (mx, my)
+                if time.perf_counter() - self._tracked >= self.TRACK_INTERVAL: redraw = self.track_mouse(context) or redraw
+            if redraw and context.area: context.area.tag_redraw()
             return {'PASS_THROUGH'}
 
+        if event.type in {'WHEELUPMOUSE', 'WHEELDOWNMOUSE'} and in_ui:
+            # Folder rows scroll sideways, the result grid scrolls by rows
+            tm_manager.scroll(lay, lay.grid_row_at(ly), -1 if event.type == 'WHEELUPMOUSE' else 1)
+            return {'RUNNING_MODAL'}
+        if event.type in {'PAGE_UP', 'PAGE_DOWN'} and event.value == 'PRESS' and lay.n_results:
+            tm_manager.scroll(lay, lay.search_row0, (-1 if event.type == 'PAGE_UP' else 1) * max(1, lay.result_rows))
+            return {'RUNNING_MODAL'}
+
         if event.type in {'WHEELUPMOUSE', 'WHEELDOWNMOUSE'} and tm_manager.is_ghosting and not in_ui:
             mult = 1 if event.type == 'WHEELUPMOUSE' else -1
             if event.alt:
@@ -575,24 +2652,147 @@ class VIEW3D_OT_tm_inventory(bpy.types.Operator):
                 self.update_ghost_location(context, mx, my, sync_mouse=True)
             return {'RUNNING_MODAL'}
 
+        if event.type == 'LEFTMOUSE' and event.value == 'RELEASE' and fill_start is not None and not in_ui:
+            if fill: self.fill_blocks(context, fill)
+            else: self.commit_block(context)
+            return {'RUNNING_MODAL'}
         if event.type == 'LEFTMOUSE' and event.value == 'RELEASE': self.is_dragging = self.is_scaling = False
         return {'PASS_THROUGH'}
 
     def invoke(self, context, event):
-        tm_manager.start_load(); self._h2d = bpy.types.SpaceView3D.draw_handler_add(draw_callback_px, (context,), 'WINDOW', 'POST_PIXEL')
-        self._h3d = bpy.types.SpaceView3D.draw_handler_add(draw_callback_view, (context,), 'WINDOW', 'POST_VIEW')
+        tm_manager.icons.set_budget(context.preferences.addons[__name__].preferences.icon_cache_size)
+        tm_manager.previews.set_budget(context.preferences.addons[__name__].preferences.preview_cache_mb)
+        tm_manager.sync.configure(context.preferences.addons[__name__].preferences.data_url)
+        tm_manager.atlas_cell = 64 if context.preferences.addons[__name__].preferences.icon_atlas else 0
+        tm_catalog.refresh_async([context.preferences.addons[__name__].preferences.path_blocks, context.preferences.addons[__name__].preferences.path_items])
+        tm_occupancy.rebuild(context.scene); tm_profile.set_enabled(context.preferences.addons[__name__].preferences.profile); tm_profile.attach(self)
+        tm_manager.start_load(); self._h2d = bpy.types.SpaceView3D.draw_handler_add(_draw_px, (context,), 'WINDOW', 'POST_PIXEL')
+        self._h3d = bpy.types.SpaceView3D.draw_handler_add(_draw_view, (context,), 'WINDOW', 'POST_VIEW')
+        self._timer = context.window_manager.event_timer_add(0.05, window=context.window)
         context.window_manager.modal_handler_add(self); return {'RUNNING_MODAL'}
 
+class VIEW3D_OT_tm_inventory_realize(bpy.types.Operator):
+    bl_idname = "view3d.tm_inventory_realize"; bl_label = "Realize Placed Blocks"; bl_description = "Turn instanced placements (selected ones, or all in the scene) into real mesh objects"; bl_options = {'REGISTER', 'UNDO'}
+    single_user: BoolProperty(name="Single User", description="Give every realized block its own copy of the mesh so it can be edited", default=True)
+
+    def execute(self, context):
+        placed = [o for c in context.scene.collection.children if c.name.startswith("TM_") for o in c.all_objects if o.instance_type == 'COLLECTION' and o.instance_collection and o.instance_collection.get("tm_block")]
+        sel = [o for o in placed if o.select_get()]; targets = sel or placed; count = 0
+        if not targets:
+            self.report({'WARNING'}, "No instanced placements to realize"); return {'CANCELLED'}
+        for inst in targets:
+            tm_lod.apply(inst, TM_LOD_Manager.HIGH); cells = tm_occupancy.owners.get(inst.name); tm_occupancy.remove(inst.name)
+            for o in realize_instance(inst, self.single_user):
+                if cells: tm_occupancy.add(o.name, cells)
+                count += 1
+        self.report({'INFO'}, f"Realized {len(targets)} placements into {count} objects")
+        return {'FINISHED'}
+
+class VIEW3D_OT_tm_layout_export(bpy.types.Operator, ExportHelper):
+    bl_idname = "view3d.tm_layout_export"; bl_label = "Export TM Layout"; bl_description = "Save the placed blocks as a compact .tmlayout file"
+    filename_ext = ".tmlayout"; filter_glob: StringProperty(default="*.tmlayout", options={'HIDDEN'})
+
+    def execute(self, context):
+        t0 = time.perf_counter(); lay = TM_Map_Layout()
+        for name, o in placed_blocks(context.scene): lay.add(name, o.location, o.rotation_euler)
+        lay.write(self.filepath)
+        self.report({'INFO'}, f"Exported {len(lay)} blocks ({len(lay.names)} types, {os.path.getsize(self.filepath) // 1024} KB) in {time.perf_counter() - t0:.2f}s")
+        return {'FINISHED'}
+
+class VIEW3D_OT_tm_layout_import(bpy.types.Operator, ImportHelper):
+    bl_idname = "view3d.tm_layout_import"; bl_label = "Import TM Layout"; bl_description = "Rebuild placed blocks from a .tmlayout file"; bl_options = {'REGISTER', 'UNDO'}
+    filename_ext = ".tmlayout"; filter_glob: StringProperty(default="*.tmlayout", options={'HIDDEN'})
+
+    def execute(self, context):
+        p = context.preferences.addons[__name__].preferences; wm = context.window_manager; t0 = time.perf_counter()
+        try: lay = TM_Map_Layout.read(self.filepath)
+        except (OSError, ValueError, KeyError, zlib.error, struct.error) as e:
+            self.report({'ERROR'}, f"Cannot read layout: {e}"); return {'CANCELLED'}
+        tm_catalog.refresh([p.path_blocks, p.path_items]); groups = lay.groups()
+        t_load = t_place = 0.0; placed = 0; missing = []
+        wm.progress_begin(0, len(groups))
+        for n, (name, rows) in enumerate(groups.items()):
+            # One load per block type, then cheap copies/instances for every placement of it
+            t1 = time.perf_counter(); src = block_source(context, p, name); t2 = time.perf_counter(); t_load += t2 - t1
+            if src is None: missing.append(name); continue
+            obj, dispose = src; root_coll = placed_collection(context, name)
+            for row in rows:
+                place_block(obj, name, root_coll, lay.pos[3 * row:3 * row + 3], lay.rot[3 * row:3 * row + 3], p.placement_mode)
+            placed += len(rows); dispose(); t_place += time.perf_counter() - t2
+            wm.progress_update(n + 1)
+        wm.progress_end(); tm_occupancy.rebuild(context.scene)
+        self.report({'WARNING'} if missing else {'INFO'}, f"Placed {placed} blocks of {len(groups) - len(missing)} types in {time.perf_counter() - t0:.2f}s (load {t_load:.2f}s, place {t_place:.2f}s)"
+            + (f"; {len(missing)} types without GBX: {', '.join(missing[:5])}" if missing else ""))
+        return {'FINISHED'}
+
+def menu_layout_export(self, context): self.layout.operator(VIEW3D_OT_tm_layout_export.bl_idname, text="TM Layout (.tmlayout)")
+def menu_layout_import(self, context): self.layout.operator(VIEW3D_OT_tm_layout_import.bl_idname, text="TM Layout (.tmlayout)")
+
+class VIEW3D_OT_tm_inventory_warm(bpy.types.Operator):
+    bl_idname = "view3d.tm_inventory_warm"; bl_label = "Warm Asset Library"; bl_description = "Measure the footprint of every block and item (and convert them into the asset library when it is enabled) with background Blender processes (click again to cancel)"
+
+    def execute(self, context):
+        if tm_warmer.busy:
+            tm_warmer.cancel(); self.report({'INFO'}, tm_warmer.message); return {'FINISHED'}
+        p = context.preferences.addons[__name__].preferences; settings = import_settings(p)
+        tm_catalog.refresh([p.path_blocks, p.path_items]); tm_footprints.use(settings)
+        files = set(tm_footprints.missing(p.path_blocks) + tm_footprints.missing(p.path_items))
+        if p.asset_library: files.update(f for f in tm_catalog.files(p.path_blocks, p.path_items) if not tm_library.has(f, settings))
+        if not files:
+            self.report({'INFO'}, "Asset library and footprints are already complete"); return {'FINISHED'}
+        files = sorted(files); tm_warmer.start(files, settings, p.warm_workers, tm_library, p.asset_library)
+        if not bpy.app.timers.is_registered(_warm_timer): bpy.app.timers.register(_warm_timer, first_interval=1.0)
+        self.report({'INFO'}, f"Converting {len(files)} files with {p.warm_workers} background processes")
+        return {'FINISHED'}
+
+class VIEW3D_OT_tm_inventory_trace(bpy.types.Operator, ExportHelper):
+    bl_idname = "view3d.tm_inventory_trace"; bl_label = "Export Profile Trace"; bl_description = "Save the profiler's recorded calls as a Chrome trace (chrome://tracing, ui.perfetto.dev)"
+    filename_ext = ".json"; filter_glob: StringProperty(default="*.json", options={'HIDDEN'})
+
+    def execute(self, context):
+        if not tm_profile.trace:
+            self.report({'WARNING'}, "Nothing recorded; enable the Profiler and use the inventory first"); return {'CANCELLED'}
+        n = tm_profile.export(self.filepath)
+        self.report({'INFO'}, f"Wrote {n} events" + (f" (the {tm_profile.dropped} oldest were dropped)" if tm_profile.dropped else "")); tm_profile.reset()
+        return {'FINISHED'}
+
+class VIEW3D_OT_tm_inventory_sync(bpy.types.Operator):
+    bl_idname = "view3d.tm_inventory_sync"; bl_label = "Sync Inventory Data"; bl_description = "Download changed inventory JSON and icons"
+
+    def execute(self, context):
+        if tm_manager.loading_status not in {"IDLE", "READY", "ERROR"}:
+            self.report({'WARNING'}, "Inventory is already loading"); return {'CANCELLED'}
+        tm_manager.sync.configure(context.preferences.addons[__name__].preferences.data_url)
+        tm_manager.start_load(force_sync=True)
+        self.report({'INFO'}, "Inventory sync started in the background")
+        return {'FINISHED'}
+
 # --- REGISTRATION ---
-classes = (TM2020_Inventory_Preferences, VIEW3D_OT_tm_inventory); addon_keymaps = []
+classes = (TM2020_Inventory_Preferences, VIEW3D_OT_tm_inventory, VIEW3D_OT_tm_inventory_sync, VIEW3D_OT_tm_inventory_warm, VIEW3D_OT_tm_inventory_realize, VIEW3D_OT_tm_layout_export, VIEW3D_OT_tm_layout_import, VIEW3D_OT_tm_inventory_trace); addon_keymaps = []
 def register():
     for cls in classes: bpy.utils.register_class(cls)
+    bpy.app.handlers.save_pre.append(_preview_save_pre); bpy.app.handlers.save_post.append(_preview_save_post); bpy.app.handlers.load_pre.append(_preview_load_pre)
+    bpy.app.handlers.load_post.append(_occupancy_load_post)
+    bpy.app.handlers.undo_post.append(_lod_undo_post); bpy.app.handlers.redo_post.append(_lod_undo_post)
+    bpy.app.timers.register(lod_timer_arm, first_interval=1.0)
+    bpy.types.TOPBAR_MT_file_export.append(menu_layout_export); bpy.types.TOPBAR_MT_file_import.append(menu_layout_import)
     wm = bpy.context.window_manager
     if wm.keyconfigs.addon:
         km = wm.keyconfigs.addon.keymaps.new(name='3D View', space_type='VIEW_3D')
         kmi = km.keymap_items.new(VIEW3D_OT_tm_inventory.bl_idname, 'I', 'PRESS', ctrl=True, shift=True)
         addon_keymaps.append((km, kmi))
 def unregister():
+    if bpy.app.timers.is_registered(_load_timer): bpy.app.timers.unregister(_load_timer)
+    if bpy.app.timers.is_registered(_warm_timer): bpy.app.timers.unregister(_warm_timer)
+    if bpy.app.timers.is_registered(_lod_timer): bpy.app.timers.unregister(_lod_timer)
+    tm_lod.restore_all(); tm_profile.disable(); tm_profile.op = None
+    bpy.types.TOPBAR_MT_file_export.remove(menu_layout_export); bpy.types.TOPBAR_MT_file_import.remove(menu_layout_import)
+    if tm_warmer.busy: tm_warmer.cancel()
+    tm_prefetch.stop()
+    for h, fn in ((bpy.app.handlers.save_pre, _preview_save_pre), (bpy.app.handlers.save_post, _preview_save_post), (bpy.app.handlers.load_pre, _preview_load_pre), (bpy.app.handlers.load_post, _occupancy_load_post),
+            (bpy.app.handlers.undo_post, _lod_undo_post), (bpy.app.handlers.redo_post, _lod_undo_post)):
+        if fn in h: h.remove(fn)
+    tm_manager.previews.clear()
     for cls in reversed(classes): bpy.utils.unregister_class(cls)
     for km, kmi in addon_keymaps: km.keymap_items.remove(kmi)
     addon_keymaps.clear()
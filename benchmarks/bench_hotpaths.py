@@ -0,0 +1,205 @@
+"""Hot paths of the inventory overlay, timed headless against the real BlockInfoInventory.gbx.json and icons.
+
+    python benchmarks/bench_hotpaths.py [--json] [--out FILE] [--compare BASE.json] [--tolerance 1.25]
+
+Covers load_from_cache (cold: JSON parse + index build, warm: compiled index) plus the icon warm-up,
+update_live_search per keystroke, one draw_callback_px frame (rebuilt and replayed, and draw_card alone),
+modal hit-testing and update_ghost_location snapping (re-evaluated per event, and as live mouse tracking that
+skips moves within the same cell and throttles preview object writes). Every figure is the best of several runs.
+--out writes the JSON results; --compare reports each figure against an earlier --out file and exits
+with status 1 if any got slower than `tolerance` times its baseline.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import standins
+from bench_search import QUERIES, per_key
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SOURCE = os.path.join(ROOT, "BlockInfoInventory.gbx.json")
+ICON_DIRS = ["Block_Icons", "Item_Icons"]
+
+
+def best(fn, number, repeat=5):
+    # Mean time per call of the fastest run
+    t = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for _ in range(number): fn()
+        t = min(t, (time.perf_counter() - t0) / number)
+    return t
+
+
+def seed_cache(scripts_dir):
+    """Lay out the addon cache the way TM_Data_Sync leaves it: the blocks JSON plus one flat icon folder."""
+    cache = os.path.join(scripts_dir, "presets", "tm_inventory_cache"); icons = os.path.join(cache, "icons")
+    os.makedirs(icons)
+    shutil.copyfile(SOURCE, os.path.join(cache, "blocks.json"))
+    for d in ICON_DIRS:
+        src = os.path.join(ROOT, d)
+        if not os.path.isdir(src): continue
+        for name in os.listdir(src):
+            if name.lower().endswith(".png"): os.symlink(os.path.join(src, name), os.path.join(icons, name))
+    return cache
+
+
+def bench_load(m):
+    mgr = m.tm_manager; out = {}
+    def cold():
+        for f in (m.BLOCKS_INDEX_FILE, m.ITEMS_INDEX_FILE, m.BLOCKS_SEARCH_FILE, m.ITEMS_SEARCH_FILE):
+            if os.path.exists(f): os.remove(f)
+        mgr.load_from_cache()
+    out["load_cold_ms"] = best(cold, 1) * 1e3
+    out["load_warm_ms"] = best(mgr.load_from_cache, 3) * 1e3
+    def warm_icons():
+        # apply_cache's first-screen icons, loaded without the per-frame upload limit
+        mgr.icons.clear(); mgr.icons.begin_frame(); mgr.icons.loads_per_frame = 1 << 30
+        for name in mgr._icon_warmup: mgr.icons.get(name)
+    mgr.apply_cache(*mgr.read_cache())
+    out["icon_warmup_ms"] = best(warm_icons, 3) * 1e3; out["icon_warmup_count"] = len(mgr._icon_warmup)
+    mgr.icons.loads_per_frame = 12; mgr.icons.clear()
+    return out
+
+
+def bench_search(m):
+    mgr = m.tm_manager; results = []
+    def typer():
+        # An emptied search box also drops the index's cached queries, so every run types from cold
+        mgr.reset_navigation(); mgr.update_live_search()
+        def key(text): mgr.search_query = text; mgr.update_live_search()
+        return key
+    for q in QUERIES:
+        mean, worst = per_key(typer, q, 5)
+        results.append({"query": q, "ms": mean * 1e3, "worst_ms": worst * 1e3})
+    mgr.reset_navigation()
+    return {"keystroke_ms": sum(r["ms"] for r in results) / len(results), "queries": results}
+
+
+def open_rows(m, depth=3):
+    """Open the first folder of each row, as a user browsing down would, and type a broad search."""
+    mgr = m.tm_manager; mgr.reset_navigation()
+    for r in range(depth):
+        row = mgr.active_rows[r]; folder = next((k for k, i in enumerate(row) if mgr.tree.is_folder(i) and mgr.tree.child_count[i]), None)
+        if folder is None: break
+        mgr.select_item(r, folder)
+    mgr.search_query = "road"; mgr.update_live_search()
+
+
+def bench_draw(m, ctx):
+    mgr = m.tm_manager; prefs = ctx.preferences.addons[m.__name__].preferences; open_rows(m)
+    def rebuild(): m.overlay_list.key = None; mgr._layout = None; m.draw_callback_px(ctx)
+    def replay(): m.draw_callback_px(ctx)
+    out = {"frame_rebuild_ms": best(rebuild, 20) * 1e3, "frame_replay_ms": best(replay, 200) * 1e3}
+    lay = mgr.get_layout(); dl = m.TM_Draw_List(); names = mgr.tree.names
+    def cards():
+        dl.reset(None)
+        for x, y, r_idx, i, is_search in lay.cards:
+            item = m.TM_UI_Layout.item(mgr, (x, y, r_idx, i, is_search))
+            m.draw_card(dl, x, y, item, i, False, True, names[item] == mgr.selected_block_name, lay.s, prefs)
+    out["cards"] = len(lay.cards); out["draw_card_us"] = best(cards, 50) * 1e6 / max(1, len(lay.cards))
+    return out
+
+
+def bench_hit(m, ctx):
+    # A sweep of mouse positions over and around the overlay, as MOUSEMOVE events would deliver them
+    mgr = m.tm_manager; open_rows(m); mgr.view_height = ctx.region.height; lay = mgr.get_layout()
+    points = [(x - mgr.ui_pos_x, y - mgr.ui_pos_y) for x in range(0, int(lay.cur_w) + 200, 23) for y in range(0, ctx.region.height, 19)]
+    def sweep():
+        lay = mgr.get_layout()
+        for lx, ly in points:
+            if lay.contains(lx, ly): lay.hit(lx, ly)
+    return {"points": len(points), "hit_us": best(sweep, 10) * 1e6 / len(points)}
+
+
+class Preview:
+    """Counts transform writes, each of which re-evaluates the full preview mesh in Blender."""
+    writes = 0
+
+    def __setattr__(self, name, value): type(self).writes += 1; object.__setattr__(self, name, value)
+
+
+def bench_ghost(m, ctx):
+    mgr = m.tm_manager; op = m.VIEW3D_OT_tm_inventory(); occ = m.tm_occupancy; objects = sys.modules["bpy"].data.objects
+    mgr.ghost_min, mgr.ghost_max = standins.Vector((0, 0, 0)), standins.Vector((32, 64, 8))
+    # A placed map of 50 x 50 blocks for the occupancy checks to run against
+    occ.cells = {}; occ.owners = {}
+    for i in range(2500):
+        name = f"Block_{i}"; objects[name] = None
+        occ.add(name, occ.box_cells(standins.Vector(((i % 50) * 32, (i // 50) * 32, 0)), standins.Vector(((i % 50) * 32 + 32, (i // 50) * 32 + 32, 8))))
+    moves = [(x, y) for x in range(-600, 600, 37) for y in range(-400, 400, 29)]
+    def track():
+        for mx, my in moves: op.update_ghost_location(ctx, mx, my)
+    def snap():
+        mgr.ghost_rotation_euler.z += 1.5707963267948966; op.update_ghost_location(ctx, 0, 0, force_snap=True)
+    # A drag across the grid at one event per pixel, most of them inside the cell the ghost already sits in
+    path = [(x, x // 3) for x in range(-600, 600)]
+    def live():
+        for mx, my in path: op.update_ghost_location(ctx, mx, my, live=True)
+    out = {"moves": len(moves), "track_us": best(track, 3) * 1e6 / len(moves), "rotate_snap_us": best(snap, 200) * 1e6, "occupied_cells": len(occ.cells)}
+    mgr.active_preview_obj = Preview(); Preview.writes = 0
+    out["track_live_us"] = best(live, 3) * 1e6 / len(path); out["preview_writes_per_move"] = Preview.writes / (3 * 5 * len(path))
+    mgr.active_preview_obj = None
+    objects.clear(); occ.cells = {}; occ.owners = {}
+    return out
+
+
+def flatten(results, prefix=""):
+    # Comparable figures only: timings, keyed by dotted path
+    out = {}
+    for k, v in results.items():
+        if isinstance(v, dict): out.update(flatten(v, f"{prefix}{k}."))
+        elif k.endswith(("_ms", "_us")): out[prefix + k] = v
+    return out
+
+
+def compare(results, base_path, tolerance):
+    with open(base_path, encoding="utf-8") as f: base = flatten(json.load(f)["results"])
+    now = flatten(results); slower = []
+    print(f"vs {base_path} (tolerance x{tolerance})")
+    for k, v in now.items():
+        if k not in base: continue
+        ratio = v / base[k] if base[k] else 1.0; flag = ratio > tolerance
+        if flag: slower.append(k)
+        print(f"  {k:<28} {base[k]:10.3f} -> {v:10.3f}  x{ratio:5.2f}{'  SLOWER' if flag else ''}")
+    return slower
+
+
+def commit():
+    try: return subprocess.run(["git", "-C", ROOT, "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip() or None
+    except OSError: return None
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    ap.add_argument("--json", action="store_true", help="print the results as JSON")
+    ap.add_argument("--out", help="write the results as JSON to this file")
+    ap.add_argument("--compare", help="JSON file from an earlier --out run to compare against")
+    ap.add_argument("--tolerance", type=float, default=1.25, help="slowdown ratio that counts as a regression")
+    args = ap.parse_args()
+    scripts = tempfile.mkdtemp(prefix="tm_inventory_bench_")
+    try:
+        seed_cache(scripts); m = standins.import_addon(scripts); ctx = standins.context()
+        sys.modules["bpy"].context = ctx
+        results = {"load": bench_load(m), "search": bench_search(m), "draw": bench_draw(m, ctx), "hit": bench_hit(m, ctx), "ghost": bench_ghost(m, ctx)}
+        results["load"]["leaves"] = len(m.tm_manager.block_tree.leaves)
+    finally: shutil.rmtree(scripts, ignore_errors=True)
+    doc = {"bench": "hotpaths", "commit": commit(), "python": platform.python_version(), "machine": platform.machine(), "results": results}
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f: json.dump(doc, f, indent=1)
+    if args.json: print(json.dumps(doc, indent=1))
+    else:
+        print(f"commit {doc['commit']}, {results['load']['leaves']} leaves")
+        for k, v in flatten(results).items(): print(f"  {k:<28} {v:10.3f}")
+    if args.compare and compare(results, args.compare, args.tolerance): sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
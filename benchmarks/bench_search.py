@@ -0,0 +1,61 @@
+"""Per-keystroke cost of the live search: the old recursive dict walk against TM_Search_Index.
+
+    python benchmarks/bench_search.py [--json]
+"""
+import os
+import re
+import sys
+import json
+import time
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import standins
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SOURCE = os.path.join(ROOT, "BlockInfoInventory.gbx.json")
+QUERIES = ["roadtechcurve3", "platformgrass", "rtc3", "deco hill", "gtloop"]
+
+
+def walk_search(roots, q):
+    # The search as it was before the index: full tree walk, substring test, first 70 hits
+    res = []
+    def walk(items):
+        for i in items:
+            if not i.get("IsFolder"):
+                if q in i.get("Name", "").lower(): res.append(i)
+            else: walk(i.get("Childs", []))
+    walk(roots)
+    return res[:70]
+
+
+def per_key(make, text, repeat):
+    # Type the query one character at a time, then backspace it away again, from a cold start each time
+    keys = [text[:k] for k in range(1, len(text) + 1)]; keys += keys[-2::-1]
+    mean = worst = float("inf")
+    for _ in range(repeat):
+        fn = make(); times = []
+        for k in keys:
+            t = time.perf_counter(); fn(k); times.append(time.perf_counter() - t)
+        mean, worst = min(mean, sum(times) / len(times)), min(worst, max(times))
+    return mean, worst
+
+
+def main():
+    m = standins.import_addon()
+    with open(SOURCE, encoding="utf-8") as f: data = json.loads(re.sub(r",\s*(?=[}\]])", "", f.read()))
+    roots = [i for i in data["RootChilds"] if i.get("Name", "").lower() != "dev"]
+    tree = m.TM_Inventory_Index.load(SOURCE, os.path.join(tempfile.mkdtemp(), "blocks.idx"))
+    results = []
+    for q in QUERIES:
+        walk_t, walk_w = per_key(lambda: lambda k: walk_search(roots, k.lower()), q, 5)
+        index_t, index_w = per_key(lambda: m.TM_Search_Index(tree).query, q, 5)
+        results.append({"query": q, "walk_ms": walk_t * 1e3, "walk_worst_ms": walk_w * 1e3, "index_ms": index_t * 1e3, "index_worst_ms": index_w * 1e3})
+    if "--json" in sys.argv: print(json.dumps({"bench": "search", "leaves": len(tree.leaves), "results": results}, indent=1))
+    else:
+        print(f"{len(tree.leaves)} leaves, ms per keystroke (mean / worst)")
+        for r in results: print(f"  {r['query']:<16} walk {r['walk_ms']:6.3f} / {r['walk_worst_ms']:6.3f}   index {r['index_ms']:6.3f} / {r['index_worst_ms']:6.3f}")
+
+
+if __name__ == "__main__":
+    main()
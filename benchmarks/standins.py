@@ -0,0 +1,155 @@
+"""Minimal bpy/gpu/blf/mathutils stand-ins so the addon module can be imported outside Blender.
+
+Only what the benchmarked code paths touch is provided; anything GPU related is a no-op.
+"""
+import os
+import sys
+import math
+import types
+import tempfile
+
+
+class Vector:
+    __slots__ = ("_v",)
+
+    def __init__(self, seq=(0.0, 0.0, 0.0)): self._v = [float(c) for c in seq]
+    def __len__(self): return len(self._v)
+    def __iter__(self): return iter(self._v)
+    def __getitem__(self, i): return self._v[i]
+    def __setitem__(self, i, val): self._v[i] = float(val)
+    def __add__(self, o): return Vector(a + b for a, b in zip(self._v, o))
+    def __sub__(self, o): return Vector(a - b for a, b in zip(self._v, o))
+    def __mul__(self, f): return Vector(a * f for a in self._v)
+    __rmul__ = __mul__
+    def __repr__(self): return f"Vector({tuple(self._v)})"
+    def copy(self): return Vector(self._v)
+    length = property(lambda s: math.sqrt(sum(c * c for c in s._v)))
+    x = property(lambda s: s._v[0], lambda s, v: s.__setitem__(0, v))
+    y = property(lambda s: s._v[1], lambda s, v: s.__setitem__(1, v))
+    z = property(lambda s: s._v[2], lambda s, v: s.__setitem__(2, v))
+
+
+class Euler(Vector):
+    __slots__ = ()
+
+    def __init__(self, seq=(0.0, 0.0, 0.0), order='XYZ'): super().__init__(seq)
+
+    def to_matrix(self):
+        x, y, z = self._v
+        return Matrix.Rotation(z, 3, 'Z') @ Matrix.Rotation(y, 3, 'Y') @ Matrix.Rotation(x, 3, 'X')
+
+
+class Matrix:
+    def __init__(self, rows=None): self.rows = rows or [[1.0 if i == j else 0.0 for j in range(4)] for i in range(4)]
+
+    def __matmul__(self, o):
+        if isinstance(o, Matrix):
+            cols = list(zip(*o.rows))
+            return Matrix([[sum(a * b for a, b in zip(row, col)) for col in cols] for row in self.rows])
+        return Vector(sum(a * b for a, b in zip(row, o)) for row in self.rows[:len(o)])
+
+    def copy(self): return Matrix([list(r) for r in self.rows])
+
+    def to_4x4(self):
+        n = len(self.rows)
+        return Matrix([[self.rows[i][j] if i < n and j < n else float(i == j) for j in range(4)] for i in range(4)])
+
+    @classmethod
+    def Translation(cls, v):
+        m = cls()
+        for i in range(3): m.rows[i][3] = float(v[i])
+        return m
+
+    @classmethod
+    def Rotation(cls, angle, size, axis):
+        c, s = math.cos(angle), math.sin(angle); a, b = {'X': (1, 2), 'Y': (2, 0), 'Z': (0, 1)}[axis]
+        m = cls([[float(i == j) for j in range(size)] for i in range(size)])
+        m.rows[a][a] = m.rows[b][b] = c; m.rows[a][b] = -s; m.rows[b][a] = s
+        return m
+
+
+class _Anything:
+    """Accepts any attribute access or call and returns itself (shaders, batches, textures...)."""
+    def __getattr__(self, name): return self
+    def __call__(self, *args, **kwargs): return self
+    def __iter__(self): return iter(())
+    def __bool__(self): return True
+
+
+class _Images:
+    """bpy.data.images stand-in: `load` reads the file, so icon loading still pays for the disk I/O."""
+    def load(self, path, check_existing=False):
+        with open(path, "rb") as f: return f.read()
+
+    def remove(self, img): pass
+
+
+class _Data(_Anything):
+    def __init__(self): self.images = _Images(); self.objects = {}
+
+
+class _View3D:
+    """view3d_utils stand-in: a fixed top-down perspective camera 400 m above the origin, one metre per pixel at ground level."""
+    EYE = 400.0
+
+    @staticmethod
+    def region_2d_to_origin_3d(region, rv3d, co): return Vector((0.0, 0.0, _View3D.EYE))
+
+    @staticmethod
+    def region_2d_to_vector_3d(region, rv3d, co): return Vector((co[0] / _View3D.EYE, co[1] / _View3D.EYE, -1.0))
+
+    @staticmethod
+    def location_3d_to_region_2d(region, rv3d, co): return Vector((co[0], co[1]))
+
+
+def preferences(**overrides):
+    """Addon preferences at their defaults, as far as the benchmarked code reads them."""
+    p = dict(ui_bg_color=(0.01, 0.01, 0.01, 1.0), ui_accent_color=(0.0, 0.45, 0.2, 0.95), ui_text_color=(1.0, 1.0, 1.0, 1.0),
+        ghost_color=(0.0, 1.0, 0.4, 0.05), ghost_outline_color=(0.2, 1.0, 0.4, 0.8), ghost_outline_width=2.0,
+        path_blocks="", path_items="", hide_missing=False, result_rows_max=6, preview_cache_mb=0, asset_library=False,
+        allow_overlap=False, placement_mode='INSTANCE', profile=False)
+    p.update(overrides)
+    return types.SimpleNamespace(**p)
+
+
+def context(prefs=None, width=1920, height=1080, addon="TM2020_Inventory"):
+    """A bpy.context stand-in for draw callbacks and operators: a WINDOW region of `width` x `height`."""
+    prefs = prefs or preferences()
+    region = types.SimpleNamespace(type='WINDOW', width=width, height=height, x=0, y=0)
+    return types.SimpleNamespace(preferences=types.SimpleNamespace(addons={addon: types.SimpleNamespace(preferences=prefs)}),
+        region=region, space_data=types.SimpleNamespace(region_3d=object()), area=None, window=_Anything(), window_manager=_Anything())
+
+
+def _module(name, **attrs):
+    mod = types.ModuleType(name); mod.__dict__.update(attrs); sys.modules[name] = mod
+    return mod
+
+
+def install(cache_dir=None):
+    """Register the stand-in modules; `cache_dir` becomes bpy.utils.user_resource('SCRIPTS')."""
+    cache_dir = cache_dir or tempfile.mkdtemp(prefix="tm_inventory_bench_")
+    anything = _Anything()
+    prop = lambda **kwargs: None
+    timers = types.SimpleNamespace(register=lambda *a, **k: None, is_registered=lambda f: False, unregister=lambda f: None)
+    bpy = _module("bpy",
+        utils=types.SimpleNamespace(user_resource=lambda kind: cache_dir, register_class=lambda c: None, unregister_class=lambda c: None),
+        types=types.SimpleNamespace(AddonPreferences=object, Operator=type("Operator", (), {}), SpaceView3D=anything),
+        app=types.SimpleNamespace(timers=timers, handlers=_module("bpy.app.handlers", persistent=lambda f: f, **{n: [] for n in ("load_pre", "load_post", "save_pre", "save_post")}),
+            binary_path="blender", background=True),
+        data=_Data(), ops=anything, context=context())
+    _module("bpy.props", **{n: prop for n in ("StringProperty", "FloatVectorProperty", "FloatProperty", "EnumProperty", "BoolProperty", "IntProperty")})
+    bpy.props = sys.modules["bpy.props"]
+    _module("gpu", texture=anything, shader=anything, state=anything, matrix=anything, types=anything)
+    _module("blf", **{n: (lambda *a, **k: None) for n in ("color", "size", "position", "draw")})
+    _module("gpu_extras"); _module("gpu_extras.batch", batch_for_shader=lambda *a, **k: anything)
+    _module("bpy_extras", view3d_utils=_View3D)
+    _module("bpy_extras.io_utils", ImportHelper=type("ImportHelper", (), {}), ExportHelper=type("ExportHelper", (), {}))
+    _module("mathutils", Vector=Vector, Euler=Euler, Matrix=Matrix)
+    return cache_dir
+
+
+def import_addon(cache_dir=None):
+    install(cache_dir)
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    import TM2020_Inventory
+    return TM2020_Inventory
@@ -0,0 +1,30 @@
+"""Shared fixtures: the addon imported headless against the stand-ins in benchmarks/standins.py."""
+import os
+import re
+import sys
+import json
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SOURCE = os.path.join(ROOT, "BlockInfoInventory.gbx.json")
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+import standins
+
+
+@pytest.fixture(scope="session")
+def addon(tmp_path_factory):
+    # One import per run: the module's cache paths are fixed when it loads
+    return standins.import_addon(str(tmp_path_factory.mktemp("scripts")))
+
+
+@pytest.fixture(scope="session")
+def source_roots():
+    """Root folders of the bundled blocks JSON as the old dict walk saw them (trailing commas stripped, no dev folder)."""
+    with open(SOURCE, encoding="utf-8") as f: data = json.loads(re.sub(r",\s*(?=[}\]])", "", f.read()))
+    return [i for i in data["RootChilds"] if i.get("Name", "").lower() != "dev"]
+
+
+@pytest.fixture(scope="session")
+def block_tree(addon, tmp_path_factory):
+    return addon.TM_Inventory_Index.load(SOURCE, str(tmp_path_factory.mktemp("index") / "blocks.idx"))
@@ -0,0 +1,72 @@
+"""TM_GBX_Catalog: names from the files on disk, extension precedence, and refreshes that only re-list changed folders."""
+import os
+import threading
+
+import pytest
+
+
+def touch(path, data=b"GBX"):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f: f.write(data)
+
+
+@pytest.fixture
+def tree(tmp_path):
+    root = tmp_path / "Blocks"
+    for rel in ("Road/RoadTechStraight.Block.Gbx", "Road/RoadTechCurve1.EDClassic.Gbx", "Road/RoadTechCurve1.Gbx",
+            "Deco/Hill.Item.Gbx", "Deco/Hill.Gbx", "Deco/Sub/Pillar.edclassic.gbx", "Deco/readme.txt"):
+        touch(str(root / rel))
+    return str(root)
+
+
+def test_names_and_precedence(addon, tree, tmp_path):
+    cat = addon.TM_GBX_Catalog(str(tmp_path / "catalog.json")); cat.refresh([tree])
+    names = cat.names[os.path.normpath(tree)]
+    assert sorted(names) == ["Deco/Hill", "Deco/Sub/Pillar", "Road/RoadTechCurve1", "Road/RoadTechStraight.Block"]
+    assert cat.resolve(tree, "Road/RoadTechCurve1").endswith("RoadTechCurve1.EDClassic.Gbx")
+    assert cat.resolve(tree, "Deco/Hill").endswith("Hill.Item.Gbx") and cat.resolve(tree, "Deco/Sub/Pillar")
+    assert cat.resolve(tree, "Deco/readme") is None and not cat.available(tree, "Nope") and cat.available(tree, "Deco/Hill")
+
+
+def test_refresh_relists_changed_dirs(addon, tree, tmp_path):
+    path = str(tmp_path / "catalog.json"); cat = addon.TM_GBX_Catalog(path)
+    assert cat.refresh([tree]) == 4 # The root, Road, Deco and Deco/Sub
+    assert cat.refresh([tree]) == 0
+    touch(os.path.join(tree, "Deco", "Sub", "Arch.Gbx"))
+    os.utime(os.path.join(tree, "Deco", "Sub"), ns=(1, 1)) # A new mtime even on coarse clocks
+    assert cat.refresh([tree]) == 1 and cat.resolve(tree, "Deco/Sub/Arch")
+    # A new session reads the saved catalog and has nothing to re-list
+    again = addon.TM_GBX_Catalog(path); assert again.refresh([tree]) == 0 and again.names == cat.names
+
+
+def test_stat_follows_rewrites(addon, tree, tmp_path):
+    cat = addon.TM_GBX_Catalog(str(tmp_path / "catalog.json")); cat.refresh([tree])
+    f = cat.resolve(tree, "Deco/Hill"); touch(f, b"GBX" * 10)
+    assert cat.stat(tree, "Deco/Hill")[1] == 30 and cat.stat(tree, "Nope") is None
+    os.remove(f); assert cat.stat(tree, "Deco/Hill") is None
+
+
+def test_uncatalogued_root_probes_disk(addon, tree, tmp_path):
+    cat = addon.TM_GBX_Catalog(str(tmp_path / "catalog.json"))
+    assert cat.resolve(tree, "Road/RoadTechCurve1").endswith(".EDClassic.Gbx") and cat.available(tree, "Anything")
+
+
+def test_refresh_requested_while_running(addon, tmp_path, monkeypatch):
+    cat = addon.TM_GBX_Catalog(str(tmp_path / "catalog.json")); seen = []; gate = threading.Event()
+    started = threading.Event()
+    def refresh(roots):
+        seen.append(roots); started.set(); gate.wait(5)
+    monkeypatch.setattr(cat, "refresh", refresh)
+    cat.refresh_async(["blocks"]); started.wait(5)
+    cat.refresh_async(["blocks", "items-old"]); cat.refresh_async(["blocks", "items"])
+    thread = cat._thread; gate.set(); thread.join(5)
+    # The first refresh, then the latest of the requests made meanwhile
+    assert seen == [["blocks"], ["blocks", "items"]] and cat._thread is None
+
+
+def test_hide_missing_refilters(addon, monkeypatch):
+    calls = []; mgr = addon.tm_manager
+    monkeypatch.setattr(mgr, "update_live_search", lambda: calls.append(mgr.search_query))
+    monkeypatch.setattr(mgr, "search_query", ""); addon.update_hide_missing(None, None)
+    monkeypatch.setattr(mgr, "search_query", "road"); addon.update_hide_missing(None, None)
+    assert calls == ["road"]
@@ -0,0 +1,80 @@
+"""TM_Material_Dedup: material keys from every rendered setting, and merging equal copies across imports."""
+import sys
+import types
+
+import pytest
+
+
+class ID:
+    def __init__(self, name): self.name = name
+
+
+class Image(ID):
+    # Generated images have no source to hash, so run() leaves them alone
+    packed_file = None; source = 'GENERATED'
+
+
+class RNA:
+    # A struct whose RNA lists its attributes, typed the way the keying reads them
+    def __init__(self, **fields): self.__dict__.update(fields)
+
+    @property
+    def bl_rna(self):
+        def kind(v): return 'POINTER' if isinstance(v, (RNA, ID)) else 'COLLECTION' if isinstance(v, list) else 'FLOAT'
+        return types.SimpleNamespace(properties=[types.SimpleNamespace(identifier=k, type=kind(v)) for k, v in vars(self).items() if k != "inputs"])
+
+
+class Material(RNA, ID):
+    def __init__(self, name, nodes, **settings):
+        tree = types.SimpleNamespace(nodes=nodes, links=[])
+        RNA.__init__(self, name=name, use_nodes=True, diffuse_color=(0.8, 0.8, 0.8, 1.0), blend_method='OPAQUE', node_tree=tree, **settings)
+        self.remapped = None
+
+    def user_remap(self, other): self.remapped = other
+
+
+def socket(identifier, value): return types.SimpleNamespace(identifier=identifier, default_value=value, is_linked=False)
+
+
+def texture(interpolation='Linear', image="Road_D.dds"):
+    return RNA(name="Image Texture", bl_idname="ShaderNodeTexImage", type='TEX_IMAGE', image=Image(image), interpolation=interpolation,
+        location=(0.0, 0.0), inputs=[socket("Vector", (0.0, 0.0, 0.0))])
+
+
+def ramp(*positions):
+    elements = [RNA(position=p, color=(p, p, p, 1.0)) for p in positions]
+    return RNA(name="Color Ramp", bl_idname="ShaderNodeValToRGB", type='VALTORGB', color_ramp=RNA(interpolation='LINEAR', elements=elements), inputs=[])
+
+
+@pytest.fixture
+def dedup(addon, monkeypatch):
+    bpy = sys.modules["bpy"]; removed = []
+    monkeypatch.setattr(bpy.types, "ID", ID, raising=False)
+    monkeypatch.setattr(bpy.data, "batch_remove", lambda ids: removed.extend(ids), raising=False)
+    return addon.TM_Material_Dedup(), removed
+
+
+def test_equal_materials_share_a_key(dedup):
+    d, _ = dedup
+    a = Material("Road", [texture(), ramp(0.0, 1.0)]); b = Material("Road.001", [texture(), ramp(0.0, 1.0)])
+    b.node_tree.nodes[0].location = (300.0, -20.0) # Editor layout only
+    assert d.material_key(a) == d.material_key(b)
+
+
+@pytest.mark.parametrize("change", [
+    lambda m: setattr(m.node_tree.nodes[0], "interpolation", 'Closest'),
+    lambda m: setattr(m, "blend_method", 'BLEND'),
+    lambda m: setattr(m.node_tree.nodes[1].color_ramp.elements[1], "position", 0.5),
+    lambda m: setattr(m.node_tree.nodes[0], "image", Image("Road_N.dds")),
+])
+def test_node_and_material_settings_in_key(dedup, change):
+    d, _ = dedup
+    a = Material("Road", [texture(), ramp(0.0, 1.0)]); b = Material("Road.001", [texture(), ramp(0.0, 1.0)]); change(b)
+    assert d.material_key(a) != d.material_key(b)
+
+
+def test_run_merges_only_equal_copies(dedup):
+    d, removed = dedup
+    first = Material("Road", [texture()]); same = Material("Road.001", [texture()]); closest = Material("Road.002", [texture('Closest')])
+    assert d.run([first]) == 0 and d.run([same, closest]) == 1
+    assert same.remapped is first and closest.remapped is None and removed == [same] and d.merged == 1
@@ -0,0 +1,61 @@
+"""Retained overlay drawing: GPU batches are built when what is drawn changes, not on every redraw."""
+import sys
+
+import pytest
+
+standins = sys.modules["standins"]
+
+
+@pytest.fixture
+def batches(addon, monkeypatch):
+    made = []
+    def batch_for_shader(shader, kind, attrs, indices=None): made.append(kind); return standins._Anything()
+    monkeypatch.setattr(addon, "batch_for_shader", batch_for_shader)
+    return made
+
+
+@pytest.fixture
+def frame(addon, block_tree, batches, monkeypatch):
+    mgr = addon.TM_Inventory_Manager(); mgr.atlas_cell = 0
+    mgr.apply_cache(block_tree, block_tree, addon.TM_Search_Index(block_tree), addon.TM_Search_Index(block_tree)); mgr.loading_status = "READY"
+    monkeypatch.setattr(addon, "tm_manager", mgr); monkeypatch.setattr(addon, "overlay_list", addon.TM_Draw_List())
+    builds = []; build = addon.build_overlay
+    monkeypatch.setattr(addon, "build_overlay", lambda dl, prefs, lay: (builds.append(lay), build(dl, prefs, lay)))
+    ctx = standins.context()
+    return mgr, lambda: addon.draw_callback_px(ctx), builds
+
+
+def test_redraw_replays(addon, frame, batches):
+    mgr, draw, builds = frame
+    draw(); made = len(batches)
+    assert builds and made and addon.overlay_list.quads
+    # Redraws for mouse moves and a dragged overlay reuse the recorded batches
+    draw(); mgr.ui_pos_x += 40; mgr.ui_pos_y -= 25; draw()
+    assert len(builds) == 1 and len(batches) == made
+
+
+def test_rebuilt_on_change(addon, frame, batches):
+    mgr, draw, builds = frame
+    draw(); mgr.search_query = "road"; mgr.update_live_search(); draw()
+    assert len(builds) == 2 and addon.overlay_list.key[4] == "road"
+    mgr.is_hovering_help = True; draw(); draw()
+    assert len(builds) == 3
+
+
+def test_atlas_icons_share_page_batch(addon, frame, batches, monkeypatch):
+    mgr = frame[0]; rects = {"A": (0, 0, 0, .5, .5), "B": (0, .5, 0, 1, .5), "C": (1, 0, 0, .5, .5)}
+    monkeypatch.setattr(mgr.icons, "atlas_rect", rects.get)
+    dl = addon.TM_Draw_List(); dl.reset("k")
+    for k, name in enumerate("ABCD"): dl.icon(name, 10 * k, 0, 8, placeholder=True)
+    dl.finish()
+    # One batch per atlas page; only the icon outside the atlas keeps its own
+    assert sorted(dl.pages) == [0, 1] and [ic[0] for ic in dl.icons] == ["D"]
+    assert dl.pages[0][1] == [(0, 0, 8), (10, 0, 8)] and sorted(batches) == ["TRIS", "TRIS", "TRI_FAN"]
+
+
+def test_ghost_geometry_per_bounds(addon, batches):
+    geo = addon.TM_Ghost_Geometry(); Vector = standins.Vector
+    geo.ensure(Vector((0, 0, 0)), Vector((32, 32, 8)), None); geo.ensure(Vector((0, 0, 0)), Vector((32, 32, 8)), None)
+    assert batches == ["TRIS", "LINES", "LINES"]
+    geo.ensure(Vector((0, 0, 0)), Vector((32, 64, 8)), None)
+    assert len(batches) == 6 and geo.bounds == ((0, 0, 0), (32, 64, 8))
@@ -0,0 +1,44 @@
+"""TM_Footprints: worker results land under the settings their job ran with, and are saved when it ends."""
+import os
+import json
+
+import pytest
+
+HIGHEST = ("highest", True, False, True)
+LOWEST = ("lowest", True, False, True)
+
+
+@pytest.fixture
+def catalogued(addon, tmp_path, monkeypatch):
+    root = tmp_path / "Blocks"; root.mkdir(); (root / "Road.Gbx").write_bytes(b"GBX")
+    cat = addon.TM_GBX_Catalog(str(tmp_path / "catalog.json")); cat.refresh([str(root)])
+    monkeypatch.setattr(addon, "tm_catalog", cat); monkeypatch.setattr(addon, "FOOTPRINT_FILE", str(tmp_path / "footprints_{}.json"))
+    return str(root), str(root / "Road.Gbx")
+
+
+def test_job_settings_not_current(addon, catalogued):
+    root, f = catalogued; fp = addon.TM_Footprints(); fp.use(LOWEST)
+    fp.put_job(list(HIGHEST), {f: [32.0, 32.0, 8.0]})
+    # Nothing under the settings in use; the job's own file has it on disk
+    assert fp.get(root, "Road") is None and not fp.dirty
+    with open(fp.file(HIGHEST), encoding="utf-8") as fh: assert json.load(fh)[os.path.normpath(root)]["Road"][:3] == [32.0, 32.0, 8.0]
+    fp.use(HIGHEST); assert list(fp.get(root, "Road")[1]) == [16.0, 16.0, 8.0]
+
+
+def test_job_settings_current_saved(addon, catalogued):
+    root, f = catalogued; fp = addon.TM_Footprints(); fp.use(HIGHEST)
+    fp.put_job(list(HIGHEST), {f: [64.0, 32.0, 16.0]})
+    assert fp.get(root, "Road") and not fp.dirty and os.path.exists(fp.file(HIGHEST))
+
+
+def test_warmer_uses_job_settings(addon, catalogued, monkeypatch):
+    root, f = catalogued; fp = addon.TM_Footprints(); fp.use(HIGHEST); monkeypatch.setattr(addon, "tm_footprints", fp)
+    class Done:
+        def poll(self): return 0
+    warm = addon.TM_Library_Warmer("footprints"); jobs = []
+    monkeypatch.setattr(warm, "launch", lambda job: jobs.append(job) or Done())
+    warm.start([f], LOWEST, 1, None, use_library=False)
+    fp.use(HIGHEST) # Settings changed while the job ran
+    with open(jobs[0] + ".done", "w", encoding="utf-8") as fh: json.dump({"done": 1, "failed": 0, "footprints": {f: [32.0, 32.0, 8.0]}}, fh)
+    assert not warm.poll() and fp.get(root, "Road") is None
+    fp.use(LOWEST); assert fp.get(root, "Road")
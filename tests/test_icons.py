@@ -0,0 +1,95 @@
+"""TM_Icon_Cache budget and eviction, and TM_Icon_Atlas packing, reopening and failed builds."""
+import types
+import os
+
+import pytest
+
+
+def solid(cell, value):
+    return bytes([value, 255 - value, 7, 255]) * (cell * cell)
+
+
+@pytest.fixture
+def icons(addon, tmp_path):
+    for k in range(20): (tmp_path / f"Icon{k:02d}.png").write_bytes(b"png")
+    cache = addon.TM_Icon_Cache(budget=8, loads_per_frame=4); cache.scan(str(tmp_path)); cache.begin_frame()
+    return cache
+
+
+def test_loads_per_frame(icons):
+    got = [icons.get(f"Icon{k:02d}") for k in range(6)]
+    assert sum(t is not None for t in got) == 4 and icons.pending
+    icons.begin_frame(); assert icons.get("Icon05") is not None and icons.stats()["misses"] == 5
+
+
+def test_lru_eviction(icons):
+    for k in range(12):
+        if k % 4 == 0: icons.begin_frame()
+        icons.get(f"Icon{k:02d}")
+    st = icons.stats()
+    assert st["cached"] == 8 and st["used"] == 8 and st["evictions"] == 4
+    assert list(icons.textures) == [f"Icon{k:02d}" for k in range(4, 12)]
+    icons.begin_frame(); icons.get("Icon04") # A hit moves the icon to the back
+    icons.set_budget(2); assert list(icons.textures) == ["Icon11", "Icon04"]
+
+
+def test_frame_keeps_drawn_icons(icons):
+    # Everything drawn in one frame stays, even past the budget, so a full screen of cards cannot thrash
+    icons.loads_per_frame = 100
+    for k in range(12): icons.get(f"Icon{k:02d}")
+    assert icons.stats()["cached"] == 12
+    icons.begin_frame(); icons.get("Icon00"); icons.set_budget(8)
+    assert icons.stats()["cached"] == 8 and "Icon00" in icons.textures
+
+
+def test_missing_and_unknown(icons):
+    assert icons.get("NotAnIcon") is None and "NotAnIcon" not in icons and "Icon00" in icons
+
+
+def test_atlas_round_trip(addon, tmp_path):
+    src = tmp_path / "icons"; src.mkdir(); names = [f"Icon{k:03d}" for k in range(70)]
+    for k, n in enumerate(names): (src / f"{n}.png").write_bytes(bytes([k]))
+    (src / "Broken.png").write_bytes(b"")
+    def load(path):
+        data = open(path, "rb").read()
+        if not data: raise ValueError("broken")
+        return solid(16, data[0])
+    path = str(tmp_path / "icons.atlas")
+    atlas = addon.TM_Icon_Atlas.build(str(src), path, cell=16, page_size=128, load=load)
+    try:
+        # 64 slots per page: 70 icons on two pages, the broken one left to the per-file loader
+        assert atlas.page_count == 2 and atlas.per_page == 64 and sorted(atlas.rects) == names
+        p, u0, v0, u1, v1 = atlas.rects["Icon065"]; assert p == 1 and (u1 - u0, v1 - v0) == (0.125, 0.125)
+        x, y = round(u0 * 128), round(v0 * 128)
+        with atlas.page_view(p) as page: assert bytes(page[(y * 128 + x) * 4:(y * 128 + x) * 4 + 4]) == solid(16, 65)[:4]
+        assert atlas.signature == addon.TM_Icon_Atlas.listing_signature(str(src), 16)
+    finally: atlas.close()
+    again = addon.TM_Icon_Atlas.open(path)
+    try: assert again.rects == atlas.rects
+    finally: again.close()
+
+
+def test_pages_share_the_budget(addon, icons, monkeypatch):
+    atlas = addon.TM_Icon_Atlas(); atlas.cell, atlas.page_size, atlas.page_count = 16, 32, 3 # 4 icons per page
+    monkeypatch.setattr(atlas, "upload", lambda p: f"page{p}", raising=False)
+    icons.set_atlas(atlas)
+    for k in range(3): icons.get(f"Icon{k:02d}")
+    icons.begin_frame(); assert icons.page(0) == "page0" and icons.stats()["used"] == 7
+    icons.begin_frame(); icons.page(1)
+    # 3 icons + 2 pages = 11 > 8: the least recently used icons go first
+    st = icons.stats(); assert st["pages"] == 2 and st["used"] == 8 and st["cached"] == 0
+    icons.set_atlas(None); assert icons.stats()["used"] == 0
+
+
+def test_failed_build_not_respawned(addon, tmp_path, monkeypatch):
+    icons = tmp_path / "icons"; icons.mkdir(); (icons / "Road.png").write_bytes(b"png"); path = str(tmp_path / "icons.atlas"); runs = []
+    def run(cmd, **kw):
+        runs.append(cmd); return types.SimpleNamespace(returncode=1, stderr=b"Traceback ...\nModuleNotFoundError: no module named 'bl_ext'")
+    monkeypatch.setattr(addon.subprocess, "run", run)
+    with pytest.raises(RuntimeError, match="ModuleNotFoundError"): addon.TM_Icon_Atlas.ensure(str(icons), path)
+    # The worker loads the addon from its file, not by module name
+    assert addon.__file__ in runs[0][-1] and "import_module" not in runs[0][-1]
+    assert addon.TM_Icon_Atlas.ensure(str(icons), path) is None and len(runs) == 1
+    (icons / "Curve.png").write_bytes(b"png") # New icons: worth another try
+    with pytest.raises(RuntimeError): addon.TM_Icon_Atlas.ensure(str(icons), path)
+    assert len(runs) == 2
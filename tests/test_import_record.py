@@ -0,0 +1,78 @@
+"""TM_Import_Record: what one importer run created, and freeing it in a single batch."""
+import sys
+import types
+
+import pytest
+
+
+class ID(dict):
+    # Just what the record reads: a session uid, a user count, custom properties and a name to test liveness
+    uid = 0
+
+    def __init__(self, name, users=1, **attrs):
+        super().__init__(); ID.uid += 1; self.session_uid = ID.uid; self.name = name; self.users = users; self.__dict__.update(attrs)
+
+    def __hash__(self): return id(self)
+    def __eq__(self, other): return self is other
+    def __repr__(self): return self.name
+
+
+def obj(name, mesh=None, **attrs): return ID(name, type='EMPTY' if mesh is None else 'MESH', data=mesh, material_slots=[], **attrs)
+def mesh(name, *materials, users=1): return ID(name, users=users, materials=list(materials))
+def material(name, *images, users=1): return ID(name, users=users, node_tree=types.SimpleNamespace(nodes=[types.SimpleNamespace(type='TEX_IMAGE', image=i) for i in images]))
+
+
+class Collection(ID):
+    def __init__(self, name, objects=(), children=()):
+        super().__init__(name, objects=list(objects), children=list(children))
+
+    @property
+    def children_recursive(self): return [d for c in self.children for d in (c, *c.children_recursive)]
+
+    @property
+    def all_objects(self): return [*self.objects, *(o for c in self.children for o in c.all_objects)]
+
+
+@pytest.fixture
+def removed(monkeypatch):
+    removed = []; bpy = sys.modules["bpy"]
+    monkeypatch.setattr(bpy.data, "batch_remove", lambda ids: removed.append(set(ids)), raising=False)
+    # The record never reads bpy.data: anything that does fails here
+    for kind in ("objects", "collections", "meshes", "materials", "node_groups", "images"): monkeypatch.setattr(bpy.data, kind, None, raising=False)
+    return removed
+
+
+def scene(root):
+    return types.SimpleNamespace(collection=root, scene=types.SimpleNamespace(collection=root))
+
+
+def test_only_new_ids(addon, removed):
+    placed = Collection("TM_Road", [obj("Road_Placed")]); ctx = scene(Collection("Scene", [obj("Camera")], [placed]))
+    record = addon.TM_Import_Record(ctx)
+    shared = material("Shared", users=2); road = mesh("RoadMesh", shared); new = obj("Road", road)
+    ctx.collection.children.append(Collection("Import", children=[Collection("LOD0", [new])]))
+    record.collect(ctx)
+    assert [c.name for c in record.collections] == ["Import", "LOD0"] and record.objects == [new]
+    # A material something else also uses is not the run's
+    assert record.data["meshes"] == [road] and record.data["materials"] == []
+
+
+def test_free_single_batch(addon, removed):
+    ctx = scene(Collection("Scene")); record = addon.TM_Import_Record(ctx)
+    img = ID("Tex"); mat = material("Mat", img); low = mesh("RoadMesh_low"); road = mesh("RoadMesh", mat); road["tm_low"] = low
+    o = obj("Road", road); coll = Collection("Import", [o]); ctx.collection.children.append(coll)
+    record.collect(ctx)
+    assert record.data == {"meshes": [road, low], "materials": [mat], "node_groups": [], "images": [img]}
+    record.free()
+    # The low LOD goes with the mesh pointing to it, the image with its material
+    assert removed == [{o, coll, road, low, mat, img}] and record.objects == []
+
+
+def test_kept_data_stays(addon, removed):
+    ctx = scene(Collection("Scene")); record = addon.TM_Import_Record(ctx)
+    mat = material("Mat"); road = mesh("RoadMesh", mat); low = mesh("RoadMesh_low"); road["tm_low"] = low; o = obj("Road", road)
+    ctx.collection.objects.append(o); record.collect(ctx)
+    # Since the import the preview cache gave the mesh a fake user (or a placed block shares it)
+    road.users += 1
+    record.free()
+    assert removed == [{o}]
@@ -0,0 +1,43 @@
+"""TM_Inventory_Index against the nested JSON tree it replaces."""
+import os
+
+from conftest import SOURCE
+
+
+def walk(items, depth=0):
+    # (name, is_folder, child count, depth) in the depth-first order of the old recursive walk
+    for i in items:
+        kids = i.get("Childs") or []
+        yield i.get("Name", ""), bool(i.get("IsFolder", False)), len(kids), depth
+        yield from walk(kids, depth + 1)
+
+
+def test_nodes_match_json(block_tree, source_roots):
+    t = block_tree; got = []
+    def visit(row, depth):
+        for i in row:
+            got.append((t.names[i], t.is_folder(i), t.child_count[i], depth)); visit(t.children(i), depth + 1)
+    visit(t.roots(), 0)
+    assert got == list(walk(source_roots))
+
+
+def test_leaves_in_catalog_order(block_tree, source_roots):
+    expected = [name for name, folder, _, _ in walk(source_roots) if not folder]
+    assert [block_tree.names[i] for i in block_tree.leaves] == expected
+
+
+def test_parents_and_icons(block_tree):
+    t = block_tree
+    for i in range(1, len(t)):
+        assert i in t.children(t.parent[i])
+        if not t.is_folder(i): assert t.icon[i] == i
+        elif t.child_count[i]: assert t.icon[i] == t.icon[t.first_child[i]]
+
+
+def test_compiled_index_round_trip(addon, block_tree, tmp_path):
+    idx = str(tmp_path / "blocks.idx")
+    first = addon.TM_Inventory_Index.load(SOURCE, idx); assert os.path.exists(idx)
+    again = addon.TM_Inventory_Index.load(SOURCE, idx)
+    for t in (first, again):
+        assert t.names == block_tree.names and t.leaves == block_tree.leaves
+        for attr in ("parent", "first_child", "child_count", "icon", "flags"): assert getattr(t, attr) == getattr(block_tree, attr)
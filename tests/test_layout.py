@@ -0,0 +1,46 @@
+"""TM_Map_Layout files: grid and fine quantisation survive a write/read round trip."""
+import math
+
+import pytest
+
+
+def turns(values):
+    # Rotations come back wrapped to one turn
+    return [math.remainder(v, 2 * math.pi) for v in values]
+
+
+def layout(addon, rows):
+    lay = addon.TM_Map_Layout()
+    for name, loc, rot in rows: lay.add(name, loc, rot)
+    return lay
+
+
+def round_trip(addon, lay, tmp_path):
+    path = str(tmp_path / "map.tmly"); lay.write(path)
+    return addon.TM_Map_Layout.read(path)
+
+
+def test_grid_round_trip(addon, tmp_path):
+    rows = [(f"Block{i % 7}", (16.0 * i, -32.0 * (i % 5), 8.0 * (i % 3)), (0.0, 0.0, math.pi / 8 * (i % 16))) for i in range(500)]
+    back = round_trip(addon, layout(addon, rows), tmp_path)
+    assert len(back) == 500 and back.names == [f"Block{i}" for i in range(7)]
+    assert list(back.block) == [i % 7 for i in range(500)]
+    assert list(back.pos) == [v for _, loc, _ in rows for v in loc]
+    assert turns(back.rot) == pytest.approx(turns(v for _, _, rot in rows for v in rot), abs=1e-9)
+
+
+def test_fine_round_trip(addon, tmp_path):
+    rows = [("Road", (10.3 + i, 0.7, 3.25 * i), (0.1 * i, 0.0, -1.234)) for i in range(50)]
+    back = round_trip(addon, layout(addon, rows), tmp_path)
+    assert back.pos.tolist() == pytest.approx([v for _, loc, _ in rows for v in loc], abs=1 / 2048)
+    assert turns(back.rot) == pytest.approx(turns(v for _, _, rot in rows for v in rot), abs=2 * math.pi / 65536)
+
+
+def test_groups(addon, tmp_path):
+    back = round_trip(addon, layout(addon, [("A", (0, 0, 0), (0, 0, 0)), ("B", (16, 0, 0), (0, 0, 0)), ("A", (32, 0, 0), (0, 0, 0))]), tmp_path)
+    assert back.groups() == {"A": [0, 2], "B": [1]}
+
+
+def test_rejects_other_files(addon, tmp_path):
+    path = tmp_path / "map.tmly"; path.write_bytes(b"TMIX" + bytes(16))
+    with pytest.raises(ValueError): addon.TM_Map_Layout.read(str(path))
@@ -0,0 +1,51 @@
+"""TM_Asset_Library: source hashes kept in the library manifest, and freshness checks that never hash."""
+import os
+import json
+
+import pytest
+
+SETTINGS = ("highest", True, False, True)
+
+
+@pytest.fixture
+def gbx(tmp_path):
+    path = tmp_path / "Road.Gbx"; path.write_bytes(b"GBX" * 1000)
+    return str(path)
+
+
+@pytest.fixture
+def hashed(addon, monkeypatch):
+    # Every source file the library reads to hash it
+    reads = []; real = addon.hashlib.sha1
+    monkeypatch.setattr(addon.hashlib, "sha1", lambda data=b"": reads.append(len(data)) or real(data))
+    return reads
+
+
+def test_has_never_hashes(addon, gbx, tmp_path, hashed):
+    lib = addon.TM_Asset_Library(str(tmp_path / "library"))
+    assert not lib.has(gbx, SETTINGS) and not hashed
+    asset = lib.asset_path(gbx, SETTINGS); os.makedirs(lib.directory); open(asset, "wb").close()
+    hashed.clear(); assert lib.has(gbx, SETTINGS) and not [n for n in hashed if n == 3000]
+    # Rewritten source: stale until a worker hashes it again
+    with open(gbx, "ab") as f: f.write(b"!")
+    assert not lib.has(gbx, SETTINGS)
+
+
+def test_manifest_survives_sessions(addon, gbx, tmp_path, hashed):
+    lib = addon.TM_Asset_Library(str(tmp_path / "library")); first = lib.asset_path(gbx, SETTINGS); lib.save_manifest()
+    hashed.clear(); again = addon.TM_Asset_Library(lib.directory)
+    assert again.asset_path(gbx, SETTINGS) == first and 3000 not in hashed and not again.dirty
+
+
+def test_worker_hashes_reach_manifest(addon, gbx, tmp_path, monkeypatch):
+    lib = addon.TM_Asset_Library(str(tmp_path / "library")); warm = addon.TM_Library_Warmer("manifest")
+    class Done:
+        def poll(self): return 0
+    jobs = []; monkeypatch.setattr(warm, "launch", lambda job: jobs.append(job) or Done())
+    warm.start([gbx], SETTINGS, 1, lib)
+    st = os.stat(gbx)
+    with open(jobs[0] + ".done", "w", encoding="utf-8") as f:
+        json.dump({"done": 1, "failed": 0, "footprints": {}, "sources": {gbx: [st.st_size, st.st_mtime_ns, "ab" * 20]}}, f)
+    assert not warm.poll() and lib.sources[gbx][2] == "ab" * 20 and lib.dirty
+    lib.save_manifest()
+    with open(os.path.join(lib.directory, "manifest.json"), encoding="utf-8") as f: assert gbx in json.load(f)
@@ -0,0 +1,67 @@
+"""TM_LOD_Manager: the level chosen from screen size, and swapping linked meshes without losing the placed one."""
+import sys
+import types
+
+import pytest
+
+from standins import Vector
+
+
+class ID(dict):
+    # Custom properties as a dict, plus whatever attributes the manager reads
+    def __init__(self, name, **attrs):
+        super().__init__(); self.name = name; self.__dict__.update(attrs)
+
+    def __hash__(self): return id(self)
+    def __eq__(self, other): return self is other
+
+
+class Mesh(ID): pass
+
+
+def placement(high, at=(0, 0, 0), size=32.0):
+    o = ID("Road_Placed", instance_type='NONE', data=high, display_type='TEXTURED', scale=(1.0, 1.0, 1.0), matrix_world=types.SimpleNamespace(translation=Vector(at)))
+    o["tm_block"] = "Road"; o["tm_size"] = size
+    return o
+
+
+@pytest.fixture
+def bpy_ids(monkeypatch):
+    bpy = sys.modules["bpy"]; meshes = {}
+    monkeypatch.setattr(bpy.types, "Mesh", Mesh, raising=False); monkeypatch.setattr(bpy.data, "meshes", meshes, raising=False)
+    return meshes
+
+
+@pytest.fixture
+def lod(addon):
+    return addon.TM_LOD_Manager()
+
+
+def test_low_keeps_placed_mesh(lod, bpy_ids):
+    high = Mesh("Road"); low = Mesh("Road_low"); high["tm_low"] = low; o = placement(high)
+    lod.apply(o, lod.LOW)
+    assert o.data is low and o["tm_lod"] == lod.LOW
+    # The placed mesh is held by reference, not looked up by name, and the low one gets no fake user
+    assert o["tm_high"] is high and not getattr(low, "use_fake_user", False)
+    lod.apply(o, lod.BOX); assert o.data is high and o.display_type == 'BOUNDS'
+    lod.apply(o, lod.HIGH); assert o.data is high and o.display_type == 'TEXTURED' and o["tm_lod"] == lod.HIGH
+
+
+def test_high_by_name_from_older_files(lod, bpy_ids):
+    high = Mesh("Road"); high["tm_low"] = Mesh("Road_low"); bpy_ids["Road"] = high
+    o = placement(high); o["tm_high"] = "Road"; o["tm_lod"] = lod.LOW; o.data = high["tm_low"]
+    lod.apply(o, lod.HIGH)
+    assert o.data is high and o["tm_high"] is high
+
+
+def test_levels_from_screen_size(addon, lod, monkeypatch):
+    # 32 m blocks seen from the origin with 1000 px per metre at 1 m: 320 px at 100 m, 32 px at 1 km, 3.2 px at 10 km
+    objs = [placement(Mesh("Road"), (d, 0, 0)) for d in (100, 1000, 10000)]; got = {}
+    monkeypatch.setattr(lod, "view", lambda: (Vector((0, 0, 0)), 1000.0, True))
+    monkeypatch.setattr(lod, "placements", lambda scene: objs)
+    monkeypatch.setattr(lod, "apply", lambda o, level: got.__setitem__(o.matrix_world.translation.x, level))
+    monkeypatch.setattr(sys.modules["bpy"], "context", types.SimpleNamespace(scene=types.SimpleNamespace(objects=objs)))
+    lod.tick(types.SimpleNamespace(lod_low_px=120.0, lod_box_px=24.0))
+    assert got == {100: lod.HIGH, 1000: lod.LOW, 10000: lod.BOX} and not lod.active
+    # Same view, same objects: no new pass
+    got.clear(); lod.tick(types.SimpleNamespace(lod_low_px=120.0, lod_box_px=24.0)); assert not got
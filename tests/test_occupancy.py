@@ -0,0 +1,80 @@
+"""TM_Occupancy cells, fill_positions, and viewport clicks placing blocks while the search box has focus."""
+import sys
+import math
+import types
+
+import pytest
+
+from standins import Vector, context
+
+
+@pytest.fixture
+def occupancy(addon):
+    objects = sys.modules["bpy"].data.objects; objects.clear()
+    yield addon.TM_Occupancy(), objects
+    objects.clear()
+
+
+def test_box_cells_tolerance(addon):
+    cells = addon.TM_Occupancy.box_cells
+    assert cells((0, 0, 0), (32, 32, 8)) == [(0, 0, 0)]
+    # A 31.8 m mesh rounded up to one cell by the ghost covers the same cell
+    assert cells((0.1, 0.1, 0.0), (31.9, 31.9, 7.98)) == [(0, 0, 0)]
+    assert sorted(cells((-32, 0, 0), (32, 64, 16))) == [(i, j, k) for i in (-1, 0) for j in (0, 1) for k in (0, 1)]
+
+
+def test_local_box_rotated(addon):
+    lo, hi = addon.TM_Occupancy.local_box(Vector((-16, -32, 0)), Vector((16, 32, 8)), (0.0, 0.0, math.pi / 2))
+    assert [round(v, 6) for v in (*lo, *hi)] == [-32, -16, 0, 32, 16, 8]
+
+
+def test_add_remove_occupied(occupancy):
+    occ, objects = occupancy
+    objects["A"] = objects["B"] = None
+    occ.add("A", [(0, 0, 0), (1, 0, 0)]); occ.add("B", [(1, 0, 0)])
+    assert occ.occupied([(1, 0, 0)]) and not occ.occupied([(2, 0, 0)])
+    occ.add("A", [(5, 0, 0)]) # Moving a block drops its old cells
+    assert occ.cells == {(1, 0, 0): {"B"}, (5, 0, 0): {"A"}}
+    occ.remove("B"); assert not occ.occupied([(1, 0, 0)]) and (1, 0, 0) not in occ.cells
+
+
+def test_deleted_objects_dropped(occupancy):
+    occ, objects = occupancy
+    occ.add("Gone", [(0, 0, 0)])
+    assert not occ.occupied([(0, 0, 0)]) and "Gone" not in occ.owners and not occ.cells
+
+
+def test_fill_line_and_rectangle(addon):
+    assert addon.fill_axes((0, 0, 8), (96, 0, 8), (32, 32)) == [[0, 32, 64, 96], [0]]
+    # Dragged towards -x/-y: the axes run from the start
+    assert addon.fill_axes((64, 64, 0), (0, 0, 0), (32, 32)) == [[64, 32, 0], [64, 32, 0]]
+
+
+def test_fill_limit_keeps_rectangle(addon):
+    # 40 x 3 blocks capped at 30: the short side stays whole, the long side shrinks towards the start
+    xs, ys = addon.fill_axes((0, 0, 0), (39 * 32, 2 * 32, 0), (32, 32), limit=30)
+    assert ys == [0, 32, 64] and xs == [32 * i for i in range(10)]
+    # 40 x 40 capped at 30: a 5 x 6 block from the start
+    xs, ys = addon.fill_axes((0, 0, 0), (39 * 32, 39 * 32, 0), (32, 32), limit=30)
+    assert (len(xs), len(ys)) == (5, 6)
+
+
+def test_fill_positions_grid(addon):
+    pytest.importorskip("numpy")
+    rect = addon.fill_positions((64, 64, 8), (0, 0, 8), (32, 32))
+    assert len(rect) == 9 and rect[0].tolist() == [64, 64, 8] and rect[-1].tolist() == [0, 0, 8]
+
+
+def event(type, value, x=1500, y=100):
+    return types.SimpleNamespace(type=type, value=value, mouse_region_x=x, mouse_region_y=y, ctrl=False, shift=False, alt=False, unicode="")
+
+
+def test_viewport_click_while_searching_places(addon, monkeypatch):
+    mgr = addon.tm_manager; op = addon.VIEW3D_OT_tm_inventory(); placed = []
+    monkeypatch.setattr(op, "commit_block", lambda ctx: placed.append(mgr.ghost_pos.copy()), raising=False)
+    monkeypatch.setattr(mgr, "is_ghosting", True); monkeypatch.setattr(mgr, "is_searching", True)
+    ctx = context()
+    assert op.handle_event(ctx, event('LEFTMOUSE', 'PRESS')) == {'RUNNING_MODAL'}
+    assert not mgr.is_searching
+    assert op.handle_event(ctx, event('LEFTMOUSE', 'RELEASE')) == {'RUNNING_MODAL'}
+    assert len(placed) == 1 and op.fill_start is None
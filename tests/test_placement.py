@@ -0,0 +1,115 @@
+"""Instanced and mesh placement, per-type asset collections, and realizing instances into real objects."""
+import sys
+import types
+
+import pytest
+
+from standins import Matrix
+
+
+class Mesh:
+    def __init__(self, name): self.name = name
+    def copy(self): return Mesh(self.name + ".001")
+
+
+class Objects(list):
+    def __init__(self, owner): super().__init__(); self.owner = owner
+    def link(self, o): self.append(o); o.users_collection.append(self.owner)
+
+
+class Collection(dict):
+    def __init__(self, name, children=()): super().__init__(); self.name = name; self.objects = Objects(self); self.children = list(children)
+    def __hash__(self): return id(self)
+    def __eq__(self, other): return self is other
+
+    @property
+    def all_objects(self): return [*self.objects, *(o for c in self.children for o in c.all_objects)]
+
+
+class Obj(dict):
+    def __init__(self, name, data=None, matrix=None, selected=False):
+        super().__init__(); self.name = name; self.data = data; self.type = 'MESH' if data else 'EMPTY'; self.selected = selected
+        self.instance_type = 'NONE'; self.instance_collection = None; self.users_collection = []; self.dimensions = (32.0, 16.0, 8.0)
+        self.location = self.rotation_euler = (0, 0, 0); self.matrix_world = matrix or Matrix()
+
+    def __hash__(self): return id(self)
+    def __eq__(self, other): return self is other
+    def copy(self): o = Obj(self.name + ".001", self.data, self.matrix_world); o.update(self); return o
+    def select_get(self): return self.selected
+
+
+class Collections(list):
+    def new(self, name): c = Collection(name); self.append(c); return c
+
+
+class Data:
+    def __init__(self): self.collections = Collections(); self.removed = []
+
+    def new_object(self, name, data): return Obj(name, data)
+
+    def remove(self, o, do_unlink=False):
+        for c in o.users_collection: c.objects.remove(o)
+        self.removed.append(o)
+
+
+@pytest.fixture
+def data(addon, monkeypatch):
+    bpy = sys.modules["bpy"]; d = Data()
+    monkeypatch.setattr(bpy.data, "collections", d.collections, raising=False)
+    monkeypatch.setattr(bpy.data, "objects", types.SimpleNamespace(new=d.new_object, remove=d.remove))
+    monkeypatch.setattr(addon, "_assets", {}); monkeypatch.setattr(addon, "tm_occupancy", addon.TM_Occupancy())
+    return d
+
+
+def test_instances_share_asset(addon, data):
+    src = Obj("Road_Src", Mesh("RoadMesh")); root = Collection("TM_Road")
+    a = addon.place_block(src, "Road", root, (0, 0, 0), (0, 0, 0), 'INSTANCE'); b = addon.place_block(src, "Road", root, (32, 0, 0), (0, 0, 0), 'INSTANCE')
+    asset = a.instance_collection
+    assert a.instance_type == 'COLLECTION' and b.instance_collection is asset and data.collections == [asset]
+    assert asset.name == "TMA_Road" and [o.data.name for o in asset.objects] == ["RoadMesh"] and root.objects == [a, b]
+    assert a["tm_block"] == "Road" and a["tm_size"] == 32.0 and b.location == (32, 0, 0)
+    # Another mesh of the same block gets its own asset
+    other = addon.place_block(Obj("Road_Src", Mesh("RoadMesh.002")), "Road", root, (0, 0, 0), (0, 0, 0), 'INSTANCE')
+    assert other.instance_collection is not asset and len(data.collections) == 2
+
+
+def test_asset_found_again_or_rebuilt(addon, data):
+    src = Obj("Road_Src", Mesh("RoadMesh")); asset = addon.block_asset(src, "Road")
+    # A reopened session finds the asset in the file instead of making a second one
+    addon._assets.clear(); assert addon.block_asset(src, "Road") is asset
+    # An asset whose object was deleted is replaced
+    asset.objects.clear(); addon._assets.clear()
+    fresh = addon.block_asset(src, "Road")
+    assert fresh is not asset and fresh.objects and len(data.collections) == 2
+
+
+def test_mesh_mode_copies_source(addon, data):
+    src = Obj("Road_Src", Mesh("RoadMesh")); root = Collection("TM_Road")
+    o = addon.place_block(src, "Road", root, (0, 32, 0), (0, 0, 1.0), 'MESH')
+    assert o.data is src.data and o.instance_collection is None and o.name == "Road_Placed" and not data.collections
+    assert o.rotation_euler == (0, 0, 1.0) and o["tm_block"] == "Road" and root.objects == [o]
+
+
+def realize(addon, scene):
+    op = addon.VIEW3D_OT_tm_inventory_realize(); op.single_user = True; op.reported = []
+    op.report = lambda kind, msg: op.reported.append((kind, msg))
+    return op, op.execute(types.SimpleNamespace(scene=scene))
+
+
+def test_realize_selected(addon, data):
+    src = Obj("Road_Src", Mesh("RoadMesh"), Matrix.Translation((0, 0, 4))); root = Collection("TM_Road")
+    a = addon.place_block(src, "Road", root, (0, 0, 0), (0, 0, 0), 'INSTANCE'); b = addon.place_block(src, "Road", root, (32, 0, 0), (0, 0, 0), 'INSTANCE')
+    a.name, b.name = "Road_Placed", "Road_Placed.001"; b.selected = True; b.matrix_world = Matrix.Translation((32, 0, 0))
+    addon.tm_occupancy.add(b.name, [(1, 0, 0)])
+    op, result = realize(addon, types.SimpleNamespace(collection=Collection("Scene", [root])))
+    assert result == {'FINISHED'} and data.removed == [b]
+    (real,) = [o for o in root.objects if o is not a]
+    # The realized block keeps the placement's name, position and cells, with its own copy of the mesh
+    assert real.name == "Road_Placed.001" and real.data.name == "RoadMesh.001" and [r[3] for r in real.matrix_world.rows[:3]] == [32, 0, 4]
+    assert addon.tm_occupancy.owners == {"Road_Placed.001": [(1, 0, 0)]} and "1 placements into 1 objects" in op.reported[0][1]
+
+
+def test_realize_nothing(addon, data):
+    root = Collection("TM_Road"); root.objects.link(Obj("Road_Placed", Mesh("RoadMesh")))
+    op, result = realize(addon, types.SimpleNamespace(collection=Collection("Scene", [root, Collection("Other")])))
+    assert result == {'CANCELLED'} and op.reported[0][0] == {'WARNING'} and not data.removed
@@ -0,0 +1,51 @@
+"""Background conversions: separate job folders per warmer, and prefetch batches that wait for idle navigation."""
+import os
+import json
+import types
+
+import pytest
+
+
+class Proc:
+    def poll(self): return None
+    def terminate(self): pass
+
+
+@pytest.fixture
+def launched(addon, monkeypatch):
+    jobs = []
+    monkeypatch.setattr(addon.TM_Library_Warmer, "launch", lambda self, job: jobs.append(job) or Proc())
+    return jobs
+
+
+def test_warmers_keep_their_own_jobs(addon, launched, tmp_path):
+    lib = addon.TM_Asset_Library(str(tmp_path / "library")); settings = ("highest", True, False, True)
+    warm, pre = addon.TM_Library_Warmer("warm"), addon.TM_Library_Warmer("prefetch")
+    warm.start([f"/w/{k}.Gbx" for k in range(50)], settings, 4, lib)
+    open(launched[0] + ".done", "w").close() # The first warm-up job reported back
+    pre.start(["/p/0.Gbx"], settings, 1, lib)
+    assert os.path.dirname(launched[0]) != os.path.dirname(launched[-1]) and os.path.exists(launched[0] + ".done")
+    with open(launched[0], encoding="utf-8") as f: assert json.load(f)["files"][0] == "/w/0.Gbx"
+    with open(launched[-1], encoding="utf-8") as f: assert json.load(f)["files"] == ["/p/0.Gbx"]
+
+
+def test_conversion_waits_for_idle(addon, launched, monkeypatch):
+    pre = addon.TM_Prefetcher(); lib = addon.TM_Asset_Library()
+    now = [100.0]; monkeypatch.setattr(addon.time, "perf_counter", lambda: now[0])
+    settings = ("highest", True, False, True)
+    monkeypatch.setattr(pre, "pool", types.SimpleNamespace(submit=lambda *a: types.SimpleNamespace(cancel=lambda: None)))
+    # Two folders browsed one after the other: their unconverted cards queue up together
+    pre.want(["A", "B"], None, "/root", settings, True); pre.to_convert.update({"/a.Gbx": (pre.generation, 0), "/b.Gbx": (pre.generation, 1)})
+    now[0] += 0.5; pre.want(["C"], None, "/root", settings, True); pre.to_convert["/c.Gbx"] = (pre.generation, 0)
+    now[0] += 0.5; pre.convert(lib); assert not launched
+    now[0] += pre.IDLE; pre.convert(lib)
+    assert len(launched) == 1 and not pre.to_convert
+    with open(launched[0], encoding="utf-8") as f: assert json.load(f)["files"] == ["/c.Gbx", "/a.Gbx", "/b.Gbx"]
+    pre.converter.cancel()
+
+
+def test_other_settings_drop_the_queue(addon):
+    pre = addon.TM_Prefetcher(); pre.pool = types.SimpleNamespace(submit=lambda *a: types.SimpleNamespace(cancel=lambda: None))
+    pre.want(["A"], None, "/root", ("highest", True, False, True), True); pre.to_convert["/a.Gbx"] = (pre.generation, 0)
+    pre.want(["A"], None, "/root", ("lowest", True, False, True), True)
+    assert not pre.to_convert
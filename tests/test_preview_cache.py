@@ -0,0 +1,63 @@
+"""TM_Preview_Cache: hits and misses, the MB budget, and meshes placed blocks still use."""
+import sys
+
+import pytest
+
+from standins import Vector
+
+
+class Mesh:
+    # vertices/loops/polygons only need a length; 10000 vertices count as 400000 bytes, so two fit in 1 MB
+    def __init__(self, name, users=0):
+        self.name = name; self.users = users; self.use_fake_user = False
+        self.vertices = [None] * 10000; self.loops = self.polygons = ()
+
+
+class Meshes(list):
+    def remove(self, mesh): self.append(mesh)
+
+
+@pytest.fixture
+def removed(monkeypatch):
+    meshes = Meshes(); monkeypatch.setattr(sys.modules["bpy"].data, "meshes", meshes, raising=False)
+    return meshes
+
+
+def put(cache, key, mesh):
+    cache.put(key, mesh, Vector((-16, -16, 0)), Vector((16, 16, 8)), (1.0, 1.0, 1.0))
+
+
+def test_hit_and_miss(addon, removed):
+    cache = addon.TM_Preview_Cache(); mesh = Mesh("Road")
+    assert cache.get("road") is None
+    put(cache, "road", mesh)
+    e = cache.get("road")
+    assert e[0] is mesh and list(e[2] - e[1]) == [32, 32, 8] and mesh.use_fake_user
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_budget_evicts_least_recent(addon, removed):
+    cache = addon.TM_Preview_Cache(budget_mb=1); meshes = [Mesh(f"M{i}") for i in range(3)]
+    put(cache, 0, meshes[0]); put(cache, 1, meshes[1]); cache.get(0); put(cache, 2, meshes[2])
+    # Over budget by one mesh: 1 was used longest ago (0 was read after it)
+    assert list(cache.entries) == [0, 2] and removed == [meshes[1]] and not meshes[1].use_fake_user
+    assert cache.evictions == 1 and cache.size == 800000
+    cache.set_budget(0); assert not cache.entries and cache.size == 0
+
+
+def test_placed_mesh_freed_later(addon, removed):
+    cache = addon.TM_Preview_Cache(); mesh = Mesh("Road", users=1); put(cache, "road", mesh)
+    cache.clear()
+    # A placed block still uses the mesh: kept as an orphan until its last user is gone
+    assert not cache.entries and cache.orphans == [mesh] and not removed
+    mesh.users = 0; cache.collect()
+    assert removed == [mesh] and not cache.orphans
+
+
+def test_deleted_mesh_is_a_miss(addon, removed):
+    class Gone:
+        # A mesh removed behind the cache's back: every attribute access fails
+        def __getattr__(self, name): raise ReferenceError
+        def __setattr__(self, name, value): raise ReferenceError
+    cache = addon.TM_Preview_Cache(); put(cache, "road", Mesh("Road")); cache.entries["road"] = (Gone(),) + cache.entries["road"][1:]
+    assert cache.get("road") is None and "road" not in cache.entries and cache.size == 0
@@ -0,0 +1,57 @@
+"""TM_Profiler: wrapping and restoring the hot paths, the HUD statistics, and the session-only toggle."""
+import types
+
+import pytest
+
+from standins import context, preferences
+
+
+@pytest.fixture
+def profiler(addon):
+    prof = addon.TM_Profiler()
+    yield prof
+    prof.disable()
+
+
+def test_enable_disable_restores(addon, profiler):
+    draw, free = addon.draw_callback_px, addon.TM_Import_Record.__dict__["free"]
+    profiler.enable()
+    assert addon.draw_callback_px is not draw and addon.TM_Import_Record.__dict__["free"] is not free
+    assert addon.draw_callback_px.__wrapped__ is draw
+    profiler.disable()
+    assert addon.draw_callback_px is draw and addon.TM_Import_Record.__dict__["free"] is free and not profiler.enabled
+
+
+def test_attached_operator_unwrapped(addon, profiler):
+    op = addon.VIEW3D_OT_tm_inventory(); profiler.attach(op); profiler.enable()
+    assert "handle_event" in op.__dict__
+    profiler.attach(None)
+    assert "handle_event" not in op.__dict__ and profiler.enabled and profiler.op is None
+
+
+def test_stats(profiler):
+    timed = profiler.wrap("work", lambda x: x * 2)
+    assert [timed(i) for i in range(10)] == [i * 2 for i in range(10)]
+    profiler.samples["slow"] = type(profiler.samples["work"])([5_000_000] * 3, maxlen=profiler.WINDOW)
+    stats = profiler.stats()
+    assert list(stats) == ["slow", "work"] and stats["slow"] == (3, 5.0, 5.0, 5.0) and stats["work"][0] == 10
+    assert profiler.calls == 10 and profiler.dropped == 0
+    profiler.reset(); assert not profiler.trace and not profiler.samples["work"]
+
+
+def key(type, ctrl=False, shift=False):
+    return types.SimpleNamespace(type=type, value='PRESS', ctrl=ctrl, shift=shift, alt=False, unicode="", mouse_region_x=1500, mouse_region_y=100)
+
+
+def test_session_enable_undone_on_close(addon, monkeypatch):
+    prof = addon.tm_profile; op = addon.VIEW3D_OT_tm_inventory(); ctx = context(preferences(profile=False))
+    monkeypatch.setattr(op, "cleanup_preview", lambda: None, raising=False)
+    monkeypatch.setattr(addon.tm_manager, "is_searching", False); monkeypatch.setattr(addon.tm_manager, "is_open", True)
+    op._timer = None; op._h2d = op._h3d = None
+    try:
+        prof.attach(op)
+        assert op.handle_event(ctx, key('P', ctrl=True, shift=True)) == {'RUNNING_MODAL'} and prof.enabled
+        # ESC closes the overlay; the Profiler preference is off, so the session's timers go too
+        assert op.handle_event(ctx, key('ESC')) == {'CANCELLED'}
+        assert not prof.enabled and prof.op is None
+    finally: prof.disable(); prof.op = None
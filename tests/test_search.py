@@ -0,0 +1,76 @@
+"""TM_Search_Index ranking, narrowing while typing, and its agreement with the old substring walk."""
+import pytest
+
+from bench_search import walk_search
+
+QUERIES = ["roadtechcurve3", "platformgrass", "rtc3", "deco hill", "gtloop", "r", "3", "zz"]
+
+
+@pytest.fixture
+def index(addon, block_tree):
+    return addon.TM_Search_Index(block_tree)
+
+
+def scored(index, text):
+    # The ranking from first principles: score every leaf
+    terms = text.split(); pats = [index.abbrev_pattern(t) if len(t) > 1 else None for t in terms]
+    hits = [(sc, index.order[i], i) for i in index.tree.leaves if (sc := index.score(i, terms, pats)) is not None]
+    return [i for _, _, i in sorted(hits)]
+
+
+def test_exact_name_first(index, block_tree):
+    for i in block_tree.leaves[::97]:
+        assert index.query(block_tree.names[i])[0] in [j for j in block_tree.leaves if block_tree.names[j] == block_tree.names[i]]
+
+
+def test_kinds_ranked(index, block_tree):
+    names = [block_tree.names[i].lower() for i in index.query("road")]
+    prefix = [n.startswith("road") for n in names]
+    assert prefix == sorted(prefix, reverse=True) and prefix[0]
+
+
+def test_abbreviation(index, block_tree):
+    res = index.query("rtc3")
+    assert res and all(index.score(i, ["rtc3"], [index.abbrev_pattern("rtc3")]) is not None for i in res)
+    assert any(block_tree.names[i].lower().startswith("roadtechcurve3") for i in res[:5])
+
+
+@pytest.mark.parametrize("q", QUERIES)
+def test_typing_narrows_and_matches_full_scan(index, q):
+    prev = None
+    for k in range(1, len(q) + 1):
+        res = index.query(q[:k])
+        assert res == scored(index, " ".join(q[:k].split()))
+        if prev is not None and " " not in q[k - 1:k]: assert set(res) <= set(prev)
+        prev = res
+    # Backspacing and retyping returns the same results as a fresh index
+    for k in range(len(q) - 1, 0, -1): assert index.query(q[:k]) == scored(index, " ".join(q[:k].split()))
+
+
+def test_short_tables(index):
+    for key in list(index.short)[::7]:
+        if key.strip() == key and " " not in key: assert index.short[key] == scored(index, key)
+
+
+@pytest.mark.parametrize("q", ["road", "grass", "curve3", "loop", "xyz"])
+def test_covers_old_walk(index, block_tree, source_roots, q):
+    walked = {i["Name"] for i in walk_search(source_roots, q)}
+    found = [block_tree.names[i] for i in index.query(q)]
+    assert walked <= set(found)
+    assert {n for n in found if q in n.lower()} == {block_tree.names[i] for i in block_tree.leaves if q in block_tree.names[i].lower()}
+
+
+def test_saved_tables_round_trip(addon, block_tree, index, tmp_path):
+    path = str(tmp_path / "blocks.sidx"); built = addon.TM_Search_Index.load(block_tree, path)
+    loaded = addon.TM_Search_Index.load(block_tree, path)
+    for t in ("lower", "tokens", "order", "short", "pairs", "starts"): assert getattr(loaded, t) == getattr(index, t), t
+    assert all(loaded.query(q) == built.query(q) for q in QUERIES)
+
+
+def test_saved_tables_rebuilt_for_other_source(addon, block_tree, tmp_path, monkeypatch):
+    path = str(tmp_path / "blocks.sidx"); addon.TM_Search_Index.load(block_tree, path)
+    monkeypatch.setattr(block_tree, "sha1", "0" * 40)
+    with pytest.raises(ValueError):
+        with open(path, 'rb') as f: addon.TM_Search_Index.from_bytes(block_tree, f.read())
+    assert addon.TM_Search_Index.load(block_tree, path).query("rtc3")
+    with open(path, 'rb') as f: assert addon.TM_Search_Index.from_bytes(block_tree, f.read()).short
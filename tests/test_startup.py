@@ -0,0 +1,58 @@
+"""Staged background load: invoke returns at once, the worker's results are applied on main-thread ticks."""
+import time
+import queue
+import threading
+
+import pytest
+
+
+@pytest.fixture
+def manager(addon, block_tree, tmp_path, monkeypatch):
+    for const in ("BLOCKS_JSON_FILE", "MANIFEST_FILE"):
+        (tmp_path / const).write_text("{}"); monkeypatch.setattr(addon, const, str(tmp_path / const))
+    mgr = addon.TM_Inventory_Manager(); mgr.atlas_cell = 0; gate = threading.Event(); calls = []
+    def read_cache():
+        calls.append(threading.current_thread()); gate.wait(5)
+        if isinstance(mgr.fail, Exception): raise mgr.fail
+        return block_tree, block_tree, addon.TM_Search_Index(block_tree), addon.TM_Search_Index(block_tree)
+    mgr.fail = None; monkeypatch.setattr(mgr, "read_cache", read_cache)
+    return mgr, gate, calls
+
+
+def tick_until(mgr, status, timeout=5.0):
+    end = time.monotonic() + timeout; seen = []
+    while time.monotonic() < end:
+        seen.append(mgr._load_tick())
+        if mgr.loading_status == status: return seen
+        time.sleep(0.005)
+    raise AssertionError(f"still {mgr.loading_status}, expected {status}")
+
+
+def test_start_returns_before_index(manager):
+    mgr, gate, calls = manager
+    t0 = time.perf_counter(); mgr.start_load(); assert time.perf_counter() - t0 < 0.5
+    assert mgr.loading_status == "SYNC"
+    tick_until(mgr, "INDEX"); mgr.start_load() # Already loading: no second worker
+    gate.set(); ticks = tick_until(mgr, "READY")
+    assert ticks[-1] is None and len(calls) == 1 and calls[0] is not threading.main_thread()
+    assert mgr.active_rows and mgr.load_message == ""
+
+
+def test_error_reported_and_retryable(manager):
+    mgr, gate, calls = manager; mgr.fail = OSError("disk full"); gate.set()
+    mgr.start_load(); tick_until(mgr, "ERROR")
+    assert "disk full" in mgr.load_message and mgr._load_tick() is None
+    mgr.fail = None; mgr.start_load(); tick_until(mgr, "READY")
+    assert len(calls) == 2
+
+
+def test_forced_sync_reports_progress(manager, monkeypatch):
+    mgr, gate, calls = manager; gate.set(); seen = []
+    def download_all(progress):
+        progress("ICONS", 1, 2); return {"fetched": ["a.png"], "failed": [], "bytes": 10}
+    monkeypatch.setattr(mgr, "download_all", download_all)
+    class Recorded(queue.Queue):
+        def put(self, msg): seen.append(msg[0]); super().put(msg)
+    mgr._load_queue = Recorded()
+    mgr.start_load(force_sync=True); tick_until(mgr, "READY")
+    assert seen[:3] == ["SYNC", "SYNC", "INDEX"] and "DONE" in seen
@@ -0,0 +1,118 @@
+"""TM_Data_Sync against a file:// mirror laid out like the repository."""
+import os
+import sys
+import json
+import shutil
+import hashlib
+import threading
+from http.server import HTTPServer, BaseHTTPRequestHandler
+
+import pytest
+
+from conftest import ROOT, SOURCE
+
+sys.path.insert(0, os.path.join(ROOT, "tools"))
+import build_manifest
+
+ICONS = {"Block_Icons": ["RoadTechStraight.png", "RoadTechCurve1.png"], "Item_Icons": ["Flag.png"]}
+
+
+@pytest.fixture
+def mirror(tmp_path):
+    root = tmp_path / "mirror"; root.mkdir()
+    shutil.copyfile(SOURCE, root / "BlockInfoInventory.gbx.json")
+    (root / "ItemInventory.gbx.json").write_text('{"RootChilds": []}', encoding="utf-8")
+    src = sorted(n for n in os.listdir(os.path.join(ROOT, "Block_Icons")) if n.endswith(".png"))
+    for k, (d, names) in enumerate(ICONS.items()):
+        (root / d).mkdir()
+        for n, name in enumerate(names): shutil.copyfile(os.path.join(ROOT, "Block_Icons", src[k * 10 + n]), root / d / name)
+    return root
+
+
+@pytest.fixture
+def cache(addon, tmp_path, monkeypatch):
+    # Point the addon's cache files at an empty directory for this test
+    cache = tmp_path / "cache"; cache.mkdir()
+    for attr, name in (("ICONS_DIR", "icons"), ("BLOCKS_JSON_FILE", "blocks.json"), ("ITEMS_JSON_FILE", "items.json"), ("MANIFEST_FILE", "manifest.json"), ("ZIP_FILE", "data.zip")):
+        monkeypatch.setattr(addon, attr, str(cache / name))
+    return cache
+
+
+def manifest(root, monkeypatch):
+    monkeypatch.setattr(build_manifest, "ROOT", str(root)); build_manifest.main()
+    with open(root / "manifest.json", encoding="utf-8") as f: return json.load(f)["files"]
+
+
+def sync(addon, root):
+    return addon.TM_Data_Sync(root.as_uri()).run()
+
+
+def test_manifest_sync(addon, mirror, cache, monkeypatch):
+    files = manifest(mirror, monkeypatch)
+    report = sync(addon, mirror)
+    assert sorted(report["fetched"]) == sorted(files) and not report["failed"]
+    assert report["bytes"] == sum(size for _, size in files.values())
+    assert (cache / "blocks.json").read_bytes() == (mirror / "BlockInfoInventory.gbx.json").read_bytes()
+    assert sorted(os.listdir(cache / "icons")) == sorted(n for names in ICONS.values() for n in names)
+    # Nothing changed: nothing is fetched; one changed icon: only that one
+    assert sync(addon, mirror)["fetched"] == []
+    shutil.copyfile(mirror / "Block_Icons" / "RoadTechStraight.png", mirror / "Item_Icons" / "Flag.png"); manifest(mirror, monkeypatch)
+    assert sync(addon, mirror)["fetched"] == ["Item_Icons/Flag.png"]
+
+
+def test_checksum_mismatch(addon, mirror, cache, monkeypatch):
+    manifest(mirror, monkeypatch)
+    (mirror / "Block_Icons" / "RoadTechCurve1.png").write_bytes(b"not the listed file")
+    report = sync(addon, mirror)
+    assert [rel for rel, _ in report["failed"]] == ["Block_Icons/RoadTechCurve1.png"]
+    assert not (cache / "icons" / "RoadTechCurve1.png").exists()
+    with open(cache / "manifest.json", encoding="utf-8") as f: assert "Block_Icons/RoadTechCurve1.png" not in json.load(f)["files"]
+
+
+def test_without_manifest(addon, mirror, cache):
+    report = sync(addon, mirror)
+    icons = [f"{d}/{n}" for d, names in ICONS.items() for n in sorted(names)]
+    assert sorted(report["fetched"]) == sorted(["BlockInfoInventory.gbx.json", "ItemInventory.gbx.json"] + icons) and not report["failed"]
+    with open(cache / "manifest.json", encoding="utf-8") as f: recorded = json.load(f)["files"]
+    assert set(recorded) == set(report["fetched"])
+    # Icons already there are not fetched again; the JSON files cannot be compared without a manifest
+    assert sorted(sync(addon, mirror)["fetched"]) == ["BlockInfoInventory.gbx.json", "ItemInventory.gbx.json"]
+
+
+class RangeHandler(BaseHTTPRequestHandler):
+    # Serves `body`, honouring "Range: bytes=N-" and answering 416 past the end, as GitHub does
+    body = b""
+
+    def do_GET(self):
+        start = int(self.headers.get("Range", "bytes=0-")[6:].rstrip("-") or 0); body = self.body
+        if start >= len(body) and self.headers.get("Range"): self.send_response(416); self.end_headers(); return
+        self.send_response(206 if start else 200); self.send_header("Content-Length", str(len(body) - start)); self.end_headers()
+        self.wfile.write(body[start:])
+
+    def log_message(self, *args): pass
+
+
+@pytest.fixture
+def server():
+    httpd = HTTPServer(("127.0.0.1", 0), RangeHandler); threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_port}/file"
+    httpd.shutdown(); httpd.server_close()
+
+
+@pytest.mark.parametrize("leftover", ["whole", "stale"])
+def test_leftover_part_past_the_end(addon, server, tmp_path, leftover):
+    body = RangeHandler.body = bytes(range(256)) * 64; dest = tmp_path / "icon.png"
+    (tmp_path / "icon.png.part").write_bytes(body if leftover == "whole" else b"x" * (len(body) + 10))
+    got = addon.TM_Data_Sync().download(server, str(dest), hashlib.sha1(body).hexdigest())
+    assert dest.read_bytes() == body and not (tmp_path / "icon.png.part").exists()
+    assert got == (0 if leftover == "whole" else len(body))
+
+
+def test_corrupt_archive_dropped(addon, mirror, cache, monkeypatch):
+    manifest(mirror, monkeypatch)
+    bad = mirror / "main.zip"; bad.write_bytes(b"PK not really an archive")
+    s = addon.TM_Data_Sync(mirror.as_uri(), bulk_threshold=0); s.zip_url = bad.as_uri()
+    report = s.run()
+    assert [rel for rel, _ in report["failed"]] == [bad.as_uri()] and not (cache / "data.zip").exists()
+    # The files still arrive one by one
+    assert sorted(os.listdir(cache / "icons")) == sorted(n for names in ICONS.values() for n in names)
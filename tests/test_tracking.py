@@ -0,0 +1,59 @@
+"""Ghost tracking: moves inside the snapped cell are skipped, coalesced moves catch up, preview writes are throttled."""
+import types
+
+import pytest
+
+from standins import Vector, context
+
+
+class Preview:
+    # Records every transform write; in Blender each one re-evaluates the preview mesh
+    def __init__(self): object.__setattr__(self, "writes", [])
+    def __setattr__(self, name, value): self.writes.append((name, tuple(value)))
+
+
+@pytest.fixture
+def tracking(addon, monkeypatch):
+    mgr = addon.TM_Inventory_Manager(); mgr.ghost_min, mgr.ghost_max = Vector((0, 0, 0)), Vector((64, 64, 8)); mgr.active_preview_obj = Preview()
+    clock = [10.0]
+    monkeypatch.setattr(addon, "tm_manager", mgr); monkeypatch.setattr(addon, "tm_occupancy", addon.TM_Occupancy())
+    monkeypatch.setattr(addon, "time", types.SimpleNamespace(perf_counter=lambda: clock[0]))
+    return addon.VIEW3D_OT_tm_inventory(), mgr, clock, context()
+
+
+def positions(preview): return [v for name, v in preview.writes if name == "location"]
+
+
+def test_moves_within_cell_skipped(tracking):
+    op, mgr, clock, ctx = tracking
+    assert op.update_ghost_location(ctx, 40, 40, live=True) and tuple(mgr.ghost_pos) == (32, 32, 0)
+    # The stand-in view maps one pixel to one metre: these stay in the same 32 m cell
+    assert not any(op.update_ghost_location(ctx, 40 + d, 40 + d, live=True) for d in range(1, 20))
+    assert op.update_ghost_location(ctx, 70, 40, live=True) and tuple(mgr.ghost_pos) == (64, 32, 0)
+    # Rotating re-snaps even though the cell is unchanged
+    mgr.ghost_rotation_euler.z += 1.5707963267948966
+    assert op.update_ghost_location(ctx, 70, 40, live=True)
+
+
+def test_preview_writes_throttled(tracking):
+    op, mgr, clock, ctx = tracking; preview = mgr.active_preview_obj
+    op.update_ghost_location(ctx, 40, 40, live=True); op.update_ghost_location(ctx, 70, 40, live=True); op.update_ghost_location(ctx, 100, 40, live=True)
+    # The first move writes the preview; the ones following within PREVIEW_INTERVAL only move the ghost box
+    assert positions(preview) == [(32, 32, 0)] and tuple(mgr.ghost_pos) == (96, 32, 0)
+    clock[0] += op.PREVIEW_INTERVAL / 2; op.flush_preview(); assert len(positions(preview)) == 1
+    clock[0] += op.PREVIEW_INTERVAL; op.flush_preview(); op.flush_preview()
+    assert positions(preview) == [(32, 32, 0), (96, 32, 0)]
+    # Non-live updates (rotating, Z steps) write at once
+    op.update_ghost_location(ctx, 0, 0, force_snap=True); assert len(positions(preview)) == 3
+
+
+def test_timer_catches_up_coalesced_move(addon, tracking, monkeypatch):
+    op, mgr, clock, ctx = tracking; preview = mgr.active_preview_obj
+    monkeypatch.setattr(addon, "tm_prefetch", types.SimpleNamespace(tick=lambda c: None)); op._catalog_seen = addon.tm_catalog.version
+    op.update_ghost_location(ctx, 40, 40, live=True)
+    # A move that arrived within TRACK_INTERVAL of the last one was only recorded
+    op._mouse_pending = (130, 40)
+    clock[0] += 2 * op.PREVIEW_INTERVAL; op.handle_event(ctx, types.SimpleNamespace(type='TIMER'))
+    assert op._mouse_pending is None and tuple(mgr.ghost_pos) == (128, 32, 0) and positions(preview)[-1] == (128, 32, 0)
+    writes = len(preview.writes); op.handle_event(ctx, types.SimpleNamespace(type='TIMER'))
+    assert len(preview.writes) == writes
@@ -0,0 +1,74 @@
+"""TM_UI_Layout: zones and cards under a point, the visible window of long rows and results, and scrolling it."""
+import types
+
+import pytest
+
+
+class Tree:
+    # Every row holds blocks; each index has its own icon
+    def icon_name(self, i): return f"Icon{i}"
+    def is_leaf_row(self, row): return True
+
+
+def manager(rows=(range(0, 10),), results=(), **attrs):
+    m = types.SimpleNamespace(ui_width=830.0, tree=Tree(), active_rows=list(rows), row_scroll={}, search_results=list(results),
+        search_query="q" if results else "", search_scroll=0)
+    m.__dict__.update(attrs)
+    return m
+
+
+@pytest.fixture
+def layout(addon):
+    return lambda m, rows=6: addon.TM_UI_Layout(m, None, rows)
+
+
+def centre(lay, k):
+    x, y = lay.cards[k][:2]
+    return x + lay.card_w / 2, y + lay.card_h / 2
+
+
+def test_bar_zones(layout):
+    lay = layout(manager())
+    assert lay.hit(lay.sx + 1, -10)[0] == "SEARCH" and lay.hit(5, -10)[0] == "NAME"
+    assert lay.hit(lay.hx + 1, -10)[0] == "HELP" and lay.hit(lay.cur_w - 5, -10)[0] == "RESIZE"
+    assert lay.hit(20, 5)[0] == "MODE_BLOCKS" and lay.hit(20 + 45, 5)[0] == "MODE_ITEMS"
+
+
+def test_cards_by_grid_cell(layout):
+    m = manager(rows=(range(0, 10), range(10, 13)), results=range(100, 120)); lay = layout(m)
+    assert len(lay.cards) == 7 + 3 + 20 and lay.search_row0 == 2
+    for k, card in enumerate(lay.cards):
+        zone, hit = lay.hit(*centre(lay, k)); assert zone == "CARD" and hit is card
+    # The index tab below a card and the gap between cards hit nothing
+    x, y = lay.cards[0][:2]
+    assert lay.hit(x + 1, y + lay.card_h + 2) == (None, None) and lay.hit(x + lay.card_w + 2, y + 1) == (None, None)
+    # Empty cells of a short row
+    assert lay.hit(lay.x0 + 5 * lay.slot_w + 5, lay.sy_cards + lay.row_h + 5) == (None, None)
+    assert [lay.item(m, c) for c in lay.cards[10:13]] == [100, 101, 102]
+
+
+def test_visible_window_and_prefetch(layout):
+    m = manager(rows=(range(0, 20),), results=range(100, 200), row_scroll={0: 5}); lay = layout(m, rows=2)
+    assert [c[3] for c in lay.cards[:7]] == list(range(5, 12)) and lay.row_more == [(True, True)]
+    assert lay.result_rows == 2 and lay.result_scroll_max == 13 and lay.n_results == 100
+    # Two cards either side of the folder row, and the result row just below the window
+    assert lay.prefetch == [f"Icon{i}" for i in (3, 4, 12, 13)] + [f"Icon{i}" for i in range(114, 121)]
+
+
+def test_scroll_clamped(addon, layout):
+    m = manager(rows=(range(0, 10),), results=range(100, 130)); lay = layout(m, rows=2)
+    scroll = lambda row, steps: addon.TM_Inventory_Manager.scroll(m, lay, row, steps)
+    assert scroll(0, 2) and m.row_scroll[0] == 2
+    assert scroll(0, 5) and m.row_scroll[0] == 3 and not scroll(0, 1) # Ten cards, seven shown
+    assert scroll(0, -9) and m.row_scroll[0] == 0
+    # 30 results make five rows, two shown: three rows to scroll
+    assert scroll(lay.search_row0, 10) and m.search_scroll == 3 and not scroll(lay.search_row0 + 1, 1)
+    assert not scroll(None, 1)
+    lay = layout(m, rows=2); assert lay.result_first == 21 and lay.result_last == 30 and len(lay.cards) == 7 + 9
+
+
+def test_no_result_cap(layout):
+    # Scrolled to the end of 1000 results, the last one is still laid out
+    m = manager(rows=(), results=range(1000)); lay = layout(m, rows=6)
+    m.search_scroll = lay.result_scroll_max; lay = layout(m, rows=6)
+    assert lay.result_last == 1000 and lay.item(m, lay.cards[-1]) == 999
@@ -0,0 +1,35 @@
+"""Write manifest.json: SHA-1 and size of every file the inventory addon syncs.
+
+Run from the repository root after changing the JSON or icons:
+
+    python tools/build_manifest.py
+"""
+import os
+import json
+import hashlib
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SOURCES = ["BlockInfoInventory.gbx.json", "ItemInventory.gbx.json", "Block_Icons", "Item_Icons"]
+
+
+def entries(root):
+    for src in SOURCES:
+        path = os.path.join(root, src)
+        if os.path.isfile(path): yield src
+        elif os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                if name.lower().endswith(".png"): yield f"{src}/{name}"
+
+
+def main():
+    files = {}
+    for rel in entries(ROOT):
+        with open(os.path.join(ROOT, rel), "rb") as f: data = f.read()
+        files[rel] = [hashlib.sha1(data).hexdigest(), len(data)]
+    with open(os.path.join(ROOT, "manifest.json"), "w", encoding="utf-8", newline="\n") as f:
+        json.dump({"version": 1, "files": files}, f, separators=(",", ":"), sort_keys=True)
+    print(f"manifest.json: {len(files)} files")
+
+
+if __name__ == "__main__":
+    main()